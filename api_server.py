@@ -1,19 +1,210 @@
-from fastapi import FastAPI, Query
+import json
+from typing import Any, Dict
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from bot_engine.fusion_engine import fuse_signals
+from bot_engine.fusion_engine import fuse_signals, fuse_signals_batch
+
+# ✅ Optional binary encodings
+try:
+    import msgpack
+    MSGPACK_ENABLED = True
+except ImportError:
+    MSGPACK_ENABLED = False
+
+try:
+    import pyarrow as pa
+    ARROW_ENABLED = True
+except ImportError:
+    ARROW_ENABLED = False
+
+JSON_TYPE = "application/json"
+MSGPACK_TYPE = "application/msgpack"
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+MAX_BATCH_ROWS = 100_000
+
+# Columns accepted by /fuse/batch (name -> default, None = required)
+BATCH_COLUMNS = {
+    "sentiment_score": None,
+    "urgency": "low",
+    "forecast": None,
+    "structure_confirmed": False,
+    "structure_type": "",
+    "sl_buffer": 0.0,
+    "entry": None,
+    "volatility": None,
+    "spread": None,
+    "median_spread": 1.0,
+    "median_volatility": 1.0,
+    "data_age": 0,
+}
+TEXT_COLUMNS = {"urgency", "structure_type"}
 
 app = FastAPI()
 
 class SignalInput(BaseModel):
-    smc_score: float
-    forecast: float
     sentiment_score: float
+    urgency: str = "low"
+    forecast: float
+    structure_confirmed: bool = False
+    structure_type: str = ""
+    sl_buffer: float = 0.0
+    entry: float
+    volatility: float
+    spread: float
+    median_spread: float = 1.0
+    median_volatility: float = 1.0
+    data_age: int = 0
     symbol: str = "EURUSD"
     timeframe: str = "M5"
 
 @app.post("/fuse")
 def fuse(input: SignalInput):
-    smc_ctx = {"bias_score": input.smc_score}
-    sentiment = {"sentiment_score": input.sentiment_score}
-    result = fuse_signals(smc_ctx, input.forecast, sentiment, symbol=input.symbol, timeframe=input.timeframe)
-    return result
\ No newline at end of file
+    sentiment = {"score": input.sentiment_score, "urgency": input.urgency}
+    structure = {"confirmed": input.structure_confirmed, "type": input.structure_type, "sl_buffer": input.sl_buffer}
+    market_state = {
+        "entry": input.entry,
+        "volatility": input.volatility,
+        "spread": input.spread,
+        "median_spread": input.median_spread,
+        "median_volatility": input.median_volatility,
+        "data_age": input.data_age
+    }
+    result = fuse_signals(sentiment, input.forecast, structure, market_state)
+    return {"symbol": input.symbol, "timeframe": input.timeframe, **result}
+
+# === BATCH ENDPOINT ===
+
+def _decode_body(body: bytes, content_type: str) -> Dict[str, Any]:
+    """Decode a batch request into {column: list/array}. Accepts columns or a list of records."""
+    if content_type.startswith(ARROW_TYPE):
+        if not ARROW_ENABLED:
+            raise HTTPException(status_code=415, detail="Arrow support not installed (pip install pyarrow)")
+        table = pa.ipc.open_stream(body).read_all()
+        return {name: table.column(name).to_numpy(zero_copy_only=False) for name in table.column_names}
+    if content_type.startswith(MSGPACK_TYPE):
+        if not MSGPACK_ENABLED:
+            raise HTTPException(status_code=415, detail="msgpack support not installed (pip install msgpack)")
+        data = msgpack.unpackb(body, raw=False)
+    else:
+        data = json.loads(body)
+    if isinstance(data, dict) and "inputs" in data:
+        data = data["inputs"]
+    if isinstance(data, list):
+        data = {name: [row.get(name) for row in data] for name in set().union(*data)} if data else {}
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Body must be a column mapping or a list of records")
+    return data
+
+def _column_values(name: str, values) -> np.ndarray:
+    """One 1-D column; scalars, nested lists and mappings are rejected."""
+    if isinstance(values, np.ndarray):
+        array = values
+    elif isinstance(values, (list, tuple)):
+        if any(isinstance(v, (list, tuple, dict)) for v in values):
+            raise HTTPException(status_code=400, detail=f"Column {name} must hold scalar values")
+        array = np.asarray(values, dtype=object)
+    else:
+        raise HTTPException(status_code=400, detail=f"Column {name} must be an array, got {type(values).__name__}")
+    if array.ndim != 1:
+        raise HTTPException(status_code=400, detail=f"Column {name} must be one-dimensional")
+    return array
+
+def _numeric_column(name: str, values: np.ndarray, default) -> np.ndarray:
+    """Float column; nulls (None/NaN) take the default, or are a 400 for required columns."""
+    if values.dtype.kind in "fiub":
+        array = values.astype(float)
+    else:
+        if any(isinstance(v, (str, bytes)) for v in values):
+            raise HTTPException(status_code=400, detail=f"Column {name} must be numeric")
+        try:
+            array = np.array([np.nan if v is None else v for v in values], dtype=float)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail=f"Column {name} must be numeric")
+    missing = np.isnan(array)
+    if missing.any():
+        if default is None:
+            rows = np.flatnonzero(missing)[:10].tolist()
+            raise HTTPException(status_code=400, detail=f"Column {name} has null values (rows {rows})")
+        array[missing] = default
+    return array
+
+def _build_columns(data: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    data = {name: _column_values(name, values) for name, values in data.items()}
+    lengths = {len(v) for v in data.values()}
+    if len(lengths) > 1:
+        raise HTTPException(status_code=400, detail="All columns must have the same length")
+    n = lengths.pop() if lengths else 0
+    if n > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_BATCH_ROWS} rows)")
+    columns = {}
+    for name, default in BATCH_COLUMNS.items():
+        if name not in data:
+            if default is None:
+                raise HTTPException(status_code=400, detail=f"Missing required column: {name}")
+            columns[name] = np.full(n, default)
+        elif name in TEXT_COLUMNS:
+            columns[name] = np.array([default if v is None else str(v) for v in data[name]], dtype=object)
+        else:
+            columns[name] = _numeric_column(name, data[name], default)
+    columns["symbol"] = np.asarray(data["symbol"] if "symbol" in data else [""] * n, dtype=object)
+    return columns
+
+def _fuse_batch(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    table = fuse_signals_batch(
+        sentiment_score=columns["sentiment_score"].astype(float),
+        sentiment_urgency=columns["urgency"],
+        forecast=columns["forecast"].astype(float),
+        structure_confirmed=columns["structure_confirmed"].astype(bool),
+        structure_type=columns["structure_type"],
+        sl_buffer=columns["sl_buffer"].astype(float),
+        entry=columns["entry"].astype(float),
+        volatility=columns["volatility"].astype(float),
+        spread=columns["spread"].astype(float),
+        median_spread=columns["median_spread"].astype(float),
+        median_volatility=columns["median_volatility"].astype(float),
+        data_age=columns["data_age"].astype(float)
+    )
+    return {"symbol": columns["symbol"], **table}
+
+def _encode_table(table: Dict[str, np.ndarray], accept: str) -> Response:
+    if ARROW_TYPE in accept and ARROW_ENABLED:
+        batch = pa.RecordBatch.from_pydict({k: pa.array(v.tolist() if v.dtype == object else v)
+                                            for k, v in table.items()})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_TYPE)
+    # NaN is not valid JSON; unset numeric fields are sent as null
+    columns = {k: [None if isinstance(x, float) and x != x else x for x in v.tolist()]
+               for k, v in table.items()}
+    if MSGPACK_TYPE in accept and MSGPACK_ENABLED:
+        return Response(content=msgpack.packb(columns, use_bin_type=True), media_type=MSGPACK_TYPE)
+    return Response(content=json.dumps(columns), media_type=JSON_TYPE)
+
+@app.post("/fuse/batch")
+async def fuse_batch(request: Request):
+    """
+    Fuse thousands of signal rows per request through the vectorized fusion path.
+
+    Body: columns ({"entry": [...], ...}) or records ([{...}, ...]) as JSON,
+    msgpack (Content-Type: application/msgpack) or Arrow IPC stream
+    (Content-Type: application/vnd.apache.arrow.stream).
+    The response is a column table encoded per the Accept header (JSON by default).
+    """
+    body = await request.body()
+    content_type = request.headers.get("content-type", JSON_TYPE)
+    accept = request.headers.get("accept", "*/*")
+    if accept.strip() in ("", "*/*"):
+        accept = content_type       # no preference: answer in the request's encoding
+    try:
+        data = _decode_body(body, content_type)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not decode body: {e}")
+    columns = _build_columns(data)
+    table = await run_in_threadpool(_fuse_batch, columns)
+    return await run_in_threadpool(_encode_table, table, accept)
@@ -6,6 +6,7 @@ import os, traceback, json, requests
 from datetime import datetime
 from dotenv import load_dotenv
 import subprocess, tempfile, shutil
+from llm_gateway import chat_sync, LLMError
 
 # === CONFIG ===
 MODEL = "deepseek/deepseek-chat-v3-0324:free"  # or "openai/gpt-4o"
@@ -32,15 +33,9 @@ def run_target_script():
 
 def call_llm_for_fix(code, error):
     print("🧠 Sending request to OpenRouter LLM...")
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "model": MODEL,
-        "messages": [{
-            "role": "user",
-            "content": f"""
+    messages = [{
+        "role": "user",
+        "content": f"""
 You are an elite Python quant systems engineer.
 
 This code crashed:
@@ -56,11 +51,13 @@ Error trace:
 Return a FULLY FIXED, clean version of the Python script.
 ONLY return raw code. No comments, no explanations.
 """.strip()
-        }]
-    }
+    }]
 
-    response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload)
-    fixed_code = response.json()['choices'][0]['message']['content']
+    try:
+        fixed_code = chat_sync(messages, model=MODEL, timeout=120)
+    except LLMError as e:
+        print(f"❌ LLM fix request failed: {e}")
+        return None
     with open(PATCH_OUTPUT, "w", encoding="utf-8") as f:
         f.write(fixed_code)
     return fixed_code
@@ -91,6 +88,9 @@ if __name__ == "__main__":
     code, error = run_target_script()
     if error:
         fixed_code = call_llm_for_fix(code, error)
+        if fixed_code is None:
+            notify_patch_event(TARGET_FILE, "❌ LLM request failed – no patch generated")
+            sys.exit(1)
         write_patch(fixed_code)
 
         # 🔎 Run tests in isolated temp environment
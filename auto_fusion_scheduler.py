@@ -1,12 +1,43 @@
-import schedule
-import time
-from trading_bot import main as trading_main
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 
-def job():
-    trading_main()
+from bot_engine.economic_calendar import refresh_calendar
+from bot_engine.feed_normalizer import get_normalized_market_states
+from bot_engine.multisymbol_manager import MAX_WORKERS, SYMBOLS, process_symbol
+from bot_engine.timer_wheel import BROKER_UTC_OFFSET_HOURS, BarCloseScheduler
 
-schedule.every(5).minutes.do(job)
+# Decisions run once per closed bar of each timeframe, BAR_CLOSE_OFFSET seconds after the boundary
+TIMEFRAMES = os.getenv("FUSION_TIMEFRAMES", "M5").split(",")
 
-while True:
-    schedule.run_pending()
-    time.sleep(1)
\ No newline at end of file
+def run_symbol(symbol, timeframe, market_state):
+    try:
+        process_symbol(symbol, market_state=market_state)
+    except Exception as e:
+        logging.error(f"[{symbol}] {timeframe} cycle failed: {e}", exc_info=True)
+
+def job(bar_close, jobs, max_workers=MAX_WORKERS):
+    # one batched snapshot per timeframe for every symbol whose bar just closed
+    refresh_calendar()
+    by_timeframe = {}
+    for symbol, timeframe in jobs:
+        by_timeframe.setdefault(timeframe, []).append(symbol)
+    # each cycle blocks on the EA ack: run the batch side by side so it ends before the next close
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bar-close") as pool:
+        for timeframe, symbols in by_timeframe.items():
+            # MT5 bar times are broker server time
+            snapshot = get_normalized_market_states(symbols, timeframe,
+                                                    closed_at=int(bar_close + BROKER_UTC_OFFSET_HOURS * 3600))
+            for symbol in symbols:
+                if symbol not in snapshot:
+                    logging.warning(f"[{symbol}] No closed {timeframe} bar at {bar_close:.0f}")
+                    continue
+                pool.submit(run_symbol, symbol, timeframe, snapshot[symbol])
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    scheduler = BarCloseScheduler()
+    for symbol in SYMBOLS:
+        for timeframe in TIMEFRAMES:
+            scheduler.add_job(symbol, timeframe)
+    scheduler.run(job)
@@ -7,9 +7,10 @@ Executes signal generation, alerting, journaling, and LLM review in one pass usi
 import os, json
 from datetime import datetime, timezone
 from dotenv import load_dotenv
-import MetaTrader5 as mt5
+from mt5_backend import mt5  # MT5_BACKEND=sim for offline runs
 
-from bot_engine.fusion_engine import fuse_signals
+from bot_engine.fusion_engine import fuse_signals_lazy
+from bot_engine.market_stats import MARKET_STATS
 from alerts.telegram_alerts import send_telegram_alert
 from journal.logger import log_fusion_result
 from journal.llm_reviewer import review_trade_and_log
@@ -34,20 +35,27 @@ if tick is None:
 entry_price = tick.ask
 spread = tick.ask - tick.bid
 
-# === SIMULATED SMC/AI SIGNALS (to be upgraded) ===
-sentiment = {"score": 0.85, "urgency": "high", "direction": "bullish"}
-forecast = 0.72
-structure = {"confirmed": True, "type": "breakout", "sl_buffer": 0.4}
+# === SIMULATED SMC/AI SIGNALS (to be upgraded; evaluated lazily, cheapest first) ===
+def get_sentiment():
+    return {"score": 0.85, "urgency": "high", "direction": "bullish"}
+
+def get_forecast():
+    return 0.72
+
+def get_structure():
+    return {"confirmed": True, "type": "breakout", "sl_buffer": 0.4}
 
 # === MARKET STATE ===
 market_state = {
+    "symbol": symbol,
     "entry": entry_price,
     "volatility": spread * 1.1,  # crude estimate for volatility
     "spread": spread,
-    "median_spread": 0.09,
-    "data_age": 0,
-    "median_volatility": 0.1
+    "data_age": 0
 }
+# Streaming medians (per symbol and hour of week), warm-loaded from the last snapshot
+MARKET_STATS.observe(market_state)
+MARKET_STATS.enrich(market_state)
 
 # === FOLDER STRUCTURE CHECK ===
 os.makedirs("signal", exist_ok=True)
@@ -55,7 +63,9 @@ os.makedirs("journal", exist_ok=True)
 os.makedirs("logs", exist_ok=True)
 
 # === RUN DECISION ENGINE ===
-fusion_result = fuse_signals(sentiment, forecast, structure, market_state)
+# Blockers run first; signal inputs are only computed if they can still matter
+inputs = {}
+fusion_result = fuse_signals_lazy(get_sentiment, get_forecast, get_structure, market_state, resolved=inputs)
 
 # === DECISION HANDLING ===
 if fusion_result and fusion_result.get("decision") == "entry":
@@ -87,9 +97,9 @@ if fusion_result and fusion_result.get("decision") == "entry":
     )
 
     signal["fused_score"] = fusion_result["confidence"]
-    signal["forecast"] = forecast
-    signal["sentiment"] = sentiment["score"]
-    signal["smc_bias"] = sentiment["direction"]
+    signal["forecast"] = inputs["forecast"]
+    signal["sentiment"] = inputs["sentiment"]["score"]
+    signal["smc_bias"] = inputs["sentiment"]["direction"]
     signal["action"] = signal["direction"].upper()
     review_trade_and_log(signal)
 
@@ -111,4 +121,5 @@ else:
         f.write(f"{datetime.now(timezone.utc).isoformat()} – {reason}\n")
 
 # === CLEANUP ===
+MARKET_STATS.save()
 mt5.shutdown()
@@ -2,10 +2,12 @@ import json
 import os
 from datetime import datetime
 from fastapi import FastAPI, Body, HTTPException, Header, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
+from bot_engine.instrumentation import collect, json_summary, prometheus_text
+
 app = FastAPI(
     title="EA Override API",
     description="API for sending real-time override commands to MT5 EA",
@@ -106,3 +108,11 @@ def healthcheck():
         "override_folder": MT5_FILES_PATH,
         "folder_accessible": folder_accessible
     })
+
+# 📈 Per-stage pipeline latency: this process plus the latest dump of every engine service
+@app.get("/metrics")
+def metrics(format: str = "prometheus"):
+    histograms = collect()
+    if format == "json":
+        return JSONResponse(content=json_summary(histograms))
+    return PlainTextResponse(prometheus_text(histograms), media_type="text/plain; version=0.0.4")
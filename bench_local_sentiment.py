@@ -0,0 +1,49 @@
+# bench_local_sentiment.py – throughput and escalation rate of the local sentiment tier
+"""
+Scores synthetic headline batches with bot_engine.local_sentiment and reports
+headlines/second, per-headline latency and the share escalated to the LLM.
+
+Usage: python bench_local_sentiment.py [--headlines 100000] [--batch 500]
+"""
+
+import argparse
+import random
+import time
+
+from bot_engine.local_sentiment import LocalSentimentScorer
+
+SUBJECTS = ["EUR/USD", "Dollar", "Gold", "Sterling", "Yen", "Fed", "ECB", "BoE", "BoJ", "Aussie"]
+VERBS = ["edges higher", "rises", "falls", "surges", "slides", "holds steady", "hikes rates",
+         "cuts rates", "plunges", "consolidates"]
+CONTEXT = ["in quiet trade", "after strong payrolls", "as CPI misses", "ahead of FOMC",
+           "on recession fears", "after surprise intervention", "as inflation cools", ""]
+
+
+def synthetic_headlines(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(CONTEXT)}".strip() for _ in range(n)]
+
+
+def main(n_headlines: int, batch: int):
+    scorer = LocalSentimentScorer()
+    headlines = synthetic_headlines(n_headlines)
+    scorer.score_batch(headlines[:batch])  # warm the token hash cache
+    scorer.stats = {"scored": 0, "escalated": 0}
+
+    start = time.perf_counter()
+    for i in range(0, n_headlines, batch):
+        scorer.score_batch(headlines[i:i + batch])
+    elapsed = time.perf_counter() - start
+
+    print(f"\n📊 Local sentiment tier: {n_headlines} headlines, batch {batch}")
+    print(f"Throughput:      {n_headlines / elapsed:,.0f} headlines/s")
+    print(f"Per headline:    {elapsed / n_headlines * 1e6:.2f} µs")
+    print(f"Escalation rate: {scorer.escalation_rate:.1%} ({scorer.stats['escalated']} sent to LLM)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--headlines", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+    main(args.headlines, args.batch)
@@ -0,0 +1,112 @@
+# bench_news_cache.py – Redis round trips for news sentiment caching (per-key vs pipelined)
+"""
+Runs the legacy per-headline GET/SET cache path and the current MGET + pipelined
+SET path of news_feed.get_sentiments against an in-process Redis stand-in
+(fakeredis) and reports round trips and wall time. A simulated network RTT is
+added per round trip so the difference reflects a real Redis deployment.
+The near-duplicate index is emptied before each phase so the warm phase
+measures the Redis cache, not sentiments remembered in-process.
+
+Requires: pip install fakeredis
+Usage: python bench_news_cache.py [--headlines 200] [--rtt-ms 0.5]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import fakeredis.aioredis
+
+import news_feed
+from bot_engine.headline_dedup import NearDuplicateIndex
+
+
+class RoundTripCounter:
+    """Wraps an async Redis client, counting (and delaying) every network round trip."""
+
+    def __init__(self, client, rtt: float):
+        self._client = client
+        self.rtt = rtt
+        self.round_trips = 0
+
+    async def _trip(self):
+        self.round_trips += 1
+        if self.rtt:
+            await asyncio.sleep(self.rtt)
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name == "pipeline":
+            def pipeline(*args, **kwargs):
+                pipe = attr(*args, **kwargs)
+                execute = pipe.execute
+
+                async def counted_execute(*a, **kw):
+                    await self._trip()
+                    return await execute(*a, **kw)
+                pipe.execute = counted_execute
+                return pipe
+            return pipeline
+        if name in ("get", "set", "mget"):
+            async def counted(*args, **kwargs):
+                await self._trip()
+                return await attr(*args, **kwargs)
+            return counted
+        return attr
+
+
+async def fake_score_uncached(headlines):
+    return [dict(news_feed.NEUTRAL_SENTIMENT) for _ in headlines]
+
+
+async def legacy_get_sentiments(headlines, redis_client):
+    """The pre-pipelining cache path: one GET and one SET round trip per headline."""
+    results = [None] * len(headlines)
+    uncached, indices = [], []
+    for i, h in enumerate(headlines):
+        cached = await redis_client.get(f"news:{news_feed.hash_text(h)}")
+        if cached:
+            results[i] = json.loads(cached)
+        else:
+            uncached.append(h)
+            indices.append(i)
+    scored = await fake_score_uncached(uncached)
+    for idx, text, sentiment in zip(indices, uncached, scored):
+        results[idx] = sentiment
+        await redis_client.set(f"news:{news_feed.hash_text(text)}", json.dumps(sentiment), ex=news_feed.CACHE_TTL)
+    return results
+
+
+async def run_case(name, fn, headlines, rtt):
+    client = RoundTripCounter(fakeredis.aioredis.FakeRedis(decode_responses=True), rtt)
+    rows = []
+    for phase in ("cold", "warm"):
+        news_feed.dedup_index = NearDuplicateIndex()
+        client.round_trips = 0
+        start = time.perf_counter()
+        await fn(headlines, client)
+        elapsed = (time.perf_counter() - start) * 1000
+        rows.append((name, phase, client.round_trips, elapsed))
+    return rows
+
+
+async def main(n_headlines: int, rtt_ms: float):
+    news_feed.score_uncached = fake_score_uncached
+    headlines = [f"Headline {i}: EUR/USD moves on data" for i in range(n_headlines)]
+    rtt = rtt_ms / 1000
+    rows = await run_case("per-key", legacy_get_sentiments, headlines, rtt)
+    rows += await run_case("pipelined", news_feed.get_sentiments, headlines, rtt)
+
+    print(f"\n📊 News sentiment cache: {n_headlines} headlines, simulated RTT {rtt_ms} ms\n")
+    print(f"{'path':<10} {'cache':<6} {'round trips':>12} {'time (ms)':>10}")
+    for name, phase, trips, elapsed in rows:
+        print(f"{name:<10} {phase:<6} {trips:>12} {elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--headlines", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(main(args.headlines, args.rtt_ms))
@@ -0,0 +1,183 @@
+"""
+Process-Pool Symbol Analysis
+Runs the CPU-heavy per-symbol work (structure detection, OB/FVG scanning, ATR)
+in a pool of worker processes so it is not serialized by the GIL.
+
+Bar windows for the whole universe are packed into one shared-memory block
+(symbols x bars x OHLC float64 plus per-symbol lengths) that workers map
+without copying; each worker gets a contiguous shard of symbols and returns one
+small dict per symbol. The block is reused across cycles and only grows.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from order_manager.advanced_ob_fvg import AdvancedOBFVG
+from order_manager.dynamic_order_manager import DynamicOrderManager
+from technical_analysis.structure_analyzer import TechnicalAnalyzer
+
+ANALYSIS_PROCESSES = int(os.getenv("ANALYSIS_PROCESSES", "0"))    # 0 = analysis pool disabled
+ANALYSIS_BARS = 300             # bars per symbol shipped to the workers
+OHLC = ("open", "high", "low", "close")
+
+_analyzer = TechnicalAnalyzer()
+_ob_fvg = AdvancedOBFVG()
+_order_manager = DynamicOrderManager()
+_attached: Dict[str, shared_memory.SharedMemory] = {}   # worker-side cache of mapped blocks
+
+
+def analyze_bars(df: pd.DataFrame) -> dict:
+    """Structure, OB/FVG and ATR for one bar window; returns plain floats/strings only."""
+    state = _analyzer.detect_market_structure(df)
+    ob_bull = _ob_fvg.find_last_ob(df, bullish=True)
+    ob_bear = _ob_fvg.find_last_ob(df, bullish=False)
+    fvg_buy = _ob_fvg.find_nearest_fvg(df, ob_bull, "buy") if ob_bull is not None else None
+    fvg_sell = _ob_fvg.find_nearest_fvg(df, ob_bear, "sell") if ob_bear is not None else None
+    atr = _order_manager.calculate_atr(df).iloc[-1] if len(df) else float("nan")
+    return {
+        "pattern": state.pattern,
+        "tags": state.tags,
+        "confidence": state.scores.get("confidence", 0.0),
+        "atr": None if pd.isna(atr) else float(atr),
+        "ob_bullish": None if ob_bull is None else float(df["low"].iloc[ob_bull]),
+        "ob_bearish": None if ob_bear is None else float(df["high"].iloc[ob_bear]),
+        "fvg_buy": None if fvg_buy is None else float(df["high"].iloc[fvg_buy]),
+        "fvg_sell": None if fvg_sell is None else float(df["low"].iloc[fvg_sell]),
+        "bars": len(df),
+    }
+
+
+def structure_from_analysis(result: dict) -> dict:
+    """Map an analysis result to the fusion `structure` input."""
+    return {
+        "confirmed": result["pattern"] != "undetected",
+        "type": "breakout" if result["pattern"] in ("swing_high", "swing_low") else "range",
+        "sl_buffer": result["atr"] or 0.0,
+        "analysis": result,
+    }
+
+
+def _views(buf, n_symbols: int, n_bars: int):
+    lengths = np.ndarray((n_symbols,), dtype=np.int64, buffer=buf)
+    ohlc = np.ndarray((n_symbols, n_bars, len(OHLC)), dtype=np.float64, buffer=buf, offset=lengths.nbytes)
+    return lengths, ohlc
+
+
+def _analyze_shard(shm_name: str, n_symbols: int, n_bars: int, rows: List[int]) -> List[tuple]:
+    """Worker entry point: analyze the given rows of the shared block."""
+    shm = _attached.get(shm_name)
+    if shm is None:
+        for stale in _attached.values():
+            stale.close()
+        _attached.clear()
+        shm = _attached[shm_name] = shared_memory.SharedMemory(name=shm_name)
+    lengths, ohlc = _views(shm.buf, n_symbols, n_bars)
+    results = []
+    for row in rows:
+        n = int(lengths[row])
+        window = ohlc[row, n_bars - n:]
+        df = pd.DataFrame(window, columns=list(OHLC), copy=False)
+        try:
+            results.append((row, analyze_bars(df)))
+        except Exception as e:
+            results.append((row, {"error": str(e)}))
+    return results
+
+
+class AnalysisPool:
+    """
+    analyze({symbol: bars}) -> {symbol: result}, where bars is anything with
+    open/high/low/close columns (MT5 rates array, DataFrame, dict of arrays).
+    processes=0 runs inline in the calling process (debugging, tiny universes).
+    """
+
+    def __init__(self, processes: int = None, max_bars: int = ANALYSIS_BARS):
+        self.processes = os.cpu_count() if processes is None else processes
+        self.max_bars = max_bars
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._shape = (0, max_bars)
+
+    def _block(self, n_symbols: int):
+        needed = 8 * n_symbols + 8 * n_symbols * self.max_bars * len(OHLC)
+        if self._shm is None or self._shm.size < needed:
+            self._release_block()
+            self._shm = shared_memory.SharedMemory(create=True, size=needed)
+        self._shape = (n_symbols, self.max_bars)
+        return _views(self._shm.buf, n_symbols, self.max_bars)
+
+    def _release_block(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def _shards(self, n: int) -> List[List[int]]:
+        k = max(1, min(self.processes, n))
+        return [rows.tolist() for rows in np.array_split(np.arange(n), k) if len(rows)]
+
+    def analyze(self, windows: Dict[str, object]) -> Dict[str, dict]:
+        symbols = list(windows)
+        if not symbols:
+            return {}
+        if self.processes <= 0:
+            return {s: analyze_bars(pd.DataFrame({c: np.asarray(windows[s][c], dtype=np.float64)[-self.max_bars:]
+                                                  for c in OHLC})) for s in symbols}
+
+        lengths, ohlc = self._block(len(symbols))
+        for row, symbol in enumerate(symbols):
+            bars = windows[symbol]
+            n = min(len(bars[OHLC[0]]), self.max_bars)
+            lengths[row] = n
+            for j, column in enumerate(OHLC):
+                # right-aligned: a symbol's newest bar is always the last slot
+                ohlc[row, self.max_bars - n:, j] = np.asarray(bars[column], dtype=np.float64)[-n:] if n else []
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.processes)
+        futures = [self._executor.submit(_analyze_shard, self._shm.name, len(symbols), self.max_bars, rows)
+                   for rows in self._shards(len(symbols))]
+        results = {}
+        for future in futures:
+            for row, result in future.result():
+                if "error" in result:
+                    logging.warning(f"Analysis failed for {symbols[row]}: {result['error']}")
+                results[symbols[row]] = result
+        return results
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._release_block()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(1)
+    universe = {}
+    for i in range(64):
+        close = 100 + np.cumsum(rng.normal(0, 0.5, ANALYSIS_BARS))
+        universe[f"SYM{i:02d}"] = {"open": close + rng.normal(0, 0.2, ANALYSIS_BARS), "close": close,
+                                   "high": close + 1 + rng.random(ANALYSIS_BARS),
+                                   "low": close - 1 - rng.random(ANALYSIS_BARS)}
+    for processes in (0, 2, os.cpu_count()):
+        with AnalysisPool(processes) as pool:
+            pool.analyze(universe)   # warm the workers
+            start = time.perf_counter()
+            out = pool.analyze(universe)
+            print(f"processes={processes}: {time.perf_counter() - start:.3f}s", out["SYM00"])
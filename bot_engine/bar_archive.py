@@ -0,0 +1,232 @@
+"""
+Columnar Bar Archive
+Append-only per-symbol, per-timeframe store of OHLC bars: one memory-mapped
+NumPy file per column plus a small meta.json holding the committed row count.
+Range queries binary-search the time column and return zero-copy views, so
+backtests, forecasting and structure detectors read history without re-pulling
+it from MT5 or Binance.
+
+Layout: <root>/<SYMBOL>/<TIMEFRAME>/{meta.json, time.bin, open.bin, ...}
+
+One writer appends while any number of readers (threads or processes) query:
+the writer fills column files first and publishes the new row count last with
+an atomic meta.json replace, so readers never see a partially written bar.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+ARCHIVE_ROOT = os.getenv("BAR_ARCHIVE_ROOT", "data/bars")
+INITIAL_CAPACITY = 4096         # rows preallocated per column file; doubled when full
+PRICE_COLUMNS = ("open", "high", "low", "close")
+VOLUME_COLUMNS = ("tick_volume", "spread", "real_volume")
+COLUMNS = ("time",) + PRICE_COLUMNS + VOLUME_COLUMNS
+
+
+class BarSeries:
+    """
+    One (symbol, timeframe) column set. Prices default to float64 and volumes to
+    int64; pass price_dtype="float32" / volume_dtype="int32" when creating a
+    series to halve its footprint. Dtypes are fixed in meta.json at creation.
+    """
+
+    def __init__(self, path: str, price_dtype: str = "float64", volume_dtype: str = "int64"):
+        self.path = path
+        self._meta_path = os.path.join(path, "meta.json")
+        self._lock = threading.Lock()
+        self._maps: Dict[str, np.memmap] = {}
+        self._mapped_capacity = 0
+        meta = self._read_meta()
+        if meta is None:
+            meta = {"rows": 0, "capacity": 0,
+                    "dtypes": {"time": "int64",
+                               **{c: price_dtype for c in PRICE_COLUMNS},
+                               **{c: volume_dtype for c in VOLUME_COLUMNS}}}
+        self._adopt(meta)
+
+    def _adopt(self, meta: dict):
+        """Take the committed meta.json; a handle opened before the series existed learns its dtypes."""
+        dtypes = {c: np.dtype(t) for c, t in meta["dtypes"].items()}
+        if dtypes != getattr(self, "dtypes", None):
+            self.dtypes = dtypes
+            self._unmap()
+        self._meta = meta
+
+    def _unmap(self):
+        """Drop this handle's column maps (flushing writable ones) so the files can be resized."""
+        for m in self._maps.values():
+            if m.flags.writeable:
+                m.flush()
+        self._maps = {}
+        self._mapped_capacity = 0
+
+    def _read_meta(self) -> Optional[dict]:
+        try:
+            with open(self._meta_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self):
+        tmp = f"{self._meta_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._meta, f)
+        os.replace(tmp, self._meta_path)
+
+    def _column_file(self, column: str) -> str:
+        return os.path.join(self.path, f"{column}.bin")
+
+    def _map(self, capacity: int, writable: bool):
+        if capacity == self._mapped_capacity and self._maps and (not writable or self._maps["time"].flags.writeable):
+            return
+        self._maps = {
+            c: np.memmap(self._column_file(c), dtype=self.dtypes[c], mode="r+" if writable else "r",
+                         shape=(capacity,))
+            for c in COLUMNS
+        }
+        self._mapped_capacity = capacity
+
+    def __len__(self):
+        return self.refresh()
+
+    # ── reading ──────────────────────────────────────────────────────────────
+    def refresh(self) -> int:
+        """Pick up rows committed by the writer; returns the visible row count."""
+        meta = self._read_meta()
+        if meta is None:
+            return 0
+        self._adopt(meta)
+        if meta["capacity"] and meta["capacity"] != self._mapped_capacity:
+            self._map(meta["capacity"], writable=False)
+        return meta["rows"]
+
+    def slice(self, start: int = None, end: int = None) -> Dict[str, np.ndarray]:
+        """
+        Columns for bars with start <= time < end (epoch seconds, either bound
+        optional) as read-only zero-copy memmap views.
+        """
+        rows = self.refresh()
+        if not rows:
+            return {c: np.empty(0, dtype=self.dtypes[c]) for c in COLUMNS}
+        times = self._maps["time"][:rows]
+        lo = 0 if start is None else int(np.searchsorted(times, start, side="left"))
+        hi = rows if end is None else int(np.searchsorted(times, end, side="left"))
+        return {c: self._maps[c][lo:hi] for c in COLUMNS}
+
+    def frame(self, start: int = None, end: int = None) -> pd.DataFrame:
+        """DataFrame over slice(); columns wrap the memmaps without copying, time is datetime64[s]."""
+        cols = self.slice(start, end)
+        cols["time"] = cols["time"].view("datetime64[s]")
+        return pd.DataFrame(cols, copy=False)
+
+    # ── writing (single writer) ──────────────────────────────────────────────
+    def _grow(self, needed: int):
+        capacity = max(self._meta["capacity"], INITIAL_CAPACITY)
+        while capacity < needed:
+            capacity *= 2
+        if capacity != self._meta["capacity"]:
+            os.makedirs(self.path, exist_ok=True)
+            self._unmap()    # Windows refuses to resize a file with a live mapping
+            for c in COLUMNS:
+                with open(self._column_file(c), "ab") as f:
+                    f.truncate(capacity * self.dtypes[c].itemsize)
+            self._meta["capacity"] = capacity
+        self._map(capacity, writable=True)
+
+    def append(self, bars) -> int:
+        """
+        Append bars sorted by time (MT5 rates array, structured array, DataFrame
+        or dict of columns). A bar with the last stored time overwrites it (the
+        forming bar), older bars are ignored. Returns the number of new rows.
+        """
+        if isinstance(bars, pd.DataFrame):
+            bars = {c: bars[c].to_numpy() for c in bars.columns}
+        times = np.asarray(bars["time"])
+        if np.issubdtype(times.dtype, np.datetime64):
+            times = times.astype("datetime64[s]").astype(np.int64)
+        times = times.astype(np.int64)
+        with self._lock:
+            meta = self._read_meta()
+            if meta is not None:
+                self._adopt(meta)
+            rows = self._meta["rows"]
+            if rows:
+                self._map(self._meta["capacity"], writable=True)
+            last_time = int(self._maps["time"][rows - 1]) if rows else None
+
+            keep = times >= last_time if last_time is not None else np.ones(len(times), dtype=bool)
+            if last_time is not None and len(times) and times[keep][:1].tolist() == [last_time]:
+                rows -= 1   # rewrite the forming bar in place
+            times = times[keep]
+            if not len(times):
+                return 0
+            self._grow(rows + len(times))
+            for c in COLUMNS:
+                values = times if c == "time" else (np.asarray(bars[c])[keep] if c in _names(bars) else 0)
+                self._maps[c][rows:rows + len(times)] = values
+            for m in self._maps.values():
+                m.flush()
+            added = rows + len(times) - self._meta["rows"]
+            self._meta["rows"] = rows + len(times)
+            self._write_meta()
+            return added
+
+
+def _names(bars) -> tuple:
+    names = getattr(getattr(bars, "dtype", None), "names", None)
+    return names if names is not None else tuple(bars.keys())
+
+
+class BarArchive:
+    """Directory of BarSeries keyed by (symbol, timeframe)."""
+
+    def __init__(self, root: str = ARCHIVE_ROOT, price_dtype: str = "float64", volume_dtype: str = "int64"):
+        self.root = root
+        self.price_dtype = price_dtype
+        self.volume_dtype = volume_dtype
+        self._series: Dict[tuple, BarSeries] = {}
+
+    def series(self, symbol: str, timeframe: str) -> BarSeries:
+        key = (symbol, timeframe)
+        if key not in self._series:
+            self._series[key] = BarSeries(os.path.join(self.root, symbol, timeframe),
+                                          self.price_dtype, self.volume_dtype)
+        return self._series[key]
+
+    def append(self, symbol: str, timeframe: str, bars) -> int:
+        return self.series(symbol, timeframe).append(bars)
+
+    def slice(self, symbol: str, timeframe: str, start: int = None, end: int = None) -> Dict[str, np.ndarray]:
+        return self.series(symbol, timeframe).slice(start, end)
+
+    def frame(self, symbol: str, timeframe: str, start: int = None, end: int = None) -> pd.DataFrame:
+        return self.series(symbol, timeframe).frame(start, end)
+
+    def prophet_frame(self, symbol: str, timeframe: str, start: int = None, end: int = None) -> pd.DataFrame:
+        """ds/y close series in the shape forecast_engine.backtest.backtest_prophet expects."""
+        df = self.frame(symbol, timeframe, start, end)
+        return pd.DataFrame({"ds": df["time"], "y": df["close"]})
+
+    def symbols(self) -> Dict[str, list]:
+        if not os.path.isdir(self.root):
+            return {}
+        return {s: sorted(os.listdir(os.path.join(self.root, s))) for s in sorted(os.listdir(self.root))}
+
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = BarArchive(tmp, price_dtype="float32", volume_dtype="int32")
+        t = np.arange(1_700_000_000, 1_700_000_000 + 60 * 10_000, 60)
+        close = 2000 + np.cumsum(np.random.randn(len(t)))
+        archive.append("XAUUSD", "M1", {"time": t, "open": close, "high": close + 1,
+                                        "low": close - 1, "close": close, "tick_volume": np.ones(len(t))})
+        print(archive.symbols())
+        print(archive.frame("XAUUSD", "M1", start=int(t[100]), end=int(t[105])))
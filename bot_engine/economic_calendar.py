@@ -0,0 +1,222 @@
+"""
+Economic Calendar Interval Index
+Parses the ForexFactory weekly calendar into per-currency sorted blackout
+intervals so guardrails can answer "is symbol X inside a high-impact news
+window at time t" with a bisect lookup instead of scanning the feed.
+"""
+
+import logging
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import requests
+
+CALENDAR_URL = "https://nfs.faireconomy.media/ff_calendar_thisweek.xml"
+CALENDAR_UTC_OFFSET_HOURS = 0      # timezone of the feed's date/time fields
+REFRESH_SECONDS = 900              # re-fetch at most every 15 min
+RETRY_BASE_SECONDS = 30            # first retry after a failed fetch, doubled per failure
+RETRY_MAX_SECONDS = 900
+# impact -> (minutes before, minutes after) the event during which trading is blocked
+BLACKOUT_MINUTES = {"High": (15, 15)}
+MEDIUM_BLACKOUT_MINUTES = int(os.getenv("MEDIUM_BLACKOUT_MINUTES", "0"))   # > 0 also blocks around Medium events
+if MEDIUM_BLACKOUT_MINUTES > 0:
+    BLACKOUT_MINUTES["Medium"] = (MEDIUM_BLACKOUT_MINUTES, MEDIUM_BLACKOUT_MINUTES)
+IMPACT_RANK = {"Non-Economic": 0, "Low": 1, "Medium": 2, "High": 3, "Holiday": 0}
+
+
+def symbol_currencies(symbol: str) -> tuple:
+    """'EURUSD' -> ('EUR', 'USD'); broker suffixes like 'EURUSD.m' are ignored."""
+    letters = "".join(ch for ch in symbol.upper() if ch.isalpha())[:6]
+    return (letters[:3], letters[3:6]) if len(letters) == 6 else (letters,)
+
+
+def parse_calendar_xml(xml_text: str, utc_offset_hours: float = CALENDAR_UTC_OFFSET_HOURS) -> List[dict]:
+    """Parse ForexFactory calendar XML into timed events; all-day/tentative events are skipped."""
+    events = []
+    for node in ET.fromstring(xml_text).iter("event"):
+        def field(name):
+            return (node.findtext(name) or "").strip()
+        date_str, time_str = field("date"), field("time").lower()
+        try:
+            local = datetime.strptime(f"{date_str} {time_str}", "%m-%d-%Y %I:%M%p")
+        except ValueError:
+            continue
+        ts = (local - timedelta(hours=utc_offset_hours)).replace(tzinfo=timezone.utc).timestamp()
+        events.append({
+            "title": field("title"),
+            "currency": field("country").upper(),
+            "impact": field("impact"),
+            "time": ts,
+            "forecast": field("forecast"),
+            "previous": field("previous"),
+        })
+    return events
+
+
+class _CurrencyIndex:
+    """Sorted event times plus blackout intervals with a prefix max of interval ends."""
+
+    def __init__(self, events: List[dict], blackout: Dict[str, tuple]):
+        events = sorted(events, key=lambda e: e["time"])
+        self.events = events
+        self.times = [e["time"] for e in events]
+        windowed = []
+        for e in events:
+            if e["impact"] in blackout:
+                before, after = blackout[e["impact"]]
+                windowed.append((e["time"] - before * 60, e["time"] + after * 60, e))
+        windowed.sort(key=lambda w: w[0])
+        self.starts = [w[0] for w in windowed]
+        self.windows = windowed
+        self.max_end = []
+        running = float("-inf")
+        for _, end, _ in windowed:
+            running = max(running, end)
+            self.max_end.append(running)
+
+    def covering(self, t: float) -> Optional[dict]:
+        k = bisect_right(self.starts, t)
+        # prefix max lets us stop as soon as no earlier window can reach t
+        while k > 0 and self.max_end[k - 1] >= t:
+            k -= 1
+            if self.windows[k][1] >= t:
+                return self.windows[k][2]
+        return None
+
+    def nearest(self, t: float, min_rank: int) -> Optional[dict]:
+        k = bisect_left(self.times, t)
+        best = None
+        for step, stop in ((-1, -1), (1, len(self.events))):
+            i = k - 1 if step < 0 else k
+            while i != stop:
+                e = self.events[i]
+                if IMPACT_RANK.get(e["impact"], 0) >= min_rank:
+                    if best is None or abs(e["time"] - t) < abs(best["time"] - t):
+                        best = e
+                    break
+                i += step
+        return best
+
+
+class CalendarIndex:
+    """
+    Per-currency interval index over economic events. refresh() is incremental:
+    only currencies whose events changed are re-indexed. One instance is shared
+    by every symbol in a cycle.
+    """
+
+    def __init__(self, blackout: Dict[str, tuple] = None):
+        self.blackout = blackout or BLACKOUT_MINUTES
+        self.updated_at = 0.0
+        self._events: Dict[tuple, dict] = {}
+        self._by_currency: Dict[str, _CurrencyIndex] = {}
+
+    @staticmethod
+    def _key(event: dict) -> tuple:
+        return (event["currency"], event["title"], event["time"])
+
+    def refresh(self, events: List[dict], replace: bool = True) -> int:
+        """
+        Merge a fresh event list. With replace=True events missing from the list are
+        dropped (the feed is a full weekly snapshot). Returns the number of changed events.
+        """
+        incoming = {self._key(e): e for e in events}
+        changed = set()
+        for key, e in incoming.items():
+            if self._events.get(key) != e:
+                self._events[key] = e
+                changed.add(key[0])
+        if replace:
+            for key in [k for k in self._events if k not in incoming]:
+                del self._events[key]
+                changed.add(key[0])
+
+        for currency in changed:
+            evs = [e for k, e in self._events.items() if k[0] == currency]
+            if evs:
+                self._by_currency[currency] = _CurrencyIndex(evs, self.blackout)
+            else:
+                self._by_currency.pop(currency, None)
+        self.updated_at = time.time()
+        return len(changed)
+
+    def blackout_event(self, symbol: str, t: float = None) -> Optional[dict]:
+        """The event whose blackout window covers time t for either currency of the symbol."""
+        t = time.time() if t is None else t
+        for currency in symbol_currencies(symbol):
+            index = self._by_currency.get(currency)
+            event = index.covering(t) if index else None
+            if event:
+                return event
+        return None
+
+    def in_blackout(self, symbol: str, t: float = None) -> bool:
+        return self.blackout_event(symbol, t) is not None
+
+    def news_context(self, symbol: str, t: float = None, min_impact: str = "High") -> dict:
+        """
+        news_context for rule_engine.check_guardrails: nearest event at or above
+        min_impact for the symbol's currencies, signed minutes to it, and any
+        blackout event covering t.
+        """
+        t = time.time() if t is None else t
+        nearest = None
+        for currency in symbol_currencies(symbol):
+            index = self._by_currency.get(currency)
+            event = index.nearest(t, IMPACT_RANK.get(min_impact, 3)) if index else None
+            if event and (nearest is None or abs(event["time"] - t) < abs(nearest["time"] - t)):
+                nearest = event
+        blackout = self.blackout_event(symbol, t)
+        if nearest is None:
+            return {"blackout": blackout}
+        return {
+            "impact": nearest["impact"].lower(),
+            "minutes_to_event": round((nearest["time"] - t) / 60, 1),
+            "event": nearest["title"],
+            "currency": nearest["currency"],
+            "blackout": blackout,
+        }
+
+
+CALENDAR = CalendarIndex()
+_refresh_lock = threading.Lock()
+_refresh_state = {"failures": 0, "retry_at": 0.0}
+
+
+def refresh_calendar(max_age: float = REFRESH_SECONDS, url: str = CALENDAR_URL) -> CalendarIndex:
+    """
+    Re-fetch the calendar into the shared CALENDAR index if it is older than max_age.
+    Failed fetches back off exponentially (RETRY_BASE_SECONDS .. RETRY_MAX_SECONDS)
+    and a fetch already running in another thread is not duplicated.
+    """
+    now = time.time()
+    if now - CALENDAR.updated_at < max_age or now < _refresh_state["retry_at"]:
+        return CALENDAR
+    if not _refresh_lock.acquire(blocking=False):
+        return CALENDAR
+    try:
+        resp = requests.get(url, timeout=15)
+        resp.raise_for_status()
+        changed = CALENDAR.refresh(parse_calendar_xml(resp.text))
+        _refresh_state.update(failures=0, retry_at=0.0)
+        logging.info(f"Economic calendar refreshed ({changed} currencies re-indexed)")
+    except Exception as e:
+        # keep serving the previous index; retry after the backoff
+        _refresh_state["failures"] += 1
+        delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (_refresh_state["failures"] - 1))
+        _refresh_state["retry_at"] = time.time() + delay
+        logging.warning(f"Economic calendar refresh failed: {e}; retrying in {delay:.0f}s")
+    finally:
+        _refresh_lock.release()
+    return CALENDAR
+
+
+if __name__ == "__main__":
+    calendar = refresh_calendar(max_age=0)
+    for sym in ["EURUSD", "GBPJPY", "XAUUSD"]:
+        print(sym, calendar.news_context(sym))
@@ -1,21 +1,251 @@
-from MetaTrader5 import initialize, copy_rates_from_pos, symbol_info_tick
-import pandas as pd
+"""
+Market Data Feed Normalizer
+One persistent MT5 session plus a fixed-size NumPy ring buffer of bars per
+(symbol, timeframe). Each refresh pulls only the few most recent bars and
+merges them in; market state snapshots are served from memory.
+"""
+
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from mt5_backend import mt5
+
+RING_CAPACITY = 512         # bars kept per (symbol, timeframe)
+INCREMENTAL_BARS = 5        # bars requested per refresh once the ring is seeded
+
+BAR_DTYPE = np.dtype([
+    ("time", "i8"), ("open", "f8"), ("high", "f8"), ("low", "f8"), ("close", "f8"),
+    ("tick_volume", "i8"), ("spread", "i4"), ("real_volume", "i8"),
+])
+
+
+class BarRingBuffer:
+    """Fixed-capacity circular buffer of MT5 bars ordered by bar open time."""
+
+    def __init__(self, capacity: int = RING_CAPACITY):
+        self.capacity = capacity
+        self._bars = np.zeros(capacity, dtype=BAR_DTYPE)
+        self._next = 0
+        self.size = 0
+
+    @property
+    def last_time(self) -> int:
+        return int(self.last()["time"]) if self.size else -1
+
+    def last(self):
+        return self._bars[(self._next - 1) % self.capacity]
+
+    def clear(self):
+        self._next = 0
+        self.size = 0
+
+    def merge(self, rates) -> int:
+        """
+        Merge bars sorted by time: a bar with the latest cached time replaces it
+        (the forming bar keeps updating), newer bars are appended, older ones are
+        ignored. Returns the number of bars appended.
+        """
+        if not len(rates):
+            return 0
+        times = rates["time"]
+        last_time = self.last_time
+        current = rates[times == last_time]
+        if len(current):
+            self._write(np.array([(self._next - 1) % self.capacity]), current[-1:])
+        newer = rates[times > last_time][-self.capacity:]
+        if len(newer):
+            self._write((self._next + np.arange(len(newer))) % self.capacity, newer)
+            self._next = (self._next + len(newer)) % self.capacity
+            self.size = min(self.size + len(newer), self.capacity)
+        return len(newer)
+
+    def _write(self, slots: np.ndarray, rates):
+        for name in BAR_DTYPE.names:
+            self._bars[name][slots] = rates[name]
+
+    def tail(self, n: int = None) -> np.ndarray:
+        """Copy of the newest n bars (all cached bars by default), oldest first."""
+        n = self.size if n is None else min(n, self.size)
+        idx = (np.arange(self._next - n, self._next)) % self.capacity
+        return self._bars[idx]
+
+
+class MarketSnapshot:
+    """
+    Columnar market state for a symbol universe: one NumPy array per field,
+    indexed by position in `symbols`. snapshot[symbol] gives the per-symbol dict
+    get_normalized_market_state has always returned.
+    """
+
+    PRICE_FIELDS = ("bid", "ask", "spread", "open", "high", "low", "close")
+
+    def __init__(self, symbols: List[str], timeframe: str):
+        n = len(symbols)
+        self.symbols = list(symbols)
+        self.timeframe = timeframe
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.columns = {name: np.full(n, np.nan) for name in self.PRICE_FIELDS}
+        self.columns["volume"] = np.zeros(n, dtype=np.int64)
+        self.columns["time"] = np.zeros(n, dtype=np.int64)
+        self.valid = np.zeros(n, dtype=bool)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        i = self.index.get(symbol)
+        return i is not None and bool(self.valid[i])
+
+    def __getitem__(self, symbol) -> dict:
+        if symbol not in self:
+            raise KeyError(symbol)
+        i = self.index[symbol]
+        c = self.columns
+        return {
+            "symbol": symbol,
+            "bid": float(c["bid"][i]),
+            "ask": float(c["ask"][i]),
+            "spread": float(c["spread"][i]),
+            "ohlc": {k: float(c[k][i]) for k in ("open", "high", "low", "close")},
+            "volume": int(c["volume"][i]),
+            "timestamp": str(int(c["time"][i])),
+        }
+
+    def get(self, symbol, default=None):
+        return self[symbol] if symbol in self else default
+
+    def as_dicts(self) -> Dict[str, dict]:
+        return {symbol: self[symbol] for symbol in self.symbols if symbol in self}
+
+
+class MarketDataCache:
+    """
+    Owns the process-wide MT5 session. MT5's Python API is not thread-safe, so
+    every terminal call goes through one lock; per-symbol threads only contend
+    for the few milliseconds an incremental fetch takes.
+    """
+
+    def __init__(self, capacity: int = RING_CAPACITY, incremental: int = INCREMENTAL_BARS):
+        self.capacity = capacity
+        self.incremental = incremental
+        self._rings: Dict[Tuple[str, str], BarRingBuffer] = {}
+        self._lock = threading.RLock()
+        self._connected = False
+        self.stats = {"initialize": 0, "full_fetches": 0, "incremental_fetches": 0, "bars_fetched": 0}
+
+    def _ensure_session(self):
+        if not self._connected:
+            self.stats["initialize"] += 1
+            if not mt5.initialize():
+                raise RuntimeError(f"MT5 initialize failed: {mt5.last_error()}")
+            self._connected = True
+
+    def _copy_rates(self, symbol: str, timeframe: str, count: int):
+        tf = getattr(mt5, f"TIMEFRAME_{timeframe}")
+        rates = mt5.copy_rates_from_pos(symbol, tf, 0, count)
+        if rates is None:
+            # terminal restarted or connection dropped: reconnect once and retry
+            self._connected = False
+            self._ensure_session()
+            rates = mt5.copy_rates_from_pos(symbol, tf, 0, count)
+        if rates is None:
+            raise RuntimeError(f"No rates for {symbol} {timeframe}: {mt5.last_error()}")
+        self.stats["bars_fetched"] += len(rates)
+        return rates
+
+    def refresh(self, symbol: str, timeframe: str = "M1") -> BarRingBuffer:
+        """Bring the ring for (symbol, timeframe) up to date with only the newest bars."""
+        with self._lock:
+            self._ensure_session()
+            ring = self._rings.setdefault((symbol, timeframe), BarRingBuffer(self.capacity))
+            if ring.size:
+                rates = self._copy_rates(symbol, timeframe, self.incremental)
+                self.stats["incremental_fetches"] += 1
+                if len(rates) and int(rates[0]["time"]) <= ring.last_time:
+                    ring.merge(rates)
+                    return ring
+                # gap larger than the incremental window (e.g. after a disconnect): reseed
+                ring.clear()
+            ring.merge(self._copy_rates(symbol, timeframe, self.capacity))
+            self.stats["full_fetches"] += 1
+            return ring
+
+    def bars(self, symbol: str, timeframe: str = "M1", count: int = None, refresh: bool = True) -> np.ndarray:
+        """Newest bars; refresh=False reads what the last refresh/snapshot left in the ring."""
+        with self._lock:
+            ring = self._rings.get((symbol, timeframe)) if not refresh else None
+            if ring is None:
+                ring = self.refresh(symbol, timeframe)
+            return ring.tail(count)
+
+    def tick(self, symbol: str):
+        with self._lock:
+            self._ensure_session()
+            return mt5.symbol_info_tick(symbol)
+
+    def snapshot(self, symbols: List[str], timeframe: str = "M1", closed_at: int = None) -> MarketSnapshot:
+        """
+        Ticks and incremental bars for the whole universe in one pass under one
+        lock hold. Symbols without a tick or bars are left invalid (not in the snapshot).
+        With closed_at (a bar boundary) the bar is the newest one opened before it,
+        i.e. the bar that just closed rather than the one forming.
+        """
+        snap = MarketSnapshot(symbols, timeframe)
+        c = snap.columns
+        with self._lock:
+            self._ensure_session()
+            for i, symbol in enumerate(snap.symbols):
+                try:
+                    ring = self.refresh(symbol, timeframe)
+                except RuntimeError as e:
+                    logging.warning(f"Market data unavailable for {symbol}: {e}")
+                    continue
+                tick = mt5.symbol_info_tick(symbol)
+                if tick is None or not ring.size:
+                    continue
+                bar = ring.last()
+                if closed_at is not None and bar["time"] >= closed_at:
+                    bar = ring.tail(2)[0] if ring.size > 1 else None
+                if bar is None or (closed_at is not None and bar["time"] >= closed_at):
+                    continue
+                c["bid"][i], c["ask"][i] = tick.bid, tick.ask
+                for k in ("open", "high", "low", "close"):
+                    c[k][i] = bar[k]
+                c["volume"][i] = bar["tick_volume"]
+                c["time"][i] = bar["time"]
+                snap.valid[i] = True
+        c["spread"] = np.round(c["ask"] - c["bid"], 5)
+        return snap
+
+    def market_state(self, symbol: str, timeframe: str = "M1") -> dict:
+        snap = self.snapshot([symbol], timeframe)
+        if symbol not in snap:
+            raise RuntimeError(f"No market data for {symbol} {timeframe}")
+        return snap[symbol]
+
+    def shutdown(self):
+        with self._lock:
+            if self._connected:
+                mt5.shutdown()
+                self._connected = False
+            self._rings.clear()
+
+
+MARKET_DATA = MarketDataCache()
+
 
 def get_normalized_market_state(symbol, timeframe='M1', count=50):
-    initialize()
-    import MetaTrader5 as mt5
-    df = pd.DataFrame(copy_rates_from_pos(symbol, getattr(mt5, timeframe), 0, count))
-    tick = symbol_info_tick(symbol)
-    normalized = {
-        "symbol": symbol,
-        "bid": tick.bid,
-        "ask": tick.ask,
-        "spread": round(tick.ask - tick.bid, 5),
-        "ohlc": df.iloc[-1][['open', 'high', 'low', 'close']].to_dict(),
-        "volume": df.iloc[-1]['tick_volume'],
-        "timestamp": str(df.iloc[-1]['time'])
-    }
-    return normalized
+    # count is kept for backward compatibility; the ring always holds RING_CAPACITY bars
+    return MARKET_DATA.market_state(symbol, timeframe)
+
+def get_normalized_market_states(symbols, timeframe='M1', closed_at=None) -> MarketSnapshot:
+    """Columnar snapshot of the whole symbol universe from one batched pass."""
+    return MARKET_DATA.snapshot(symbols, timeframe, closed_at)
 
 if __name__ == "__main__":
-    print(get_normalized_market_state("XAUUSD"))
\ No newline at end of file
+    print(get_normalized_market_state("XAUUSD"))
+    print(get_normalized_market_states(["XAUUSD", "EURUSD", "GBPJPY"]).as_dicts())
+    print(MARKET_DATA.stats)
@@ -4,6 +4,7 @@ Institutional-grade trade trigger logic for QuantOps AI stack.
 """
 
 from typing import Dict, Any
+import inspect
 import numpy as np
 import time
 
@@ -66,6 +67,21 @@ def calculate_sl_tp(entry, direction, structure, volatility, rr=2.0):
         tp = entry - (abs(entry - sl) * rr)
     return round(sl, 3), round(tp, 3)
 
+def entry_price(market_state, direction):
+    """market_state['entry'] when given, else the live quote a market order fills at (ask to buy, bid to sell)."""
+    if market_state.get('entry') is not None:
+        return market_state['entry']
+    return market_state['ask'] if direction == 'buy' else market_state['bid']
+
+def _pre_trade_block(market_state: Dict[str, Any]):
+    if market_state['spread'] > 1.5 * market_state.get('median_spread', 1.0):
+        return {'decision': 'block', 'reason': 'Spread too high'}
+    if market_state.get('data_age', 0) > 20:
+        return {'decision': 'block', 'reason': 'Market data too stale'}
+    if market_state.get('volatility', 1.0) > 3 * market_state.get('median_volatility', 1.0):
+        return {'decision': 'block', 'reason': 'Volatility spike'}
+    return None
+
 # === CORE FUSION ENGINE ===
 
 def fuse_signals(
@@ -83,17 +99,15 @@ def fuse_signals(
     - forecast: float (directional confidence: -1.0 to 1.0)
     - structure: {'confirmed': bool, 'type': str, 'sl_buffer': float}
     - market_state: {'entry': float, 'volatility': float, 'spread': float, 'median_spread': float, 'data_age': int}
+      (without 'entry', the ask is used for a buy and the bid for a sell)
 
     Returns: dict with decision, entry details, SL/TP, confidence, etc.
     """
 
     # === PRE-TRADE BLOCKERS ===
-    if market_state['spread'] > 1.5 * market_state.get('median_spread', 1.0):
-        return {'decision': 'block', 'reason': 'Spread too high'}
-    if market_state.get('data_age', 0) > 20:
-        return {'decision': 'block', 'reason': 'Market data too stale'}
-    if market_state.get('volatility', 1.0) > 3 * market_state.get('median_volatility', 1.0):
-        return {'decision': 'block', 'reason': 'Volatility spike'}
+    blocked = _pre_trade_block(market_state)
+    if blocked:
+        return blocked
 
     # === BIAS CONFIRMATION ===
     sentiment_ok = abs(sentiment['score']) >= SENTIMENT_THRESHOLD and \
@@ -125,8 +139,9 @@ def fuse_signals(
 
     # === ENTRY LOGIC ===
     direction = 'buy' if sentiment['score'] > 0 else 'sell'
+    entry = entry_price(market_state, direction)
     sl, tp = calculate_sl_tp(
-        entry=market_state['entry'],
+        entry=entry,
         direction=direction,
         structure=structure,
         volatility=market_state['volatility']
@@ -135,7 +150,7 @@ def fuse_signals(
 
     return {
         'decision': 'entry',
-        'entry': market_state['entry'],
+        'entry': entry,
         'direction': direction,
         'entry_type': entry_type,
         'sl': sl,
@@ -143,3 +158,268 @@ def fuse_signals(
         'risk_pct': risk_pct,
         'confidence': round(confidence, 3)
     }
+
+# === BATCH FUSION ENGINE ===
+
+def _urgency_ranks(urgency):
+    """Map an array of urgency labels (or numeric ranks) to ranks, like urgency_rank()."""
+    urgency = np.asarray(urgency)
+    if urgency.dtype.kind in 'iuf':
+        return urgency.astype(int), urgency.astype(int) == 2
+    labels = np.char.lower(urgency.astype(str))
+    ranks = np.select([labels == 'high', labels == 'medium'], [2, 1], default=0)
+    return ranks, labels == 'high'
+
+def _round_elementwise(values, ndigits=3):
+    """Round exactly like builtin round() so batch output matches the scalar path bit for bit."""
+    return np.array([round(float(v), ndigits) for v in values], dtype=float)
+
+def fuse_signals_batch(
+    sentiment_score,
+    sentiment_urgency,
+    forecast,
+    structure_confirmed,
+    structure_type,
+    sl_buffer,
+    entry,
+    volatility,
+    spread,
+    median_spread=None,
+    median_volatility=None,
+    data_age=None,
+    equity: float = 10000.0
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized fuse_signals() over a whole symbol universe.
+
+    Every argument is a 1-D array (or scalar, broadcast) with one row per
+    symbol/timeframe pair; the row count comes from whichever argument is an
+    array, and all-scalar input gives a one-row table. Missing median_spread / median_volatility / data_age
+    fall back to the same defaults as the scalar market_state lookups.
+
+    Returns a struct-of-arrays decision table with keys:
+    decision, reason, direction, entry_type, entry, sl, tp, risk_pct,
+    confidence, sentiment_ok, forecast_ok, structure_ok.
+    Use batch_decision(table, i) to get the exact scalar-path dict for row i.
+    """
+    shape = np.broadcast_shapes(*(np.shape(a) for a in (
+        sentiment_score, sentiment_urgency, forecast, structure_confirmed, structure_type, sl_buffer,
+        entry, volatility, spread, median_spread, median_volatility, data_age) if a is not None))
+    if len(shape) > 1:
+        raise ValueError(f"fuse_signals_batch takes 1-D columns, got shape {shape}")
+    n = shape[0] if shape else 1   # all scalars: one row
+    score = np.broadcast_to(np.asarray(sentiment_score, dtype=float), (n,))
+    forecast = np.broadcast_to(np.asarray(forecast, dtype=float), (n,))
+    confirmed = np.broadcast_to(np.asarray(structure_confirmed, dtype=bool), (n,))
+    is_breakout = np.broadcast_to(np.asarray(structure_type).astype(str) == 'breakout', (n,))
+    sl_buffer = np.broadcast_to(np.asarray(sl_buffer, dtype=float), (n,))
+    entry = np.broadcast_to(np.asarray(entry, dtype=float), (n,))
+    volatility = np.broadcast_to(np.asarray(volatility, dtype=float), (n,))
+    spread = np.broadcast_to(np.asarray(spread, dtype=float), (n,))
+    median_spread = np.broadcast_to(np.asarray(1.0 if median_spread is None else median_spread, dtype=float), (n,))
+    median_volatility = np.broadcast_to(np.asarray(1.0 if median_volatility is None else median_volatility, dtype=float), (n,))
+    data_age = np.broadcast_to(np.asarray(0 if data_age is None else data_age, dtype=float), (n,))
+    ranks, urgency_high = _urgency_ranks(sentiment_urgency)
+    ranks = np.broadcast_to(ranks, (n,))
+    urgency_high = np.broadcast_to(urgency_high, (n,))
+
+    # === PRE-TRADE BLOCKERS (first failing blocker wins, same order as scalar) ===
+    spread_block = spread > 1.5 * median_spread
+    stale_block = data_age > 20
+    vol_block = volatility > 3 * median_volatility
+    blocked = spread_block | stale_block | vol_block
+
+    # === BIAS CONFIRMATION ===
+    sentiment_ok = (np.abs(score) >= SENTIMENT_THRESHOLD) & \
+                   (ranks >= urgency_rank(SENTIMENT_URGENCY_MIN))
+    forecast_ok = (np.abs(forecast) >= FORECAST_MIN_AGREEMENT) & \
+                  (np.sign(forecast) == np.sign(score))
+    structure_ok = confirmed.copy()
+    bias_fail = ~blocked & ~(sentiment_ok & forecast_ok & structure_ok)
+
+    # === CONFIDENCE & RISK SCALING ===
+    confidence = compute_trade_confidence(score, np.abs(forecast), np.where(structure_ok, 1.0, 0.0))
+    risk_pct = np.select(
+        [confidence >= 0.8, confidence >= 0.6],
+        [min(RISK_MAX, RISK_BASE * 1.5), max(RISK_MIN, RISK_BASE * 0.75)],
+        default=np.nan
+    )
+    low_conf = ~blocked & ~bias_fail & np.isnan(risk_pct)
+    is_entry = ~blocked & ~bias_fail & ~low_conf
+
+    # === ENTRY LOGIC ===
+    buy = score > 0
+    buffer = sl_buffer + volatility
+    sl_raw = np.where(buy, entry - buffer, entry + buffer)
+    dist = np.abs(entry - sl_raw) * 2.0
+    tp_raw = np.where(buy, entry + dist, entry - dist)
+
+    sl = np.full(n, np.nan)
+    tp = np.full(n, np.nan)
+    conf_out = np.full(n, np.nan)
+    idx = np.flatnonzero(is_entry)
+    sl[idx] = _round_elementwise(sl_raw[idx])
+    tp[idx] = _round_elementwise(tp_raw[idx])
+    conf_out[idx] = _round_elementwise(confidence[idx])
+
+    decision = np.select(
+        [blocked, bias_fail | low_conf],
+        ['block', 'no_entry'],
+        default='entry'
+    ).astype(object)
+    reason = np.select(
+        [spread_block, stale_block, vol_block, bias_fail, low_conf],
+        ['Spread too high', 'Market data too stale', 'Volatility spike',
+         'Bias not confirmed', 'Confidence too low'],
+        default=''
+    ).astype(object)
+
+    return {
+        'decision': decision,
+        'reason': reason,
+        'direction': np.where(buy, 'buy', 'sell').astype(object),
+        'entry_type': np.where(is_breakout & urgency_high, 'market', 'limit').astype(object),
+        'entry': np.array(entry, dtype=float),
+        'sl': sl,
+        'tp': tp,
+        'risk_pct': np.where(is_entry, risk_pct, np.nan),
+        'confidence': conf_out,
+        'sentiment_ok': sentiment_ok,
+        'forecast_ok': forecast_ok,
+        'structure_ok': structure_ok,
+    }
+
+def batch_decision(table: Dict[str, np.ndarray], i: int) -> Dict[str, Any]:
+    """Row i of a fuse_signals_batch() table, shaped exactly like fuse_signals() output."""
+    decision = table['decision'][i]
+    if decision == 'block':
+        return {'decision': 'block', 'reason': table['reason'][i]}
+    if decision == 'no_entry':
+        if table['reason'][i] == 'Bias not confirmed':
+            return {
+                'decision': 'no_entry',
+                'sentiment_ok': bool(table['sentiment_ok'][i]),
+                'forecast_ok': bool(table['forecast_ok'][i]),
+                'structure_ok': bool(table['structure_ok'][i]),
+                'reason': 'Bias not confirmed'
+            }
+        return {'decision': 'no_entry', 'reason': table['reason'][i]}
+    return {
+        'decision': 'entry',
+        'entry': float(table['entry'][i]),
+        'direction': table['direction'][i],
+        'entry_type': table['entry_type'][i],
+        'sl': float(table['sl'][i]),
+        'tp': float(table['tp'][i]),
+        'risk_pct': float(table['risk_pct'][i]),
+        'confidence': float(table['confidence'][i])
+    }
+
+# === LAZY FUSION ENGINE ===
+
+# Relative cost of producing each input; cheapest inputs are fetched first.
+INPUT_COSTS = {'structure': 1, 'forecast': 2, 'sentiment': 3}
+
+def _bias_gate(resolved: Dict[str, Any]):
+    """
+    Check whatever bias inputs are resolved so far.
+    Returns a no_entry decision as soon as one check can no longer pass, else None.
+    Checks for inputs that were never fetched are reported as None.
+    """
+    flags = {'sentiment_ok': None, 'forecast_ok': None, 'structure_ok': None}
+    if 'structure' in resolved:
+        flags['structure_ok'] = resolved['structure'].get('confirmed', False)
+    if 'forecast' in resolved:
+        forecast = resolved['forecast']
+        flags['forecast_ok'] = abs(forecast) >= FORECAST_MIN_AGREEMENT
+        if flags['forecast_ok'] and 'sentiment' in resolved:
+            flags['forecast_ok'] = np.sign(forecast) == np.sign(resolved['sentiment']['score'])
+    if 'sentiment' in resolved:
+        sentiment = resolved['sentiment']
+        flags['sentiment_ok'] = abs(sentiment['score']) >= SENTIMENT_THRESHOLD and \
+                                urgency_rank(sentiment['urgency']) >= urgency_rank(SENTIMENT_URGENCY_MIN)
+
+    if any(ok is False for ok in flags.values()):
+        return {
+            'decision': 'no_entry',
+            **flags,
+            'skipped': sorted(k for k in INPUT_COSTS if k not in resolved),
+            'reason': 'Bias not confirmed'
+        }
+    return None
+
+def _fetch_order(costs):
+    costs = {**INPUT_COSTS, **(costs or {})}
+    return sorted(INPUT_COSTS, key=lambda name: costs[name])
+
+def _resolve(value):
+    return value() if callable(value) else value
+
+async def _aresolve(value):
+    value = _resolve(value)
+    if inspect.isawaitable(value):
+        value = await value
+    return value
+
+def fuse_signals_lazy(
+    sentiment,
+    forecast,
+    structure,
+    market_state,
+    equity: float = 10000.0,
+    costs: Dict[str, int] = None,
+    resolved: Dict[str, Any] = None
+) -> Dict[str, Any]:
+    """
+    fuse_signals() with lazily evaluated inputs.
+
+    Every input may be a plain value or a zero-argument callable (thunk).
+    market_state is resolved first and the pre-trade blockers run before any
+    other input is fetched; remaining inputs are fetched in ascending cost
+    order (INPUT_COSTS, overridable via `costs`) and fusion short-circuits as
+    soon as a bias check fails. Pass a dict as `resolved` to receive the inputs
+    that were actually fetched (e.g. for journaling).
+    """
+    resolved = {} if resolved is None else resolved
+    providers = {'sentiment': sentiment, 'forecast': forecast, 'structure': structure}
+
+    resolved['market_state'] = _resolve(market_state)
+    blocked = _pre_trade_block(resolved['market_state'])
+    if blocked:
+        return blocked
+
+    for name in _fetch_order(costs):
+        resolved[name] = _resolve(providers[name])
+        rejected = _bias_gate(resolved)
+        if rejected:
+            return rejected
+
+    return fuse_signals(resolved['sentiment'], resolved['forecast'], resolved['structure'],
+                        resolved['market_state'], equity)
+
+async def afuse_signals_lazy(
+    sentiment,
+    forecast,
+    structure,
+    market_state,
+    equity: float = 10000.0,
+    costs: Dict[str, int] = None,
+    resolved: Dict[str, Any] = None
+) -> Dict[str, Any]:
+    """Async variant of fuse_signals_lazy(); inputs may also be awaitables or coroutine functions."""
+    resolved = {} if resolved is None else resolved
+    providers = {'sentiment': sentiment, 'forecast': forecast, 'structure': structure}
+
+    resolved['market_state'] = await _aresolve(market_state)
+    blocked = _pre_trade_block(resolved['market_state'])
+    if blocked:
+        return blocked
+
+    for name in _fetch_order(costs):
+        resolved[name] = await _aresolve(providers[name])
+        rejected = _bias_gate(resolved)
+        if rejected:
+            return rejected
+
+    return fuse_signals(resolved['sentiment'], resolved['forecast'], resolved['structure'],
+                        resolved['market_state'], equity)
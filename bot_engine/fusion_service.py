@@ -0,0 +1,189 @@
+"""
+Incremental Event-Driven Fusion Service
+Keeps the latest sentiment / forecast / structure / market state per symbol and
+re-runs fuse_signals only for symbols whose inputs actually changed.
+
+feed_from_engine() is the producer: it pushes the engine's market snapshot,
+the decayed news sentiment index and the forecast/structure inputs into the
+service every FEED_SECONDS.
+"""
+
+import asyncio
+import copy
+import logging
+import time
+from typing import Any, Callable, Dict, List
+
+from bot_engine.feed_normalizer import get_normalized_market_states
+from bot_engine.fusion_engine import fuse_signals
+from bot_engine.market_stats import MARKET_STATS
+
+FUSION_INPUTS = ("sentiment", "forecast", "structure", "market_state")
+DEBOUNCE_SECONDS = 0.05     # coalesce bursts of updates into one recompute
+FEED_SECONDS = 5            # poll interval of feed_from_engine
+# what fuse_signals reads: feed_from_engine pushes only these, so bar times,
+# raw OHLC and the continuously decaying sentiment weight are not "changes"
+MARKET_STATE_FIELDS = ("symbol", "bid", "ask", "entry", "spread", "volatility",
+                       "median_spread", "median_volatility", "data_age")
+SENTIMENT_SCORE_DECIMALS = 2
+
+
+def decision_inputs(market_state: dict, sentiment: dict):
+    """The decision-relevant part of a market state and an index sentiment reading."""
+    market = {k: market_state[k] for k in MARKET_STATE_FIELDS if k in market_state}
+    sentiment = {"score": round(sentiment["score"], SENTIMENT_SCORE_DECIMALS),
+                 "urgency": sentiment["urgency"], "direction": sentiment["direction"]}
+    return market, sentiment
+
+
+class FusionService:
+    """
+    Long-running asyncio fusion service.
+
+    Producers call update(symbol, sentiment=..., market_state=...) whenever a
+    new input arrives. Symbols whose inputs changed are marked dirty; the run()
+    loop recomputes only dirty symbols that have every input, and publishes a
+    diff to subscribers when a symbol's decision changes.
+    """
+
+    def __init__(self, equity: float = 10000.0, debounce: float = DEBOUNCE_SECONDS):
+        self.equity = equity
+        self.debounce = debounce
+        self.inputs: Dict[str, Dict[str, Any]] = {}
+        self.decisions: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"updates": 0, "unchanged": 0, "recomputed": 0, "published": 0, "errors": 0}
+        self._dirty = set()
+        self._wakeup = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._subscribers: List[Callable] = []
+
+    def subscribe(self, callback: Callable):
+        """Register a callback (sync or async) receiving each decision diff."""
+        self._subscribers.append(callback)
+
+    def update(self, symbol: str, **inputs):
+        """Record new inputs for a symbol; only real changes schedule a recompute."""
+        unknown = set(inputs) - set(FUSION_INPUTS)
+        if unknown:
+            raise ValueError(f"Unknown fusion inputs: {sorted(unknown)}")
+        self.stats["updates"] += 1
+        state = self.inputs.setdefault(symbol, {})
+        changed = False
+        for name, value in inputs.items():
+            if state.get(name) != value:
+                # stored as a copy, so a producer mutating its dict in place is still a change
+                state[name] = copy.deepcopy(value)
+                changed = True
+        if not changed:
+            self.stats["unchanged"] += 1
+            return
+        self._dirty.add(symbol)
+        self._wakeup.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def recompute_dirty(self) -> List[Dict[str, Any]]:
+        """Re-fuse every dirty symbol with a full input set; returns the decision diffs."""
+        diffs = []
+        dirty, self._dirty = self._dirty, set()
+        for symbol in sorted(dirty):
+            state = self.inputs[symbol]
+            if any(name not in state for name in FUSION_INPUTS):
+                continue
+            try:
+                decision = fuse_signals(state["sentiment"], state["forecast"], state["structure"],
+                                        state["market_state"], self.equity)
+            except Exception as e:
+                # one bad input set must not stop run() or drop the other dirty symbols
+                self.stats["errors"] += 1
+                logging.error(f"FusionService fusion failed for {symbol}: {e}", exc_info=True)
+                continue
+            self.stats["recomputed"] += 1
+            previous = self.decisions.get(symbol)
+            if decision == previous:
+                continue
+            self.decisions[symbol] = decision
+            diffs.append({
+                "symbol": symbol,
+                "previous": previous,
+                "current": decision,
+                "changed": sorted(k for k in set(decision) | set(previous or {})
+                                  if decision.get(k) != (previous or {}).get(k)),
+                "timestamp": time.time()
+            })
+        return diffs
+
+    async def _publish(self, diff: Dict[str, Any]):
+        self.stats["published"] += 1
+        for callback in self._subscribers:
+            try:
+                result = callback(diff)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logging.error(f"FusionService subscriber error for {diff['symbol']}: {e}", exc_info=True)
+
+    async def run(self):
+        """Wait for input changes and publish decision diffs until stop() is called."""
+        logging.info("FusionService started.")
+        while not self._stop.is_set():
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if self.debounce:
+                await asyncio.sleep(self.debounce)
+            for diff in self.recompute_dirty():
+                await self._publish(diff)
+        logging.info("FusionService stopped.")
+
+
+async def feed_from_engine(service: FusionService, symbols: List[str] = None, timeframe: str = "M1",
+                           interval: float = FEED_SECONDS, cycles: int = None):
+    """
+    Producer: every `interval` seconds push each symbol's market state (one
+    batched snapshot, median-enriched), decayed sentiment and forecast /
+    structure into `service` until it stops (or after `cycles` polls).
+    Only decision_inputs() are pushed, so a poll over an unchanged market
+    costs no recompute.
+    """
+    from bot_engine.multisymbol_manager import SENTIMENT_INDEX, SYMBOLS, get_forecast, get_structure
+
+    symbols = list(symbols or SYMBOLS)
+    SENTIMENT_INDEX.register(symbols)
+    polls = 0
+    while not service._stop.is_set():
+        try:
+            snapshot = await asyncio.to_thread(get_normalized_market_states, symbols, timeframe)
+            for symbol in symbols:
+                if symbol not in snapshot:
+                    continue
+                market_state, sentiment = decision_inputs(MARKET_STATS.enrich(snapshot[symbol]),
+                                                          SENTIMENT_INDEX.sentiment(symbol))
+                service.update(symbol, market_state=market_state, sentiment=sentiment,
+                               forecast=get_forecast(symbol), structure=get_structure(symbol))
+        except Exception as e:
+            logging.error(f"FusionService feed failed: {e}", exc_info=True)
+        polls += 1
+        if cycles is not None and polls >= cycles:
+            return
+        try:
+            await asyncio.wait_for(service._stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+# Example usage
+if __name__ == "__main__":
+    from bot_engine.multisymbol_manager import SENTIMENT_INDEX
+    from bot_engine.sentiment_index import start_stream_ingest
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    async def main():
+        service = FusionService()
+        service.subscribe(lambda diff: logging.info(f"[{diff['symbol']}] {diff['changed']} -> {diff['current']}"))
+        start_stream_ingest(SENTIMENT_INDEX)    # news stream -> decayed sentiment index
+        await asyncio.gather(service.run(), feed_from_engine(service))
+
+    asyncio.run(main())
@@ -0,0 +1,167 @@
+"""
+Near-Duplicate Headline Index
+MinHash + LSH banding over normalized headline tokens, with a time-bounded
+window, so syndicated wires that differ by a word or punctuation map to one
+canonical headline and reuse its sentiment. The canonical's sentiment is kept
+in the index for the whole window, which outlives the news sentiment cache.
+"""
+
+import hashlib
+import re
+import time
+from collections import deque
+from typing import Dict, FrozenSet, Optional, Tuple
+
+DEDUP_WINDOW_SECONDS = 3600     # how long a canonical headline stays matchable
+JACCARD_THRESHOLD = 0.7         # verified token-set similarity for a duplicate
+NUM_BANDS = 16                  # LSH bands x rows = signature length
+ROWS_PER_BAND = 2
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_tokens(text: str) -> FrozenSet[str]:
+    """Lowercase word tokens with punctuation stripped ("EUR/USD" -> {"eur", "usd"})."""
+    return frozenset(_TOKEN_RE.findall(text.lower()))
+
+
+def numeric_tokens(tokens: FrozenSet[str]) -> FrozenSet[str]:
+    """Tokens carrying a number, units included ("75bp", "250k", "3")."""
+    return frozenset(t for t in tokens if any(ch.isdigit() for ch in t))
+
+
+def _base_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+
+
+def _permutations(n: int):
+    """Deterministic (a, b) pairs for the universal hash family (a*x + b) mod p."""
+    perms = []
+    for i in range(n):
+        digest = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "big") % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], "big") % _MERSENNE_PRIME
+        perms.append((a, b))
+    return perms
+
+
+class NearDuplicateIndex:
+    """
+    Maps headlines to a canonical headline seen within the last `window_seconds`.
+
+    Candidates come from LSH band buckets (O(bands) per lookup, independent of
+    window size) and are confirmed with exact Jaccard similarity on token sets.
+    Numeric tokens must match exactly, units included: "CPI 3.2%" and "CPI 3.5%",
+    or "hikes 25bp" and "hikes 75bp", are different news.
+    Only canonical headlines are indexed, so duplicates never chain-drift.
+    """
+
+    def __init__(self, window_seconds: float = DEDUP_WINDOW_SECONDS,
+                 threshold: float = JACCARD_THRESHOLD,
+                 bands: int = NUM_BANDS, rows: int = ROWS_PER_BAND):
+        self.window_seconds = window_seconds
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self._perms = _permutations(bands * rows)
+        self._entries: Dict[int, Tuple[float, FrozenSet[str], str, tuple]] = {}
+        self._buckets: Dict[tuple, set] = {}
+        self._order = deque()   # (timestamp, entry_id), oldest first
+        self._by_text: Dict[str, int] = {}
+        self._sentiments: Dict[int, dict] = {}
+        self._next_id = 0
+        self.stats = {"lookups": 0, "duplicates": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _signature(self, tokens: FrozenSet[str]) -> tuple:
+        hashes = [_base_hash(t) for t in tokens] or [0]
+        return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms)
+
+    def _band_keys(self, signature: tuple):
+        for band in range(self.bands):
+            yield (band,) + signature[band * self.rows:(band + 1) * self.rows]
+
+    def expire(self, now: float = None):
+        now = time.time() if now is None else now
+        cutoff = now - self.window_seconds
+        while self._order and self._order[0][0] < cutoff:
+            _, entry_id = self._order.popleft()
+            _, _, text, signature = self._entries.pop(entry_id)
+            self._sentiments.pop(entry_id, None)
+            if self._by_text.get(text) == entry_id:
+                del self._by_text[text]
+            for key in self._band_keys(signature):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(entry_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def _match(self, tokens, signature) -> Optional[str]:
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates |= self._buckets.get(key, set())
+        numbers = numeric_tokens(tokens)
+        best, best_score = None, 0.0
+        for entry_id in candidates:
+            _, other, canonical, _ = self._entries[entry_id]
+            if numbers != numeric_tokens(other):
+                continue
+            union = len(tokens | other)
+            score = len(tokens & other) / union if union else 1.0
+            if score >= self.threshold and score > best_score:
+                best, best_score = canonical, score
+        return best
+
+    def canonicalize(self, text: str, now: float = None) -> Tuple[str, bool]:
+        """
+        Return (canonical_headline, is_duplicate). Unmatched headlines become
+        canonical themselves and are added to the index.
+        """
+        now = time.time() if now is None else now
+        self.expire(now)
+        self.stats["lookups"] += 1
+        tokens = normalize_tokens(text)
+        signature = self._signature(tokens)
+        canonical = self._match(tokens, signature)
+        if canonical is not None:
+            if canonical != text:
+                self.stats["duplicates"] += 1
+            return canonical, canonical != text
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (now, tokens, text, signature)
+        self._order.append((now, entry_id))
+        self._by_text[text] = entry_id
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(entry_id)
+        return text, False
+
+
+    def sentiment(self, canonical: str) -> Optional[dict]:
+        """Sentiment remembered for a canonical headline still in the window."""
+        entry_id = self._by_text.get(canonical)
+        return None if entry_id is None else self._sentiments.get(entry_id)
+
+    def remember(self, canonical: str, sentiment: dict):
+        """Keep a canonical headline's sentiment for as long as it stays matchable."""
+        entry_id = self._by_text.get(canonical)
+        if entry_id is not None:
+            self._sentiments[entry_id] = dict(sentiment)
+
+
+# Example usage
+if __name__ == "__main__":
+    index = NearDuplicateIndex()
+    for headline in [
+        "Fed's Powell says rate cuts are not imminent",
+        "Fed's Powell says rate cuts not imminent",
+        "FED'S POWELL SAYS RATE CUTS ARE NOT IMMINENT!",
+        "ECB keeps rates unchanged, signals patience",
+    ]:
+        print(index.canonicalize(headline), "<-", headline)
+    print(index.stats)
@@ -0,0 +1,342 @@
+"""
+Pipeline Latency Instrumentation
+Spans (context manager or decorator) time each pipeline stage and record it in
+HDR-style log-linear histograms, per stage and per (stage, symbol). Recording
+is one bucket increment, percentiles stay within ~1% at any scale, and
+histograms from different processes merge exactly.
+
+Each process dumps its histograms to logs/latency/<service>-<pid>.json every
+DUMP_SECONDS; backend_api's /metrics merges those dumps per service (several
+workers of one service add up) with its own registry and serves them as
+Prometheus summaries (or JSON). Dumps not refreshed for STALE_DUMP_SECONDS
+belong to processes that are gone and are deleted on the next collection.
+
+With INSTRUMENTATION=0 span() returns a shared no-op and decorated functions
+call straight through, so disabled instrumentation costs one attribute check.
+"""
+
+import functools
+import glob
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+INSTRUMENTATION = os.getenv("INSTRUMENTATION", "1") != "0"
+METRICS_DIR = os.getenv("METRICS_DIR", "logs/latency")
+SERVICE = os.getenv("METRICS_SERVICE") or os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+DUMP_SECONDS = 60
+STALE_DUMP_SECONDS = 10 * DUMP_SECONDS
+SUB_BITS = 7                    # exact below 128us, then 64 sub-buckets per power of two: <= 1/64 relative error
+SUB = 1 << SUB_BITS
+HALF = SUB >> 1
+MAX_MICROS = 3_600_000_000      # values above one hour are clamped
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+ALL_SYMBOLS = ""                # symbol label of the per-stage aggregate
+
+
+def _bucket(micros: int) -> int:
+    if micros < SUB:
+        return micros
+    shift = micros.bit_length() - SUB_BITS
+    return SUB + (shift - 1) * HALF + (micros >> shift) - HALF
+
+
+def _bucket_range(index: int) -> Tuple[int, int]:
+    """Lowest and highest value (microseconds) counted in a bucket."""
+    if index < SUB:
+        return index, index
+    shift = (index - SUB) // HALF + 1
+    mantissa = (index - SUB) % HALF + HALF
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+N_BUCKETS = _bucket(MAX_MICROS) + 1
+
+
+class LatencyHistogram:
+    """Log-linear microsecond histogram with exact count/sum/min/max."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds: float):
+        micros = min(MAX_MICROS, max(0, int(seconds * 1_000_000)))
+        self.counts[_bucket(micros)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None or seconds < self.min else self.min
+        self.max = seconds if self.max is None or seconds > self.max else self.max
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Value (seconds) at quantile q in [0, 1]: the midpoint of the bucket holding it."""
+        if not self.count:
+            return None
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                low, high = _bucket_range(index)
+                value = (low + high) / 2 / 1_000_000
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, n in enumerate(other.counts):
+            if n:
+                self.counts[index] += n
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def summary(self) -> dict:
+        out = {"count": self.count, "mean": self.total / self.count if self.count else None,
+               "min": self.min, "max": self.max}
+        for q in QUANTILES:
+            out[f"p{q * 100:g}"] = self.percentile(q)
+        return out
+
+    def to_dict(self) -> dict:
+        return {"buckets": {str(i): n for i, n in enumerate(self.counts) if n},
+                "count": self.count, "sum": self.total, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        hist = cls()
+        for index, n in data["buckets"].items():
+            hist.counts[int(index)] = n
+        hist.count, hist.total, hist.min, hist.max = data["count"], data["sum"], data["min"], data["max"]
+        return hist
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("registry", "stage", "symbol", "started")
+
+    def __init__(self, registry, stage, symbol):
+        self.registry = registry
+        self.stage = stage
+        self.symbol = symbol
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.record(self.stage, time.perf_counter() - self.started, self.symbol)
+        return False
+
+
+class Instrumentation:
+    """Registry of latency histograms keyed by (stage, symbol)."""
+
+    def __init__(self, enabled: bool = INSTRUMENTATION, service: str = SERVICE,
+                 directory: str = METRICS_DIR, dump_seconds: float = DUMP_SECONDS):
+        self.enabled = enabled
+        self.service = service
+        self.directory = directory
+        self.dump_seconds = dump_seconds
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._dumped_at = time.time()
+
+    def record(self, stage: str, seconds: float, symbol: str = None):
+        if not self.enabled:
+            return
+        keys = ((stage, ALL_SYMBOLS), (stage, symbol)) if symbol else ((stage, ALL_SYMBOLS),)
+        with self._lock:
+            for key in keys:
+                hist = self._histograms.get(key)
+                if hist is None:
+                    hist = self._histograms[key] = LatencyHistogram()
+                hist.record(seconds)
+
+    def span(self, stage: str, symbol: str = None):
+        """`with METRICS.span("fusion", symbol):` times the block."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage, symbol)
+
+    def timed(self, stage: str, symbol_arg: str = None):
+        """
+        Decorator timing every call as `stage`; symbol_arg names the parameter
+        holding the symbol for the per-symbol histogram. Works on coroutines.
+        """
+        def decorate(fn):
+            signature = inspect.signature(fn)
+
+            def symbol_of(args, kwargs):
+                if symbol_arg is None:
+                    return None
+                if symbol_arg in kwargs:
+                    return kwargs[symbol_arg]
+                bound = signature.bind_partial(*args, **kwargs)
+                return bound.arguments.get(symbol_arg)
+
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await fn(*args, **kwargs)
+                    with _Span(self, stage, symbol_of(args, kwargs)):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Span(self, stage, symbol_of(args, kwargs)):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def histogram(self, stage: str, symbol: str = None) -> Optional[LatencyHistogram]:
+        return self._histograms.get((stage, symbol or ALL_SYMBOLS))
+
+    def snapshot(self) -> Dict[Tuple[str, str], LatencyHistogram]:
+        """Copies of every histogram, safe to read while recording continues."""
+        with self._lock:
+            return {key: LatencyHistogram.from_dict(hist.to_dict()) for key, hist in self._histograms.items()}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    # ── export ───────────────────────────────────────────────────────────────
+    def dump(self, path: str = None) -> str:
+        path = path or os.path.join(self.directory, f"{self.service}-{os.getpid()}.json")
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            payload = {"service": self.service, "pid": os.getpid(), "dumped_at": time.time(),
+                       "histograms": [{"stage": stage, "symbol": symbol, **hist.to_dict()}
+                                      for (stage, symbol), hist in self._histograms.items()]}
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)   # atomic: /metrics never reads a half-written dump
+        self._dumped_at = time.time()
+        return path
+
+    def maybe_dump(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            due = time.time() - self._dumped_at >= self.dump_seconds
+            if due:
+                self._dumped_at = time.time()
+        if due:
+            try:
+                self.dump()
+            except OSError as e:
+                logging.warning(f"Latency metrics dump failed: {e}")
+
+
+def load_dumps(directory: str = METRICS_DIR, exclude: Tuple[str, int] = None,
+               max_age: float = STALE_DUMP_SECONDS) -> Dict[Tuple[str, str, str], LatencyHistogram]:
+    """
+    Histograms from every fresh process dump in `directory`, merged per
+    (service, stage, symbol). `exclude` is the (service, pid) of a dump to skip.
+    """
+    merged = {}
+    now = time.time()
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        try:
+            stale = now - os.path.getmtime(path) > max_age
+            if stale:
+                os.remove(path)     # left by a process that exited: don't parse it on every scrape
+        except OSError:
+            continue
+        if stale:
+            continue
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Skipping unreadable metrics dump {path}: {e}")
+            continue
+        if (payload.get("service"), payload.get("pid")) == exclude or now - payload.get("dumped_at", 0) > max_age:
+            continue
+        for item in payload.get("histograms", []):
+            _merge_into(merged, (payload["service"], item["stage"], item["symbol"]), LatencyHistogram.from_dict(item))
+    return merged
+
+
+def _merge_into(histograms: dict, key: Tuple[str, str, str], hist: LatencyHistogram):
+    if key in histograms:
+        histograms[key].merge(hist)
+    else:
+        histograms[key] = hist
+
+
+def collect(registry: "Instrumentation" = None, directory: str = METRICS_DIR) -> Dict[Tuple[str, str, str], LatencyHistogram]:
+    """This process's live histograms plus the latest dumps of every other process."""
+    registry = registry or METRICS
+    histograms = load_dumps(directory, exclude=(registry.service, os.getpid()))
+    for (stage, symbol), hist in registry.snapshot().items():
+        _merge_into(histograms, (registry.service, stage, symbol), hist)
+    return histograms
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(histograms: Dict[Tuple[str, str, str], LatencyHistogram]) -> str:
+    """Prometheus exposition format: one summary per (service, stage, symbol)."""
+    name = "pipeline_stage_latency_seconds"
+    lines = [f"# HELP {name} Latency of one pipeline stage.", f"# TYPE {name} summary"]
+    for (service, stage, symbol), hist in sorted(histograms.items()):
+        labels = f'service="{_label(service)}",stage="{_label(stage)}",symbol="{_label(symbol)}"'
+        for q in QUANTILES:
+            lines.append(f'{name}{{{labels},quantile="{q:g}"}} {hist.percentile(q) or 0:.9g}')
+        lines.append(f"{name}_sum{{{labels}}} {hist.total:.9g}")
+        lines.append(f"{name}_count{{{labels}}} {hist.count}")
+    return "\n".join(lines) + "\n"
+
+
+def json_summary(histograms: Dict[Tuple[str, str, str], LatencyHistogram]) -> list:
+    return [{"service": service, "stage": stage, "symbol": symbol, **hist.summary()}
+            for (service, stage, symbol), hist in sorted(histograms.items())]
+
+
+METRICS = Instrumentation()
+span = METRICS.span
+timed = METRICS.timed
+
+
+# Example usage
+if __name__ == "__main__":
+    import random
+
+    for _ in range(10_000):
+        with span("fusion", random.choice(["XAUUSD", "EURUSD"])):
+            time.sleep(0) if random.random() < 0.9 else sum(range(20_000))
+    print(json.dumps(json_summary(collect()), indent=2))
+    print(prometheus_text(collect()))
@@ -0,0 +1,170 @@
+"""
+Local Headline Sentiment Scorer
+Fast hashed-lexicon linear model that scores tone, urgency and directional bias
+for a whole batch of headlines at once. Confidence is lexicon coverage: the
+share of a headline's content words the lexicon knows. Headlines the lexicon
+barely covers, negated headlines and ambiguous biases are escalated to the LLM.
+"""
+
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, List
+
+import numpy as np
+
+N_FEATURES = 2 ** 16
+# |directional_bias| in [low, high) is ambiguous and goes to the LLM;
+# below it the headline carries no directional signal, above it local is confident.
+ESCALATION_BAND = (0.2, 0.6)
+MIN_CONFIDENCE = 0.3            # known share of content words below which local can't judge
+NEGATION_WINDOW = 3             # tokens after a negator whose bias/tone are flipped
+NEGATION_PENALTY = 0.5          # scope of a negation is beyond a bag of words: halve confidence
+HAWKISH_TONE_MIN = 0.5
+URGENCY_HIGH_MIN = 1.0
+URGENCY_MEDIUM_MIN = 0.4
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9']*")
+NEGATORS = {"not", "no", "never", "without", "nor", "isn't", "aren't", "won't", "don't", "doesn't",
+            "didn't", "wasn't", "hasn't", "haven't", "can't", "cannot", "unlikely"}
+# function words: neither count against coverage nor carry signal
+STOPWORDS = {"a", "an", "the", "of", "to", "in", "on", "at", "as", "by", "for", "with", "from", "and",
+             "or", "but", "is", "are", "was", "were", "be", "been", "its", "it", "this", "that", "vs",
+             "after", "ahead", "toward", "towards", "into", "over", "up", "says", "said", "amid", "than"}
+
+# token -> (directional bias, hawkish(+)/dovish(-) tone, urgency)
+LEXICON = {
+    # hawkish / currency-supportive
+    "hike": (0.8, 1.0, 0.6), "hikes": (0.8, 1.0, 0.6), "hiking": (0.7, 1.0, 0.5),
+    "hawkish": (0.7, 1.0, 0.4), "tighten": (0.5, 0.8, 0.3), "tightening": (0.5, 0.8, 0.3),
+    "raises": (0.5, 0.6, 0.3), "surges": (0.8, 0.0, 0.5), "soars": (0.8, 0.0, 0.5),
+    "jumps": (0.6, 0.0, 0.4), "beats": (0.6, 0.2, 0.3), "strong": (0.4, 0.2, 0.0),
+    "stronger": (0.4, 0.2, 0.0), "rallies": (0.6, 0.0, 0.2), "rally": (0.5, 0.0, 0.2),
+    "gains": (0.4, 0.0, 0.0), "climbs": (0.4, 0.0, 0.0), "rises": (0.4, 0.0, 0.0),
+    "higher": (0.1, 0.0, -0.2), "edges": (0.05, 0.0, -0.3), "firm": (0.2, 0.1, 0.0),
+    "inflation": (0.1, 0.5, 0.2), "robust": (0.4, 0.2, 0.0),
+    # dovish / currency-negative
+    "cut": (-0.8, -1.0, 0.6), "cuts": (-0.8, -1.0, 0.6), "cutting": (-0.7, -1.0, 0.5),
+    "dovish": (-0.7, -1.0, 0.4), "easing": (-0.5, -0.8, 0.3), "stimulus": (-0.4, -0.8, 0.3),
+    "slump": (-0.7, 0.0, 0.4), "slumps": (-0.7, 0.0, 0.4), "plunges": (-0.8, 0.0, 0.5),
+    "tumbles": (-0.7, 0.0, 0.4), "falls": (-0.4, 0.0, 0.0), "drops": (-0.4, 0.0, 0.0),
+    "slides": (-0.4, 0.0, 0.0), "weak": (-0.4, -0.2, 0.0), "weaker": (-0.4, -0.2, 0.0),
+    "misses": (-0.6, -0.2, 0.3), "lower": (-0.1, 0.0, -0.2), "recession": (-0.6, -0.5, 0.5),
+    "contraction": (-0.5, -0.3, 0.3), "slowdown": (-0.4, -0.3, 0.2),
+    # urgency / event risk
+    "breaking": (0.0, 0.0, 0.8), "emergency": (0.0, 0.0, 1.0), "surprise": (0.0, 0.0, 0.6),
+    "unexpected": (0.0, 0.0, 0.6), "unexpectedly": (0.0, 0.0, 0.6), "shock": (0.0, 0.0, 0.7),
+    "crisis": (-0.3, 0.0, 0.8), "intervention": (0.0, 0.0, 0.8), "fomc": (0.0, 0.0, 0.5),
+    "nfp": (0.0, 0.0, 0.5), "payrolls": (0.0, 0.0, 0.4), "cpi": (0.0, 0.0, 0.4),
+    "war": (-0.3, 0.0, 0.8), "default": (-0.5, 0.0, 0.8),
+    # calm / low information
+    "quiet": (0.0, 0.0, -0.6), "steady": (0.0, 0.0, -0.4), "calm": (0.0, 0.0, -0.5),
+    "muted": (0.0, 0.0, -0.5), "flat": (0.0, 0.0, -0.4), "consolidates": (0.0, 0.0, -0.4),
+    "range": (0.0, 0.0, -0.3), "holds": (0.0, 0.0, -0.2), "unchanged": (0.0, 0.0, -0.3),
+}
+
+
+@lru_cache(maxsize=100_000)
+def _feature(token: str, n_features: int) -> int:
+    return zlib.crc32(token.encode()) % n_features
+
+
+class LocalSentimentScorer:
+    """
+    Hashed-feature linear scorer: every token maps to a weight row, a headline's
+    raw scores are the sum of its rows, and the whole batch is reduced with
+    np.bincount. Tracks how many headlines it had to escalate.
+    """
+
+    def __init__(self, lexicon: Dict[str, tuple] = None, band: tuple = ESCALATION_BAND,
+                 n_features: int = N_FEATURES):
+        self.band = band
+        self.n_features = n_features
+        self.weights = np.zeros((n_features, 3))
+        self.known = np.zeros(n_features, dtype=bool)
+        for token, row in (lexicon or LEXICON).items():
+            self.weights[_feature(token, n_features)] += row
+            self.known[_feature(token, n_features)] = True
+        self.stats = {"scored": 0, "escalated": 0}
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.stats["escalated"] / self.stats["scored"] if self.stats["scored"] else 0.0
+
+    def score_batch(self, headlines: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Score a batch of headlines. Returns arrays: directional_bias, tone,
+        urgency, confidence (lexicon coverage) and escalate (True = send to the LLM).
+        """
+        n = len(headlines)
+        rows, cols, signs = [], [], []
+        negated = np.zeros(n, dtype=bool)
+        for i, text in enumerate(headlines):
+            scope = 0
+            for token in TOKEN_RE.findall(text.lower()):
+                if token in NEGATORS:
+                    negated[i] = True
+                    scope = NEGATION_WINDOW
+                    continue
+                if len(token) < 2 or token in STOPWORDS:
+                    continue
+                rows.append(i)
+                cols.append(_feature(token, self.n_features))
+                signs.append(-1.0 if scope else 1.0)
+                scope = max(0, scope - 1)
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        feats = self.weights[cols] * np.column_stack([signs, signs, np.ones(len(signs))]) \
+            if len(cols) else np.zeros((0, 3))
+        raw = np.column_stack([np.bincount(rows, weights=feats[:, k], minlength=n) for k in range(3)]) \
+            if n else np.zeros((0, 3))
+        words = np.bincount(rows, minlength=n)
+        hits = np.bincount(rows, weights=self.known[cols], minlength=n)
+
+        bias = np.round(np.tanh(raw[:, 0]), 3)
+        tone = np.select([raw[:, 1] >= HAWKISH_TONE_MIN, raw[:, 1] <= -HAWKISH_TONE_MIN],
+                         ["hawkish", "dovish"], default="neutral")
+        urgency = np.select([raw[:, 2] >= URGENCY_HIGH_MIN, raw[:, 2] >= URGENCY_MEDIUM_MIN],
+                            ["high", "medium"], default="low")
+        confidence = np.round(np.divide(hits, words, out=np.zeros(n), where=words > 0) *
+                              np.where(negated, NEGATION_PENALTY, 1.0), 3)
+        strength = np.abs(bias)
+        low, high = self.band
+        escalate = (confidence < MIN_CONFIDENCE) | \
+                   ((strength >= low) & (strength < high)) | \
+                   ((urgency == "high") & (strength < high))
+
+        self.stats["scored"] += n
+        self.stats["escalated"] += int(escalate.sum())
+        return {
+            "directional_bias": bias,
+            "tone": tone,
+            "urgency": urgency,
+            "confidence": confidence,
+            "escalate": escalate,
+        }
+
+    @staticmethod
+    def to_sentiments(scores: Dict[str, np.ndarray]) -> List[dict]:
+        """Row-wise sentiment dicts in the same shape news_feed.parse_sentiment returns."""
+        return [
+            {"directional_bias": float(b), "tone": str(t), "urgency": str(u), "source": "local"}
+            for b, t, u in zip(scores["directional_bias"], scores["tone"], scores["urgency"])
+        ]
+
+
+# Example usage
+if __name__ == "__main__":
+    scorer = LocalSentimentScorer()
+    sample = [
+        "EUR/USD edges higher in quiet trade",
+        "Fed unexpectedly hikes rates by 75bp",
+        "ECB signals easing as eurozone slides toward recession",
+        "Gold steady ahead of FOMC minutes",
+        "Fed Powell says rate cuts are not imminent",
+        "Bank of Japan intervenes to prop up yen",
+    ]
+    scores = scorer.score_batch(sample)
+    for text, s, esc in zip(sample, scorer.to_sentiments(scores), scores["escalate"]):
+        print(f"{'LLM ' if esc else 'local'} | {s} | {text}")
+    print(f"Escalation rate: {scorer.escalation_rate:.0%}")
@@ -0,0 +1,221 @@
+"""
+Streaming Market Statistics
+Online median spread / volatility per symbol and per hour-of-week bucket using
+the P² quantile estimator (Jain & Chlamtac), O(1) memory and time per update.
+Snapshotted to JSON and warm-loaded at startup so blockers are accurate from
+the first cycle without recomputing medians over history.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+STATS_PATH = os.getenv("MARKET_STATS_PATH", "logs/market_stats.json")
+SNAPSHOT_SECONDS = 300          # minimum interval between automatic snapshots
+MIN_BUCKET_SAMPLES = 30         # below this an hour-of-week bucket falls back to the symbol-wide median
+STAT_FIELDS = ("spread", "volatility")
+
+
+class P2Quantile:
+    """P² single-quantile estimator: five markers, adjusted with piecewise-parabolic steps."""
+
+    __slots__ = ("p", "count", "q", "n", "np", "dn")
+
+    def __init__(self, p: float = 0.5):
+        self.p = p
+        self.count = 0
+        self.q = []                                     # marker heights (first 5 raw samples until full)
+        self.n = [0, 1, 2, 3, 4]                        # marker positions
+        self.np = [0, 2 * p, 4 * p, 2 + 2 * p, 4]       # desired positions
+        self.dn = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x: float):
+        self.count += 1
+        q, n = self.q, self.n
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0], k = x, 0
+        elif x >= q[4]:
+            q[4], k = x, 3
+        else:
+            k = next(i for i in range(4) if x < q[i + 1])
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.np[i] += self.dn[i]
+
+        for i in (1, 2, 3):
+            d = self.np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                qp = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = qp
+                n[i] += d
+
+    def value(self) -> Optional[float]:
+        if not self.count:
+            return None
+        if self.count <= 5:
+            return self.q[min(len(self.q) - 1, int(self.p * len(self.q)))]
+        return self.q[2]
+
+    def to_dict(self) -> dict:
+        return {"p": self.p, "count": self.count, "q": self.q, "n": self.n, "np": self.np}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "P2Quantile":
+        est = cls(data["p"])
+        est.count, est.q, est.n, est.np = data["count"], data["q"], data["n"], data["np"]
+        return est
+
+
+def hour_of_week(t: float) -> int:
+    dt = datetime.fromtimestamp(t, tz=timezone.utc)
+    return dt.weekday() * 24 + dt.hour
+
+
+def bar_volatility(market_state: dict) -> Optional[float]:
+    """Volatility as the current bar range when the state does not carry one."""
+    if market_state.get("volatility") is not None:
+        return market_state["volatility"]
+    ohlc = market_state.get("ohlc")
+    return ohlc["high"] - ohlc["low"] if ohlc else None
+
+
+class MarketStatsService:
+    """
+    Per-symbol streaming medians of spread and volatility, symbol-wide and per
+    UTC hour-of-week (168 buckets), so the Asian-session spread is judged against
+    Asian-session history rather than the London open.
+    """
+
+    def __init__(self, path: str = STATS_PATH, snapshot_seconds: float = SNAPSHOT_SECONDS):
+        self.path = path
+        self.snapshot_seconds = snapshot_seconds
+        # symbol -> field -> bucket ("all" or hour-of-week as str) -> estimator
+        self._estimators: Dict[str, Dict[str, Dict[str, P2Quantile]]] = {}
+        self._lock = threading.Lock()
+        self._saved_at = time.time()
+
+    def update(self, symbol: str, field: str, value: float, t: float = None):
+        t = time.time() if t is None else t
+        with self._lock:
+            buckets = self._estimators.setdefault(symbol, {}).setdefault(field, {})
+            for key in ("all", str(hour_of_week(t))):
+                if key not in buckets:
+                    buckets[key] = P2Quantile(0.5)
+                buckets[key].add(float(value))
+
+    def observe(self, market_state: dict, t: float = None):
+        """Feed the live spread and volatility of a market_state into the estimators."""
+        symbol = market_state["symbol"]
+        if market_state.get("spread") is not None:
+            self.update(symbol, "spread", market_state["spread"], t)
+        volatility = bar_volatility(market_state)
+        if volatility is not None:
+            self.update(symbol, "volatility", volatility, t)
+        self.maybe_snapshot()
+
+    def median(self, symbol: str, field: str, t: float = None) -> Optional[float]:
+        """Hour-of-week median when the bucket has enough samples, else the symbol-wide one."""
+        t = time.time() if t is None else t
+        buckets = self._estimators.get(symbol, {}).get(field, {})
+        with self._lock:
+            bucket = buckets.get(str(hour_of_week(t)))
+            if bucket is not None and bucket.count >= MIN_BUCKET_SAMPLES:
+                return bucket.value()
+            overall = buckets.get("all")
+            return overall.value() if overall is not None else None
+
+    def enrich(self, market_state: dict, symbol: str = None, t: float = None) -> dict:
+        """
+        Fill median_spread / median_volatility (and volatility, from the bar range)
+        in place. Fields stay absent while a symbol has no history, so the fusion
+        and guardrail defaults apply.
+        """
+        symbol = symbol or market_state["symbol"]
+        if market_state.get("volatility") is None:
+            volatility = bar_volatility(market_state)
+            if volatility is not None:
+                market_state["volatility"] = volatility
+        for field in STAT_FIELDS:
+            value = self.median(symbol, field, t)
+            if value is not None:
+                market_state[f"median_{field}"] = value
+        return market_state
+
+    # ── persistence ──────────────────────────────────────────────────────────
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                symbol: {field: {k: est.to_dict() for k, est in buckets.items()}
+                         for field, buckets in fields.items()}
+                for symbol, fields in self._estimators.items()
+            }
+
+    def save(self, path: str = None):
+        path = path or self.path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"saved_at": time.time(), "symbols": self.to_dict()}, f)
+        os.replace(tmp, path)   # atomic: a crash never leaves a half-written snapshot
+        self._saved_at = time.time()
+
+    def maybe_snapshot(self):
+        with self._lock:
+            # claim the slot under the lock so concurrent symbol threads save once
+            due = time.time() - self._saved_at >= self.snapshot_seconds
+            if due:
+                self._saved_at = time.time()
+        if due:
+            try:
+                self.save()
+            except OSError as e:
+                logging.warning(f"Market stats snapshot failed: {e}")
+
+    @classmethod
+    def load(cls, path: str = STATS_PATH, **kwargs) -> "MarketStatsService":
+        """Warm-start from a snapshot; a missing or corrupt file gives an empty service."""
+        service = cls(path, **kwargs)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            service._estimators = {
+                symbol: {field: {k: P2Quantile.from_dict(est) for k, est in buckets.items()}
+                         for field, buckets in fields.items()}
+                for symbol, fields in data.get("symbols", {}).items()
+            }
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Ignoring unreadable market stats snapshot {path}: {e}")
+        return service
+
+
+MARKET_STATS = MarketStatsService.load(STATS_PATH)
+
+
+# Example usage
+if __name__ == "__main__":
+    import random
+
+    service = MarketStatsService("logs/market_stats_demo.json")
+    for _ in range(5000):
+        service.observe({"symbol": "EURUSD", "spread": random.lognormvariate(-9, 0.3),
+                         "volatility": random.lognormvariate(-7, 0.5)})
+    print(service.enrich({"symbol": "EURUSD", "spread": 0.00015}))
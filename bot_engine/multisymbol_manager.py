@@ -1,32 +1,87 @@
-import threading
-from bot_engine.feed_normalizer import get_normalized_market_state
-from bot_engine.signal_fusion import fuse_signals
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from bot_engine.analysis_pool import ANALYSIS_BARS, ANALYSIS_PROCESSES, AnalysisPool, structure_from_analysis
+from bot_engine.feed_normalizer import MARKET_DATA, get_normalized_market_state, get_normalized_market_states
+from bot_engine.fusion_engine import fuse_signals_lazy
+from bot_engine.instrumentation import METRICS, span
 from bot_engine.rule_engine import check_guardrails
+from bot_engine.economic_calendar import CALENDAR, refresh_calendar
+from bot_engine.market_stats import MARKET_STATS
+from bot_engine.priority_scheduler import STALE_BAR_SECONDS, VOL_LONG, PriorityScheduler, priority_factors
+from bot_engine.sentiment_index import SymbolSentimentIndex, start_stream_ingest
+from bot_engine.shard_coordinator import ShardCoordinator
+from bot_engine.timer_wheel import BROKER_UTC_OFFSET_HOURS
 from journal.trade_journaler import log_trade
-from mt5_bridge.mt5_bridge_client import send_trade_command, wait_for_ack
+from mt5_bridge_client import ACK_FILLED, new_trade_id, poll_exit, send_trade_command, wait_for_ack, wait_for_ack_async
 
 SYMBOLS = ["XAUUSD", "EURUSD", "GBPJPY"]
 STRATEGIES = ["default"] # Extendable: plug in more signal engines
+CYCLE_SECONDS = 60          # target interval between market snapshots
+MAX_WORKERS = 8             # concurrent (symbol, strategy) jobs and offload threads
+EXIT_POLL_SECONDS = 5       # how often open trades are checked for an EA exit report
+ENGINE_MODE = os.getenv("ENGINE_MODE", "standalone")   # "distributed": symbols sharded via Redis
+SCHEDULING = os.getenv("SCHEDULING", "fixed")          # "priority": volatility/event-aware cycle rates
+# Decayed per-symbol sentiment, fed incrementally from the news stream
+SENTIMENT_INDEX = SymbolSentimentIndex(SYMBOLS)
+# Latest process-pool structure analysis per symbol (filled when ANALYSIS_PROCESSES > 0)
+STRUCTURES = {}
 
-def process_symbol(symbol, strategy="default"):
-    # Example: run full loop for a symbol, can be extended per strategy
+# Signal providers (forecast/structure are stubs: replace with your engines).
+# They are only called by the lazy fusion once the cheap blockers have passed.
+def get_sentiment(symbol):
+    return SENTIMENT_INDEX.sentiment(symbol)
+
+def get_forecast(symbol):
+    return 0.7
+
+def get_structure(symbol):
+    if symbol in STRUCTURES:
+        return STRUCTURES[symbol]
+    return {"confirmed": True, "type": "breakout", "sl_buffer": 0.3}
+
+def _measured(stage, symbol, provider):
+    with span(stage, symbol):
+        return provider(symbol)
+
+def evaluate_symbol(symbol, strategy="default", market_state=None):
+    """
+    Steps 1-3 of the loop (ingest, fusion, guardrails). Returns (trade, context)
+    when a trade should be sent, else None.
+    """
     print(f"[{symbol}] Starting strategy: {strategy}")
-    # 1. Ingest data
-    market_state = get_normalized_market_state(symbol)
-    # 2. Run signal logic (stub: replace with your fusion/strategy logic)
-    sentiment = {"score": 0.8, "urgency": "high", "direction": "bullish"}
-    forecast = 0.7
-    structure = {"confirmed": True, "type": "breakout", "sl_buffer": 0.3}
-    fusion_decision = fuse_signals(sentiment, forecast, structure, market_state)
-    news_context = {}  # Optionally pull from news module
-
-    # 3. Guardrails
-    allowed, reason = check_guardrails(market_state, fusion_decision, news_context)
-    if not allowed or fusion_decision.get("decision") != "entry":
+    # 1. Ingest data (the scheduler passes the symbol's row of the bulk snapshot)
+    with span("ingest", symbol):
+        if market_state is None:
+            market_state = get_normalized_market_state(symbol)
+        MARKET_STATS.observe(market_state)
+        MARKET_STATS.enrich(market_state)  # streaming median spread/volatility for this hour of week
+    # 2. Run signal logic: blockers first, then inputs cheapest-first
+    # ("fusion" includes whichever inputs it resolves; each input also has its own stage)
+    inputs = {}
+    with span("fusion", symbol):
+        fusion_decision = fuse_signals_lazy(
+            sentiment=lambda: _measured("sentiment", symbol, get_sentiment),
+            forecast=lambda: _measured("forecast", symbol, get_forecast),
+            structure=lambda: _measured("structure", symbol, get_structure),
+            market_state=market_state,
+            resolved=inputs
+        )
+    if fusion_decision.get("decision") != "entry":
+        print(f"[{symbol}] No entry: {fusion_decision.get('reason')}")
+        return None
+
+    # 3. Guardrails (they re-check the resolved signal inputs under "meta")
+    fusion_decision.setdefault("meta", {name: inputs[name] for name in ("sentiment", "forecast", "structure")})
+    with span("guardrails", symbol):
+        news_context = CALENDAR.news_context(symbol)  # bisect lookup in the shared calendar index
+        allowed, reason = check_guardrails(market_state, fusion_decision, news_context)
+    if not allowed:
         print(f"[{symbol}] Trade blocked: {reason}")
-        return
+        return None
 
-    # 4. Trade execution
     trade = {
         "symbol": symbol,
         "direction": fusion_decision["direction"].upper(),
@@ -34,38 +89,348 @@ def process_symbol(symbol, strategy="default"):
         "sl": fusion_decision["sl"],
         "tp": fusion_decision["tp"]
     }
-    trade_id = send_trade_command(trade)
-    ack = wait_for_ack(trade_id)
+    context = {"strategy": strategy, "inputs": inputs, "market_state": market_state,
+               "fusion_decision": fusion_decision}
+    return trade, context
 
+def journal_trade(trade, context, trade_id, ack):
     # 5. Journal
-    log_trade(
-        trade_context={
-            "symbol": symbol,
-            "strategy": strategy,
-            "fusion_inputs": {
-                "sentiment": sentiment,
-                "forecast": forecast,
-                "structure": structure,
-                "market_state": market_state
-            }
-        },
-        execution_result={
-            "trade_id": trade_id,
-            "ack": ack,
-            "entry_price": market_state["bid"] if fusion_decision["direction"] == "buy" else market_state["ask"]
-        },
-        outcome={"result": "pending"}
-    )
-    print(f"[{symbol}] Trade processed and journaled.")
+    market_state = context["market_state"]
+    with span("journal", trade["symbol"]):
+        log_trade(
+            trade_context={
+                "symbol": trade["symbol"],
+                "strategy": context["strategy"],
+                "fusion_inputs": {
+                    "sentiment": context["inputs"]["sentiment"],
+                    "forecast": context["inputs"]["forecast"],
+                    "structure": context["inputs"]["structure"],
+                    "market_state": market_state
+                }
+            },
+            execution_result={
+                "trade_id": trade_id,
+                "ack": ack,
+                "entry_price": context["fusion_decision"]["entry"]
+            },
+            outcome={"result": "pending"}
+        )
+    print(f"[{trade['symbol']}] Trade processed and journaled.")
+
+def process_symbol(symbol, strategy="default", market_state=None):
+    # Example: run full loop for a symbol, can be extended per strategy
+    refresh_calendar()  # no-op while the shared index is fresh or backing off
+    try:
+        with span("cycle", symbol):
+            planned = evaluate_symbol(symbol, strategy, market_state)
+            if planned is None:
+                return
+            trade, context = planned
+            # 4. Trade execution
+            with span("send", symbol):
+                trade_id = send_trade_command(trade)
+            with span("ack", symbol):
+                ack = wait_for_ack(trade_id)
+            journal_trade(trade, context, trade_id, ack)
+    finally:
+        # most cycles end without a trade: dump on those too
+        METRICS.maybe_dump()
+
+
+class SymbolScheduler:
+    """
+    Long-running multi-symbol loop on one asyncio event loop.
+
+    Every cycle takes one bulk market snapshot and fans out a job per
+    (symbol, strategy) to a fixed pool of MAX_WORKERS async workers. The
+    built-in job (evaluate_symbol) does not vary by strategy yet, so it runs
+    the first strategy only; a custom `process` gets every strategy. Blocking
+    work (MT5, fusion, journaling) is offloaded to a ThreadPoolExecutor of the
+    same size; trade acks are awaited without holding a thread.
+
+    Backpressure: a job still queued when the next snapshot arrives is refreshed
+    in place with the newer market state; a job still running is skipped for
+    that cycle (counted as an overrun); a full queue blocks the producer, which
+    delays the next snapshot instead of growing memory.
+
+    With a ShardCoordinator each cycle covers only the symbols this node holds
+    leases for, and trades are cleared with the portfolio risk leader first.
+    The leader's book entry is released again when the send or ack fails, or
+    when the EA reports the position closed.
+
+    With a PriorityScheduler there is no fixed cycle: each pass takes only the
+    symbols that are due (within its cycles-per-second budget), and every
+    processed symbol is rescheduled from its volatility, news urgency, calendar
+    and open positions.
+    """
+
+    def __init__(self, symbols=None, strategies=None, cycle_seconds=CYCLE_SECONDS,
+                 max_workers=MAX_WORKERS, process=None, analysis_processes=ANALYSIS_PROCESSES,
+                 coordinator=None, priority=None):
+        self.symbols = list(symbols or SYMBOLS)
+        self.coordinator = coordinator
+        self.priority = priority
+        self.strategies = list(strategies or STRATEGIES)
+        if process is None and len(self.strategies) > 1:
+            # identical evaluations per strategy would send duplicate trades
+            logging.warning(f"evaluate_symbol ignores strategy: running {self.strategies[0]!r} only")
+            self.strategies = self.strategies[:1]
+        self.cycle_seconds = cycle_seconds
+        self.max_workers = max_workers
+        self.process = process or self._process_job
+        # CPU-heavy structure/OB/FVG/ATR analysis sharded across processes, off the GIL
+        self.analysis = AnalysisPool(analysis_processes) if analysis_processes > 0 else None
+        self.state = {}       # (symbol, strategy) -> per-job cycle state
+        self.stats = {"cycles": 0, "late_cycles": 0, "jobs": 0, "coalesced": 0, "overruns": 0,
+                      "errors": 0, "missing_data": 0}
+        self._executor = None
+        self._queue = None
+        self._pending = {}    # queued key -> freshest market_state
+        self._open_trades = {}  # trade_id -> symbol of filled trades the EA has not reported closed
+        self._running = set()
+        self._stop = None
+
+    def _job_state(self, key):
+        return self.state.setdefault(key, {"runs": 0, "errors": 0, "overruns": 0, "last_started": None,
+                                           "last_duration": None, "last_result": None})
+
+    async def offload(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _process_job(self, symbol, strategy, market_state):
+        with span("cycle", symbol):
+            planned = await self.offload(evaluate_symbol, symbol, strategy, market_state)
+            if planned is None:
+                return "no_trade"
+            trade, context = planned
+            # the id the risk book registers is the one the EA acks and reports the exit for
+            trade["trade_id"] = new_trade_id(symbol)
+            if self.coordinator is not None:
+                with span("portfolio_risk", symbol):
+                    allowed, reason = await self.coordinator.request_risk_check(
+                        symbol, context["fusion_decision"]["risk_pct"], trade["trade_id"])
+                if not allowed:
+                    print(f"[{symbol}] Trade blocked by portfolio risk: {reason}")
+                    return "risk_blocked"
+            try:
+                with span("send", symbol):
+                    trade_id = await self.offload(send_trade_command, trade)
+                with span("ack", symbol):
+                    ack = await wait_for_ack_async(trade_id)
+            except Exception:
+                await self._release_trade(symbol, trade["trade_id"])
+                raise
+            if ack.get("status") == ACK_FILLED:
+                self._open_trades[trade_id] = symbol
+            else:
+                await self._release_trade(symbol, trade_id)
+            await self.offload(journal_trade, trade, context, trade_id, ack)
+            return "traded"
+
+    async def _release_trade(self, symbol, trade_id):
+        """Forget a trade that failed or closed, and free its slot in the leader's risk book."""
+        self._open_trades.pop(trade_id, None)
+        if self.coordinator is None:
+            return
+        ok, reason = await self.coordinator.request_close(symbol, trade_id)
+        if not ok:
+            logging.warning(f"[{symbol}] Could not release {trade_id} from the risk book: {reason}")
+
+    async def check_exits(self):
+        """Release every open trade the EA has reported closed; returns how many."""
+        closed = 0
+        for trade_id, symbol in list(self._open_trades.items()):
+            report = await self.offload(poll_exit, trade_id)
+            if report is not None:
+                await self._release_trade(symbol, trade_id)
+                closed += 1
+        return closed
+
+    async def _watch_exits(self):
+        while not self._stop.is_set():
+            try:
+                await self.check_exits()
+            except Exception as e:
+                logging.error(f"Exit check failed: {e}", exc_info=True)
+            await self._wait(EXIT_POLL_SECONDS)
+
+    async def _worker(self):
+        while True:
+            key = await self._queue.get()
+            market_state = self._pending.pop(key)
+            self._running.add(key)
+            state = self._job_state(key)
+            state["last_started"] = time.time()
+            try:
+                state["last_result"] = await self.process(key[0], key[1], market_state)
+                state["runs"] += 1
+                self.stats["jobs"] += 1
+            except Exception as e:
+                state["errors"] += 1
+                state["last_result"] = f"error: {e}"
+                self.stats["errors"] += 1
+                logging.error(f"[{key[0]}/{key[1]}] cycle failed: {e}", exc_info=True)
+            finally:
+                state["last_duration"] = time.time() - state["last_started"]
+                self._running.discard(key)
+                self._queue.task_done()
+
+    async def _enqueue(self, key, market_state):
+        if key in self._pending:
+            self._pending[key] = market_state
+            self.stats["coalesced"] += 1
+        elif key in self._running:
+            self._job_state(key)["overruns"] += 1
+            self.stats["overruns"] += 1
+        else:
+            self._pending[key] = market_state
+            await self._queue.put(key)
+
+    def _sync_symbols(self):
+        if self.coordinator is not None:
+            self.symbols = self.coordinator.owned
+            SENTIMENT_INDEX.register(self.symbols)
+        if self.priority is not None:
+            self.priority.remove(set(self.priority.symbols) - set(self.symbols))
+            self.priority.add(self.symbols)
+
+    async def run_cycle(self, symbols=None):
+        """One snapshot and fan-out; returns once every job of the cycle is queued."""
+        if symbols is None:
+            self._sync_symbols()
+            symbols = self.symbols
+        await self.offload(refresh_calendar)
+        with span("snapshot"):
+            snapshot = await self.offload(get_normalized_market_states, symbols)
+        if self.analysis is not None:
+            with span("analysis"):
+                await self.offload(self._analyze, [s for s in symbols if s in snapshot])
+        if self.priority is not None:
+            await self.offload(self._reprioritize, symbols, snapshot)
+        for symbol in symbols:
+            if symbol not in snapshot:
+                self.stats["missing_data"] += 1
+                print(f"[{symbol}] No market data this cycle")
+                continue
+            for strategy in self.strategies:
+                await self._enqueue((symbol, strategy), snapshot[symbol])
+        self.stats["cycles"] += 1
+        await self.offload(METRICS.maybe_dump)
+
+    def _analyze(self, symbols):
+        # the cycle's snapshot just refreshed these rings: read them without another fetch
+        windows = {s: MARKET_DATA.bars(s, "M1", ANALYSIS_BARS, refresh=False) for s in symbols}
+        for symbol, result in self.analysis.analyze(windows).items():
+            if "error" in result:
+                # never trade on the structure of an older cycle
+                STRUCTURES.pop(symbol, None)
+                logging.warning(f"[{symbol}] Structure analysis failed: {result['error']}")
+            else:
+                STRUCTURES[symbol] = structure_from_analysis(result)
+
+    def open_positions(self, symbol):
+        return sum(1 for s in self._open_trades.values() if s == symbol)
+
+    def _reprioritize(self, symbols, snapshot):
+        now = time.time()
+        for symbol in symbols:
+            # bar times are broker server time: back to UTC before comparing with now
+            bar_utc = int(snapshot[symbol]["timestamp"]) - BROKER_UTC_OFFSET_HOURS * 3600 \
+                if symbol in snapshot else None
+            closed = bar_utc is None or now - bar_utc > STALE_BAR_SECONDS
+            if closed:
+                factors = priority_factors(closed=True)
+            else:
+                factors = priority_factors(
+                    closes=MARKET_DATA.bars(symbol, "M1", VOL_LONG + 1, refresh=False)["close"],
+                    urgency=SENTIMENT_INDEX.sentiment(symbol, now)["urgency"],
+                    open_positions=self.open_positions(symbol),
+                    minutes_to_event=CALENDAR.news_context(symbol, now).get("minutes_to_event"))
+            self.priority.reschedule(symbol, factors, now)
+
+    async def _wait(self, seconds):
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=max(0.0, seconds))
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run_prioritized(self, cycles=None):
+        while not self._stop.is_set() and (cycles is None or self.stats["cycles"] < cycles):
+            self._sync_symbols()
+            due = self.priority.due()
+            if due:
+                await self.run_cycle(due)
+                if cycles is not None and self.stats["cycles"] >= cycles:
+                    break
+            wakeup = self.priority.next_wakeup()
+            await self._wait(self.cycle_seconds if wakeup is None else wakeup - time.time())
+
+    async def _run_fixed(self, cycles=None):
+        while not self._stop.is_set() and (cycles is None or self.stats["cycles"] < cycles):
+            started = time.monotonic()
+            await self.run_cycle()
+            remaining = self.cycle_seconds - (time.monotonic() - started)
+            if remaining <= 0:
+                self.stats["late_cycles"] += 1
+                continue
+            if cycles is not None and self.stats["cycles"] >= cycles:
+                break
+            await self._wait(remaining)
+
+    async def run(self, cycles=None):
+        """Run cycles (fixed or prioritized) until stop() or `cycles` passes, then drain."""
+        self._stop = asyncio.Event()
+        self._queue = asyncio.Queue(maxsize=self.max_workers * 2)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="symbol-worker")
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+        workers.append(asyncio.create_task(self._watch_exits()))
+        try:
+            if self.priority is not None:
+                await self._run_prioritized(cycles)
+            else:
+                await self._run_fixed(cycles)
+            await self._queue.join()
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._executor.shutdown(wait=True)
+            if self.analysis is not None:
+                self.analysis.close()
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+
+
+def make_priority():
+    return PriorityScheduler() if SCHEDULING == "priority" else None
 
 def run_all_symbols():
-    threads = []
-    for symbol in SYMBOLS:
-        t = threading.Thread(target=process_symbol, args=(symbol,))
-        t.start()
-        threads.append(t)
-    for t in threads:
-        t.join()
+    # Single pass over the universe (kept for scripts); use SymbolScheduler().run() to run continuously
+    asyncio.run(SymbolScheduler().run(cycles=1))
+
+async def run_distributed(redis_url=None):
+    """One engine replica: lease a fair share of the Redis symbol universe and trade it."""
+    import redis.asyncio as aioredis
+
+    client = aioredis.from_url(redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    coordinator = ShardCoordinator(client)
+    await coordinator.register_symbols(SYMBOLS)
+    await coordinator.heartbeat()
+    stop = asyncio.Event()
+    scheduler = SymbolScheduler(coordinator=coordinator, priority=make_priority())
+    membership = asyncio.create_task(coordinator.run(stop))
+    try:
+        await scheduler.run()
+    finally:
+        stop.set()
+        await membership
 
 if __name__ == "__main__":
-    run_all_symbols()
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    start_stream_ingest(SENTIMENT_INDEX)
+    if ENGINE_MODE == "distributed":
+        asyncio.run(run_distributed())
+    else:
+        asyncio.run(SymbolScheduler(priority=make_priority()).run())
@@ -0,0 +1,190 @@
+"""
+News Sentiment Stream Consumer
+Reads newly scored headlines from the Redis Stream published by news_feed.py,
+using consumer groups so several fusion workers can share the load.
+NewsStreamReader is the broadcast variant (plain XREAD) for readers that each
+need every headline.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+from typing import Callable, List, Tuple
+
+from redis.exceptions import ResponseError
+
+NEWS_STREAM = os.getenv("NEWS_STREAM", "news:sentiments:stream")
+NEWS_STREAM_MAXLEN = 10000          # approximate cap on retained stream entries
+DEFAULT_GROUP = "fusion-workers"
+CLAIM_IDLE_MS = 60_000              # reclaim entries left pending by dead consumers
+RECONNECT_BASE_SECONDS = 1.0        # first retry after a failed read, doubled per failure
+RECONNECT_MAX_SECONDS = 30.0
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _parse(entries) -> List[Tuple[str, dict]]:
+    items = []
+    for entry_id, fields in entries or []:
+        data = {_decode(k): _decode(v) for k, v in (fields or {}).items()}
+        try:
+            item = json.loads(data["data"])
+        except (KeyError, json.JSONDecodeError):
+            logging.warning(f"Skipping malformed news stream entry {entry_id}")
+            continue
+        # Stream ids start with the publish time in ms
+        item.setdefault("published_ms", int(_decode(entry_id).split("-")[0]))
+        items.append((_decode(entry_id), item))
+    return items
+
+
+async def _read_retrying(read, count: int, block_ms: int, stop_event: asyncio.Event = None):
+    """
+    read(count, block_ms) that survives Redis outages: each failure is logged
+    and retried with exponential backoff (the client reconnects on the next
+    command). Returns [] if stop_event is set while waiting.
+    """
+    failures = 0
+    while stop_event is None or not stop_event.is_set():
+        try:
+            return await read(count=count, block_ms=block_ms)
+        except Exception as e:
+            failures += 1
+            delay = min(RECONNECT_MAX_SECONDS, RECONNECT_BASE_SECONDS * 2 ** (failures - 1))
+            logging.error(f"News stream read failed (#{failures}), retrying in {delay:.0f}s: {e}")
+            if stop_event is None:
+                await asyncio.sleep(delay)
+            else:
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+    return []
+
+
+class NewsStreamConsumer:
+    """
+    Consumer-group reader for the news sentiment stream.
+
+    Every entry is delivered to exactly one consumer in the group; entries that
+    a crashed consumer never acknowledged are reclaimed after CLAIM_IDLE_MS.
+    read() only returns new items, so each poll costs O(new items).
+    """
+
+    def __init__(self, redis_client, group: str = DEFAULT_GROUP, consumer: str = None,
+                 stream: str = NEWS_STREAM, claim_idle_ms: int = CLAIM_IDLE_MS):
+        self.redis = redis_client
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.stream = stream
+        self.claim_idle_ms = claim_idle_ms
+        self._group_ready = False
+
+    async def ensure_group(self):
+        if self._group_ready:
+            return
+        try:
+            # "0" so a new group also sees entries published before it existed
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def reclaim(self, count: int = 100) -> List[Tuple[str, dict]]:
+        """Take over entries another consumer left un-acked for longer than claim_idle_ms."""
+        await self.ensure_group()
+        result = await self.redis.xautoclaim(self.stream, self.group, self.consumer,
+                                             min_idle_time=self.claim_idle_ms, count=count)
+        return _parse(result[1] if result else [])
+
+    async def read(self, count: int = 100, block_ms: int = 5000) -> List[Tuple[str, dict]]:
+        """Return up to `count` (entry_id, item) pairs, reclaimed entries first."""
+        await self.ensure_group()
+        items = await self.reclaim(count)
+        if items:
+            return items
+        response = await self.redis.xreadgroup(self.group, self.consumer, {self.stream: ">"},
+                                               count=count, block=block_ms)
+        return _parse(response[0][1] if response else [])
+
+    async def ack(self, entry_ids: List[str]):
+        if entry_ids:
+            await self.redis.xack(self.stream, self.group, *entry_ids)
+
+    async def consume(self, handler: Callable, stop_event: asyncio.Event = None,
+                      count: int = 100, block_ms: int = 5000):
+        """
+        Feed batches of new items to handler(items) until stop_event is set.
+        Entries are acknowledged only after the handler returns without error;
+        Redis errors are retried with backoff rather than ending the loop.
+        """
+        while stop_event is None or not stop_event.is_set():
+            batch = await _read_retrying(self.read, count, block_ms, stop_event)
+            if not batch:
+                continue
+            try:
+                result = handler([item for _, item in batch])
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logging.error(f"News stream handler failed, leaving {len(batch)} entries pending: {e}", exc_info=True)
+                continue
+            await self.ack([entry_id for entry_id, _ in batch])
+
+
+class NewsStreamReader:
+    """
+    Broadcast reader for the news sentiment stream: plain XREAD from a cursor,
+    so every reader sees every entry and leaves no group state in Redis.
+    Starts from `start_id` ("0" replays the retained stream, "$" only new entries).
+    """
+
+    def __init__(self, redis_client, stream: str = NEWS_STREAM, start_id: str = "0"):
+        self.redis = redis_client
+        self.stream = stream
+        self.last_id = start_id
+
+    async def read(self, count: int = 100, block_ms: int = 5000) -> List[Tuple[str, dict]]:
+        response = await self.redis.xread({self.stream: self.last_id}, count=count, block=block_ms)
+        entries = response[0][1] if response else []
+        if entries:
+            self.last_id = _decode(entries[-1][0])
+        return _parse(entries)
+
+    async def consume(self, handler: Callable, stop_event: asyncio.Event = None,
+                      count: int = 100, block_ms: int = 5000):
+        """
+        Feed batches of new items to handler(items) until stop_event is set.
+        Redis errors are retried with backoff from the same cursor, so an outage
+        delays headlines but never drops the reader.
+        """
+        while stop_event is None or not stop_event.is_set():
+            batch = await _read_retrying(self.read, count, block_ms, stop_event)
+            if not batch:
+                continue
+            try:
+                result = handler([item for _, item in batch])
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                # no redelivery without a group: the batch is skipped
+                logging.error(f"News stream handler failed, skipping {len(batch)} entries: {e}", exc_info=True)
+
+
+# Example usage
+if __name__ == "__main__":
+    import redis.asyncio as aioredis
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    async def main():
+        client = aioredis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"), decode_responses=True)
+        consumer = NewsStreamConsumer(client)
+        await consumer.consume(lambda items: [print(i["headline"], i.get("directional_bias")) for i in items])
+
+    asyncio.run(main())
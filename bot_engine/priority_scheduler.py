@@ -0,0 +1,198 @@
+"""
+Priority Symbol Scheduler
+Decides which symbols get a cycle next. Every symbol has its own cycle interval
+derived from how much a fresh decision is worth right now: rising volatility
+(regime_detector), recent high-urgency news, an upcoming high-impact event and
+open positions shorten it; a quiet range or a closed session lengthens it.
+
+Symbols sit in a heap keyed by their next due time. A token bucket caps the
+total number of symbol cycles per second, so when more symbols are due than
+the budget allows the most overdue ones go first and the rest wait for tokens
+instead of piling extra load onto MT5 and the LLM.
+"""
+
+import heapq
+import math
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from bot_engine.regime_detector import detect_regime
+
+BASE_INTERVAL = 60              # seconds between cycles for a symbol with neutral priority
+MIN_INTERVAL = 5                # never more often than this, however hot the symbol
+MAX_INTERVAL = 900              # never less often than this, however quiet
+CLOSED_INTERVAL = 900           # no tick / stale bars: the session is closed
+STALE_BAR_SECONDS = 600         # newest bar older than this counts as a closed session
+CYCLES_PER_SECOND = float(os.getenv("CYCLES_PER_SECOND", "2.0"))   # global symbol-cycle budget
+BURST_SECONDS = 2.0             # budget that may be banked while idle
+
+REGIME_BOOST = {"volatile": 3.0, "trend": 1.5, "normal": 1.0, "range": 0.5, "unknown": 1.0}
+URGENCY_BOOST = {"low": 1.0, "medium": 1.5, "high": 3.0}
+POSITION_BOOST = 2.0            # open trades need their exits watched
+EVENT_BOOST = 2.0               # high-impact event within EVENT_WINDOW_MINUTES
+EVENT_WINDOW_MINUTES = 30
+VOL_SHORT, VOL_LONG = 10, 60    # return windows (bars) for the volatility trend
+BAR_SECONDS = 60                # closes are M1 bars
+MAX_VOL_BOOST = 3.0
+
+
+def volatility_trend(closes) -> float:
+    """Short-window over long-window std of returns; > 1 means volatility is rising."""
+    closes = np.asarray(closes, dtype=np.float64)
+    if len(closes) < VOL_LONG + 1:
+        return 1.0
+    returns = np.diff(closes[-(VOL_LONG + 1):]) / closes[-(VOL_LONG + 1):-1]
+    long_vol = returns.std()
+    if long_vol <= 0:
+        return 1.0
+    return float(returns[-VOL_SHORT:].std() / long_vol)
+
+
+def priority_factors(closes=None, urgency: str = "low", open_positions: int = 0,
+                     minutes_to_event: float = None, closed: bool = False,
+                     bar_seconds: int = BAR_SECONDS) -> dict:
+    """
+    Multiplicative speed-ups for one symbol (1.0 = neutral) and their product
+    under 'priority'. A closed session short-circuits to priority 0.
+    closes are bars of `bar_seconds` (the regime thresholds scale with it).
+    """
+    if closed:
+        return {"closed": True, "priority": 0.0}
+    factors = {}
+    if closes is not None and len(closes):
+        regime = detect_regime(np.asarray(closes, dtype=np.float64), bar_seconds=bar_seconds)
+        factors["regime"] = REGIME_BOOST.get(regime, 1.0)
+        factors["volatility"] = min(MAX_VOL_BOOST, max(1.0, volatility_trend(closes)))
+    factors["news"] = URGENCY_BOOST.get(urgency, 1.0)
+    if open_positions:
+        factors["positions"] = POSITION_BOOST
+    if minutes_to_event is not None and -5 <= minutes_to_event <= EVENT_WINDOW_MINUTES:
+        factors["event"] = EVENT_BOOST
+    factors["priority"] = math.prod(factors.values())
+    return factors
+
+
+def interval_for(priority: float, base: float = BASE_INTERVAL) -> float:
+    if priority <= 0:
+        return CLOSED_INTERVAL
+    return min(MAX_INTERVAL, max(MIN_INTERVAL, base / priority))
+
+
+class PriorityScheduler:
+    """
+    due(now) -> symbols to cycle now (within budget); reschedule(symbol, ...)
+    after each cycle sets the symbol's next due time from its new priority.
+    Not thread-safe: drive it from one thread or one event loop.
+    """
+
+    def __init__(self, symbols: Iterable[str] = (), cycles_per_second: float = CYCLES_PER_SECOND,
+                 base_interval: float = BASE_INTERVAL, burst_seconds: float = BURST_SECONDS,
+                 now: float = None):
+        now = time.time() if now is None else now
+        self.cycles_per_second = cycles_per_second
+        self.base_interval = base_interval
+        self.burst = max(1.0, cycles_per_second * burst_seconds)
+        self._tokens = self.burst
+        self._refilled = now
+        self._heap = []               # (due, seq, symbol); stale entries skipped via _due
+        self._due: Dict[str, float] = {}
+        self._seq = 0
+        self.state: Dict[str, dict] = {}
+        self.stats = {"cycles": 0, "throttled": 0}
+        self.add(symbols, now)
+
+    def _push(self, symbol: str, due: float):
+        self._due[symbol] = due
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, symbol))
+
+    def add(self, symbols: Iterable[str], now: float = None):
+        """New symbols are due immediately; known ones keep their schedule."""
+        now = time.time() if now is None else now
+        for symbol in symbols:
+            if symbol not in self._due:
+                self.state[symbol] = {"priority": 1.0, "interval": self.base_interval, "factors": {}}
+                self._push(symbol, now)
+
+    def remove(self, symbols: Iterable[str]):
+        for symbol in symbols:
+            self._due.pop(symbol, None)
+            self.state.pop(symbol, None)
+
+    @property
+    def symbols(self) -> List[str]:
+        return sorted(self._due)
+
+    def _refill(self, now: float):
+        if now > self._refilled:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.cycles_per_second)
+        self._refilled = max(self._refilled, now)
+
+    def _peek(self) -> Optional[tuple]:
+        while self._heap:
+            due, _, symbol = self._heap[0]
+            if self._due.get(symbol) == due:
+                return due, symbol
+            heapq.heappop(self._heap)   # removed or rescheduled since pushed
+        return None
+
+    def due(self, now: float = None, limit: int = None) -> List[str]:
+        """Pop due symbols, most overdue first, spending one budget token each."""
+        now = time.time() if now is None else now
+        self._refill(now)
+        out = []
+        while limit is None or len(out) < limit:
+            head = self._peek()
+            if head is None or head[0] > now:
+                break
+            if self._tokens < 1:
+                self.stats["throttled"] += 1
+                break
+            heapq.heappop(self._heap)
+            self._tokens -= 1
+            symbol = head[1]
+            # provisional slot so a symbol is not lost if its cycle never reports back
+            self._push(symbol, now + self.state[symbol]["interval"])
+            out.append(symbol)
+        self.stats["cycles"] += len(out)
+        return out
+
+    def next_wakeup(self, now: float = None) -> Optional[float]:
+        """Earliest time due() can return something (next due time or next token)."""
+        now = time.time() if now is None else now
+        head = self._peek()
+        if head is None:
+            return None
+        self._refill(now)
+        token_at = now if self._tokens >= 1 else now + (1 - self._tokens) / self.cycles_per_second
+        return max(head[0], token_at)
+
+    def reschedule(self, symbol: str, factors: dict = None, now: float = None, **signals) -> float:
+        """
+        Set the symbol's next cycle from a priority_factors() dict (or the
+        signals to compute one); returns the new interval.
+        """
+        if symbol not in self._due:
+            return 0.0
+        now = time.time() if now is None else now
+        factors = factors if factors is not None else priority_factors(**signals)
+        interval = interval_for(factors["priority"], self.base_interval)
+        self.state[symbol] = {"priority": factors["priority"], "interval": interval, "factors": factors}
+        self._push(symbol, now + interval)
+        return interval
+
+
+# Example usage
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    calm = 100 + np.cumsum(rng.normal(0, 0.01, 120))
+    waking = np.concatenate([calm[:110], calm[110] + np.cumsum(rng.normal(0, 0.2, 10))])
+    scheduler = PriorityScheduler(["XAUUSD", "EURUSD", "GBPJPY"], cycles_per_second=1.0, now=0)
+    print(scheduler.due(now=0))
+    print(scheduler.reschedule("XAUUSD", closes=waking, urgency="high", now=0))
+    print(scheduler.reschedule("EURUSD", closes=calm, now=0))
+    print(scheduler.reschedule("GBPJPY", closed=True, now=0))
+    print(scheduler.state)
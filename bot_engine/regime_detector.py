@@ -1,10 +1,14 @@
 import numpy as np
 
-def detect_regime(prices, window=50):
+DAY_SECONDS = 86400
+
+def detect_regime(prices, window=50, bar_seconds=DAY_SECONDS):
     """
     Detects market regime: 'trend', 'range', 'volatile', or 'news'
     - prices: list or np.array of recent close prices
     - window: lookback for stats
+    - bar_seconds: bar length of `prices`; the thresholds are per daily bar and
+      shrink with sqrt(time) for shorter bars (M1 noise is not a quiet range)
     Returns: regime string
     """
     if len(prices) < window:
@@ -12,12 +16,13 @@ def detect_regime(prices, window=50):
     returns = np.diff(prices[-window:]) / prices[-window:-1]
     volatility = np.std(returns)
     mean_return = np.mean(returns)
+    scale = np.sqrt(bar_seconds / DAY_SECONDS)
     # Simple heuristics
-    if volatility > 0.02:
+    if volatility > 0.02 * scale:
         return "volatile"
-    if abs(mean_return) > 0.004:
+    if abs(mean_return) > 0.004 * scale:
         return "trend"
-    if volatility < 0.007:
+    if volatility < 0.007 * scale:
         return "range"
     # Optionally, check for external news regime flag
     return "normal"
@@ -2,8 +2,13 @@ def check_guardrails(market_state, fusion_decision, news_context):
     """
     Returns (bool, reason): Should trading proceed?
     """
-    # 1. Hard block on high-impact news
-    if news_context.get("impact") == "high" and abs(news_context.get("minutes_to_event", 999)) < 15:
+    # 1. Hard block inside a news blackout (news_context from economic_calendar.CalendarIndex;
+    #    its BLACKOUT_MINUTES windows cover high-impact events +/- 15 min)
+    if news_context.get("blackout"):
+        return False, f"News blackout: {news_context['blackout']['title']}"
+    #    older callers pass only the nearest event's impact and distance
+    if "blackout" not in news_context and news_context.get("impact") == "high" \
+            and abs(news_context.get("minutes_to_event", 999)) < 15:
         return False, "High-impact news window"
 
     # 2. Spread spike
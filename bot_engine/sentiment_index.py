@@ -0,0 +1,229 @@
+"""
+Per-Symbol Decayed Sentiment Index
+Maps scored headlines to the symbols they affect through a keyword -> currency
+inverted index and keeps an exponentially time-decayed sentiment score and
+urgency per symbol, so fusion reads the current value in O(1).
+
+The score is weighted bias / (weight + PRIOR_WEIGHT). With PRIOR_WEIGHT = 0.2
+one fresh headline scores bias / 1.2, so a lone headline needs |bias| >= 0.78
+to clear fusion's 0.65 entry threshold; weaker news needs corroboration.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List
+
+from bot_engine.economic_calendar import symbol_currencies
+
+SENTIMENT_HALF_LIFE = 1800          # seconds for a headline's weight to halve
+URGENCY_HALF_LIFE = 900             # seconds for urgency to fall one half-level
+PRIOR_WEIGHT = 0.2                  # pseudo-weight of "no news": shrinks thin evidence toward 0
+URGENCY_RANK = {"low": 0, "medium": 1, "high": 2}
+
+# keyword -> currency; headlines are matched on lowercase word tokens
+CURRENCY_KEYWORDS = {
+    "USD": ["usd", "dollar", "greenback", "fed", "fomc", "powell", "treasury", "treasuries",
+            "payrolls", "nfp", "us"],
+    "EUR": ["eur", "euro", "eurozone", "ecb", "lagarde", "bund", "bunds"],
+    "GBP": ["gbp", "sterling", "pound", "cable", "boe", "bailey", "gilts", "uk", "britain"],
+    "JPY": ["jpy", "yen", "boj", "ueda", "japan", "jgb", "jgbs"],
+    "CHF": ["chf", "franc", "snb", "swiss"],
+    "AUD": ["aud", "aussie", "rba", "australia"],
+    "NZD": ["nzd", "kiwi", "rbnz", "zealand"],
+    "CAD": ["cad", "loonie", "boc", "canada"],
+    "XAU": ["xau", "gold", "bullion"],
+}
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+
+class _DecayedSentiment:
+    """Decayed weighted sum of signed bias plus a decayed max urgency rank."""
+
+    __slots__ = ("weighted", "weight", "urgency", "updated", "headlines")
+
+    def __init__(self):
+        self.weighted = 0.0
+        self.weight = 0.0
+        self.urgency = 0.0
+        self.updated = None
+        self.headlines = 0
+
+    def decayed(self, t: float):
+        """(weighted, weight, urgency) decayed to time t without mutating state."""
+        if self.updated is None or t <= self.updated:
+            return self.weighted, self.weight, self.urgency
+        dt = t - self.updated
+        k = 0.5 ** (dt / SENTIMENT_HALF_LIFE)
+        return self.weighted * k, self.weight * k, max(0.0, self.urgency - dt / URGENCY_HALF_LIFE * 0.5)
+
+    def add(self, bias: float, urgency_rank: int, t: float):
+        if self.updated is None or t >= self.updated:
+            self.weighted, self.weight, self.urgency = self.decayed(t)
+            self.updated = t
+            weight, urgency = 1.0, float(urgency_rank)
+        else:
+            # late arrival: discount the headline to the current reference time instead
+            age = self.updated - t
+            weight = 0.5 ** (age / SENTIMENT_HALF_LIFE)
+            urgency = urgency_rank - age / URGENCY_HALF_LIFE * 0.5
+        self.weighted += weight * bias
+        self.weight += weight
+        self.urgency = max(self.urgency, urgency)
+        self.headlines += 1
+
+
+class SymbolSentimentIndex:
+    """
+    Incremental headline -> symbol sentiment aggregator.
+
+    A headline naming a pair ("EUR/USD", "eurusd") updates that symbol directly.
+    Otherwise each matched currency updates every registered symbol containing it,
+    with the bias flipped when the currency is the quote side; a headline hitting
+    both sides of a symbol is ambiguous for it and skipped. ingest() costs
+    O(tokens + matched symbols); sentiment() is O(1).
+    """
+
+    def __init__(self, symbols: Iterable[str] = (), keywords: Dict[str, List[str]] = None):
+        self._keyword_index: Dict[str, str] = {}
+        for currency, words in (keywords or CURRENCY_KEYWORDS).items():
+            for word in words:
+                for token in _TOKEN_RE.findall(word.lower()):
+                    self._keyword_index[token] = currency
+        self._currency_symbols: Dict[str, List[tuple]] = {}
+        self._pairs: Dict[str, str] = {}
+        self._state: Dict[str, _DecayedSentiment] = {}
+        self._lock = threading.Lock()
+        self.stats = {"headlines": 0, "matched": 0, "updates": 0, "skipped_duplicates": 0}
+        self.register(symbols)
+
+    def register(self, symbols: Iterable[str]):
+        """Add symbols to the index; only headlines ingested afterwards reach them."""
+        with self._lock:
+            for symbol in symbols:
+                if symbol in self._state:
+                    continue
+                currencies = symbol_currencies(symbol)
+                self._state[symbol] = _DecayedSentiment()
+                self._pairs["".join(currencies).lower()] = symbol
+                for sign, currency in zip((1, -1), currencies):
+                    self._currency_symbols.setdefault(currency, []).append((symbol, sign))
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._state)
+
+    def match(self, headline: str) -> Dict[str, int]:
+        """symbol -> +1/-1: how a positive directional_bias in the headline moves the symbol."""
+        tokens = _TOKEN_RE.findall(headline.lower())
+        pairs = {}
+        for i, token in enumerate(tokens):
+            symbol = self._pairs.get(token)
+            if symbol is None and i + 1 < len(tokens):
+                symbol = self._pairs.get(token + tokens[i + 1])
+            if symbol is not None:
+                pairs[symbol] = 1
+        if pairs:
+            return pairs
+
+        signs: Dict[str, int] = {}
+        for currency in {self._keyword_index[t] for t in tokens if t in self._keyword_index}:
+            for symbol, sign in self._currency_symbols.get(currency, ()):
+                signs[symbol] = signs.get(symbol, 0) + sign
+        return {symbol: sign for symbol, sign in signs.items() if sign}
+
+    def ingest(self, items: List[dict], now: float = None) -> int:
+        """
+        Fold scored headlines ({"headline", "directional_bias", "urgency",
+        "published_ms"?}) into the index. Near-duplicates tagged "duplicate_of"
+        by news_feed are skipped so one story counts once. Returns symbol updates.
+        """
+        now = time.time() if now is None else now
+        updates = 0
+        with self._lock:
+            for item in items:
+                self.stats["headlines"] += 1
+                if item.get("duplicate_of"):
+                    self.stats["skipped_duplicates"] += 1
+                    continue
+                matches = self.match(item.get("headline", ""))
+                if not matches:
+                    continue
+                self.stats["matched"] += 1
+                t = item["published_ms"] / 1000.0 if item.get("published_ms") else now
+                bias = float(item.get("directional_bias", 0.0))
+                urgency = URGENCY_RANK.get(item.get("urgency", "low"), 0)
+                for symbol, sign in matches.items():
+                    self._state[symbol].add(sign * bias, urgency, t)
+                    updates += 1
+        self.stats["updates"] += updates
+        return updates
+
+    def sentiment(self, symbol: str, now: float = None) -> dict:
+        """Current fusion sentiment input: {'score', 'urgency', 'direction'} (+ diagnostics)."""
+        now = time.time() if now is None else now
+        state = self._state.get(symbol)
+        if state is None:
+            weighted, weight, urgency, headlines = 0.0, 0.0, 0.0, 0
+        else:
+            with self._lock:
+                weighted, weight, urgency = state.decayed(now)
+                headlines = state.headlines
+        score = round(weighted / (weight + PRIOR_WEIGHT), 3)
+        level = min(2, int(math.floor(urgency + 0.5)))
+        return {
+            "score": score,
+            "urgency": ("low", "medium", "high")[level],
+            "direction": "bullish" if score > 0 else "bearish" if score < 0 else "neutral",
+            "weight": round(weight, 3),
+            "headlines": headlines,
+        }
+
+
+def start_stream_ingest(index: SymbolSentimentIndex, redis_url: str = None,
+                        start_id: str = "0") -> threading.Thread:
+    """
+    Feed the index from the news sentiment stream on a daemon thread.
+    Every process needs every headline, so this reads with plain XREAD rather
+    than a consumer group (a shared group would split headlines between
+    processes; a group per process would leak groups on every restart).
+    The retained stream is replayed first; decay discounts old headlines.
+    """
+    import redis.asyncio as aioredis
+    from bot_engine.news_stream_consumer import NewsStreamReader
+
+    redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+    async def consume():
+        client = aioredis.from_url(redis_url, decode_responses=True)
+        await NewsStreamReader(client, start_id=start_id).consume(index.ingest)
+
+    def run():
+        try:
+            asyncio.run(consume())
+        except Exception as e:
+            logging.error(f"Sentiment index stream ingest stopped: {e}", exc_info=True)
+
+    thread = threading.Thread(target=run, name="sentiment-index-ingest", daemon=True)
+    thread.start()
+    return thread
+
+
+# Example usage
+if __name__ == "__main__":
+    index = SymbolSentimentIndex(["EURUSD", "XAUUSD", "GBPJPY"])
+    now = time.time()
+    index.ingest([
+        {"headline": "ECB signals more hikes as eurozone inflation sticks", "directional_bias": 0.7, "urgency": "medium"},
+        {"headline": "Fed's Powell says rate cuts are not imminent", "directional_bias": 0.6, "urgency": "high"},
+        {"headline": "Gold slumps as yields climb", "directional_bias": -0.7, "urgency": "medium"},
+        {"headline": "EUR/USD edges higher in quiet trade", "directional_bias": 0.2, "urgency": "low"},
+    ], now=now)
+    for sym in index.symbols:
+        print(sym, index.sentiment(sym, now=now), "| 1h later:", index.sentiment(sym, now=now + 3600))
+    print(index.stats)
@@ -0,0 +1,297 @@
+"""
+Distributed Symbol Sharding
+Engine replicas share one symbol universe through Redis: every symbol is a
+work item with a lease key owned by one node, nodes heartbeat to renew their
+leases, and each node claims a fair share (ceil(symbols / live nodes)). When a
+node joins, the others shed their excess; when one dies, its leases expire and
+the survivors pick them up.
+
+One node holds a leader lease and serves portfolio-level risk checks
+(portfolio_risk_manager) for all replicas over a Redis request/reply queue.
+The open-trade book lives in Redis so a new leader resumes where the old one
+stopped. Every request carries the time its caller stops waiting; the leader
+drops risk checks that arrive after it, since the caller has already given up
+and will never trade (or close) against them.
+
+Keys (prefix "engine" by default):
+    <p>:symbols            SET   universe
+    <p>:nodes              ZSET  node -> last heartbeat (ms)
+    <p>:lease:<symbol>     STR   owning node, PX lease_ms
+    <p>:leader             STR   leader node, PX lease_ms
+    <p>:risk:requests      LIST  risk check requests
+    <p>:risk:reply:<id>    LIST  reply for one request
+    <p>:risk:active        STR   JSON open-trade book
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import socket
+import time
+import uuid
+from typing import List, Optional, Set
+
+from redis.exceptions import WatchError
+
+from bot_engine import portfolio_risk_manager
+
+SHARD_PREFIX = os.getenv("SHARD_PREFIX", "engine")
+HEARTBEAT_SECONDS = 2.0
+LEASE_MS = 6000                 # a lease survives two missed heartbeats
+RISK_REPLY_TIMEOUT = 5          # seconds a replica waits for the leader's answer
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class ShardCoordinator:
+    def __init__(self, redis_client, node_id: str = None, prefix: str = SHARD_PREFIX,
+                 heartbeat_seconds: float = HEARTBEAT_SECONDS, lease_ms: int = LEASE_MS):
+        self.redis = redis_client
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.prefix = prefix
+        self.heartbeat_seconds = heartbeat_seconds
+        self.lease_ms = lease_ms
+        self.is_leader = False
+        self.stats = {"heartbeats": 0, "claimed": 0, "released": 0, "lost": 0,
+                      "risk_checks": 0, "expired": 0, "leader_changes": 0}
+        self._owned: Set[str] = set()
+
+    # ── keys ─────────────────────────────────────────────────────────────────
+    def _key(self, *parts) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    def _lease(self, symbol: str) -> str:
+        return self._key("lease", symbol)
+
+    @property
+    def owned(self) -> List[str]:
+        return sorted(self._owned)
+
+    async def register_symbols(self, symbols):
+        if symbols:
+            await self.redis.sadd(self._key("symbols"), *symbols)
+
+    async def unregister_symbols(self, symbols):
+        if symbols:
+            await self.redis.srem(self._key("symbols"), *symbols)
+
+    # ── compare-and-set helpers (WATCH/MULTI, no Lua needed) ─────────────────
+    async def _renew_if_mine(self, keys: List[str]) -> Set[str]:
+        """Extend the TTL of every key still owned by this node; returns those keys."""
+        if not keys:
+            return set()
+        for _ in range(3):
+            try:
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    await pipe.watch(*keys)
+                    owners = await pipe.mget(keys)
+                    mine = [k for k, owner in zip(keys, owners) if _decode(owner) == self.node_id]
+                    pipe.multi()
+                    for key in mine:
+                        pipe.pexpire(key, self.lease_ms)
+                    await pipe.execute()
+                    return set(mine)
+            except WatchError:
+                continue
+        return set()
+
+    async def _delete_if_mine(self, keys: List[str]) -> int:
+        if not keys:
+            return 0
+        for _ in range(3):
+            try:
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    await pipe.watch(*keys)
+                    owners = await pipe.mget(keys)
+                    mine = [k for k, owner in zip(keys, owners) if _decode(owner) == self.node_id]
+                    pipe.multi()
+                    for key in mine:
+                        pipe.delete(key)
+                    await pipe.execute()
+                    return len(mine)
+            except WatchError:
+                continue
+        return 0
+
+    # ── membership and leases ────────────────────────────────────────────────
+    async def _live_nodes(self) -> int:
+        now_ms = int(time.time() * 1000)
+        nodes = self._key("nodes")
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(nodes, {self.node_id: now_ms})
+            pipe.zremrangebyscore(nodes, "-inf", now_ms - self.lease_ms)
+            pipe.zcard(nodes)
+            _, _, count = await pipe.execute()
+        return max(1, count)
+
+    async def heartbeat(self) -> dict:
+        """
+        One membership round: renew leases, shed or claim symbols toward the fair
+        share, and renew or contest leadership. Returns what changed.
+        """
+        self.stats["heartbeats"] += 1
+        live = await self._live_nodes()
+        symbols = sorted(_decode(s) for s in await self.redis.smembers(self._key("symbols")))
+        target = math.ceil(len(symbols) / live) if symbols else 0
+
+        # 1. renew (and notice leases lost to expiry or removal from the universe)
+        universe = set(symbols)
+        renewed = await self._renew_if_mine([self._lease(s) for s in sorted(self._owned)])
+        still = {s for s in self._owned if self._lease(s) in renewed and s in universe}
+        lost = self._owned - still
+        self.stats["lost"] += len(lost)
+        self._owned = still
+
+        # 2. shed the excess when nodes joined
+        released = []
+        if len(self._owned) > target:
+            released = sorted(self._owned)[target:]
+            await self._delete_if_mine([self._lease(s) for s in released])
+            self._owned -= set(released)
+            self.stats["released"] += len(released)
+
+        # 3. claim free symbols up to the fair share
+        acquired = []
+        deficit = target - len(self._owned)
+        if deficit > 0:
+            owners = await self.redis.mget([self._lease(s) for s in symbols])
+            free = [s for s, owner in zip(symbols, owners) if owner is None]
+            if free:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for symbol in free[:deficit]:
+                        pipe.set(self._lease(symbol), self.node_id, nx=True, px=self.lease_ms)
+                    results = await pipe.execute()
+                acquired = [s for s, ok in zip(free[:deficit], results) if ok]
+                self._owned |= set(acquired)
+                self.stats["claimed"] += len(acquired)
+
+        await self._elect()
+        return {"live_nodes": live, "target": target, "acquired": acquired,
+                "released": released, "lost": sorted(lost), "leader": self.is_leader}
+
+    async def _elect(self):
+        leader_key = self._key("leader")
+        was_leader = self.is_leader
+        if await self.redis.set(leader_key, self.node_id, nx=True, px=self.lease_ms):
+            self.is_leader = True
+        else:
+            self.is_leader = bool(await self._renew_if_mine([leader_key]))
+        if self.is_leader and not was_leader:
+            self.stats["leader_changes"] += 1
+            await self._load_risk_book()
+            logging.info(f"[{self.node_id}] became portfolio risk leader")
+
+    async def release_all(self):
+        """Graceful leave: hand back every lease and the leadership immediately."""
+        keys = [self._lease(s) for s in self._owned] + [self._key("leader")]
+        await self._delete_if_mine(keys)
+        await self.redis.zrem(self._key("nodes"), self.node_id)
+        self.stats["released"] += len(self._owned)
+        self._owned = set()
+        self.is_leader = False
+
+    # ── portfolio risk (leader-served) ───────────────────────────────────────
+    async def _load_risk_book(self):
+        raw = await self.redis.get(self._key("risk", "active"))
+        portfolio_risk_manager.active_trades.clear()
+        if raw:
+            portfolio_risk_manager.active_trades.update(json.loads(_decode(raw)))
+
+    async def _save_risk_book(self):
+        await self.redis.set(self._key("risk", "active"), json.dumps(portfolio_risk_manager.active_trades))
+
+    async def request_risk_check(self, symbol: str, risk_pct: float, trade_id: str = None,
+                                 timeout: float = RISK_REPLY_TIMEOUT):
+        """Ask the leader whether a trade fits the portfolio limits; returns (bool, reason)."""
+        return await self._request({"op": "check", "symbol": symbol, "risk_pct": risk_pct,
+                                    "trade_id": trade_id or uuid.uuid4().hex}, timeout)
+
+    async def request_close(self, symbol: str, trade_id: str, timeout: float = RISK_REPLY_TIMEOUT):
+        return await self._request({"op": "close", "symbol": symbol, "trade_id": trade_id}, timeout)
+
+    async def _request(self, payload: dict, timeout: float):
+        request_id = uuid.uuid4().hex
+        reply_key = self._key("risk", "reply", request_id)
+        await self.redis.rpush(self._key("risk", "requests"),
+                               json.dumps({**payload, "id": request_id, "node": self.node_id,
+                                           "expires_at": time.time() + timeout}))
+        reply = await self.redis.blpop([reply_key], timeout=timeout)
+        if reply is None:
+            return False, "No portfolio risk leader"
+        ok, reason = json.loads(_decode(reply[1]))
+        return ok, reason
+
+    async def serve_risk_checks(self, timeout: float = 1.0) -> int:
+        """Leader only: answer queued risk requests; returns how many were handled."""
+        handled = 0
+        while self.is_leader:
+            item = await self.redis.blpop([self._key("risk", "requests")], timeout=timeout if not handled else 0.01)
+            if item is None:
+                break
+            request = json.loads(_decode(item[1]))
+            if request["op"] == "check" and time.time() > request.get("expires_at", math.inf):
+                # the replica timed out and reported risk_blocked: registering would leak the slot
+                self.stats["expired"] += 1
+                ok, reason = False, "Risk check expired"
+            elif request["op"] == "check":
+                ok, reason = portfolio_risk_manager.can_enter_trade(request["symbol"], request["risk_pct"])
+                if ok:
+                    portfolio_risk_manager.register_trade(request["symbol"], request["trade_id"], request["risk_pct"])
+            else:
+                portfolio_risk_manager.close_trade(request["symbol"], request["trade_id"])
+                ok, reason = True, "Closed"
+            await self._save_risk_book()
+            reply_key = self._key("risk", "reply", request["id"])
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.rpush(reply_key, json.dumps([ok, reason]))
+                pipe.expire(reply_key, 60)
+                await pipe.execute()
+            handled += 1
+            self.stats["risk_checks"] += 1
+        return handled
+
+    # ── main loop ────────────────────────────────────────────────────────────
+    async def run(self, stop_event: asyncio.Event = None):
+        """Heartbeat (and serve risk checks while leader) until stop_event, then leave."""
+        stop_event = stop_event or asyncio.Event()
+        try:
+            while not stop_event.is_set():
+                started = time.monotonic()
+                try:
+                    changes = await self.heartbeat()
+                    if changes["acquired"] or changes["released"] or changes["lost"]:
+                        logging.info(f"[{self.node_id}] shard change: {changes}")
+                except Exception as e:
+                    logging.error(f"[{self.node_id}] heartbeat failed: {e}", exc_info=True)
+                while not stop_event.is_set():
+                    remaining = self.heartbeat_seconds - (time.monotonic() - started)
+                    if remaining <= 0:
+                        break
+                    if self.is_leader:
+                        await self.serve_risk_checks(timeout=min(remaining, 1.0))
+                    else:
+                        try:
+                            await asyncio.wait_for(stop_event.wait(), timeout=remaining)
+                        except asyncio.TimeoutError:
+                            pass
+        finally:
+            await self.release_all()
+
+
+# Example usage
+if __name__ == "__main__":
+    import redis.asyncio as aioredis
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    async def main():
+        client = aioredis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        coordinator = ShardCoordinator(client)
+        await coordinator.register_symbols(["XAUUSD", "EURUSD", "GBPJPY"])
+        await coordinator.run()
+
+    asyncio.run(main())
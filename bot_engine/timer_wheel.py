@@ -0,0 +1,243 @@
+"""
+Bar-Close Timer Wheel
+Hierarchical timing wheel (Varghese & Lauck, as in the Linux kernel timers)
+that fires per-(symbol, timeframe) jobs at bar boundaries instead of polling.
+
+Time is cut into ticks of `resolution` seconds. Level 0 holds one slot per tick
+for the next SLOTS ticks, level 1 one slot per SLOTS ticks, and so on; a timer
+lives in the coarsest slot that still separates it from "now" and cascades
+down as its deadline approaches. Scheduling, cancelling and advancing one tick
+cost O(1) no matter how many timers exist, and the driver sleeps straight to
+the next occupied slot (at most SLOTS slots are looked at per wakeup).
+
+Deadlines are absolute (bar boundary + offset) and each periodic job is
+re-armed from its previous boundary, never from "now", so nothing drifts.
+Jobs whose boundaries coincide (M1, M5, M15 and H1 at the top of the hour)
+fire as one batch.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+RESOLUTION = 0.1                # seconds per tick
+SLOT_BITS = 6                   # 64 slots per level
+LEVELS = 4                      # horizon: 64**4 ticks (~19 days at 0.1s)
+SLOTS = 1 << SLOT_BITS
+SLOT_MASK = SLOTS - 1
+
+TIMEFRAME_SECONDS = {"M1": 60, "M2": 120, "M3": 180, "M5": 300, "M10": 600, "M15": 900, "M30": 1800,
+                     "H1": 3600, "H2": 7200, "H4": 14400, "H6": 21600, "H12": 43200, "D1": 86400,
+                     "W1": 604800}
+BAR_CLOSE_OFFSET = float(os.getenv("BAR_CLOSE_OFFSET", "1.0"))   # seconds after the boundary
+# broker server time vs UTC: H4/D1 bars open on the broker's clock, not UTC's
+BROKER_UTC_OFFSET_HOURS = float(os.getenv("BROKER_UTC_OFFSET_HOURS", "0"))
+W1_SHIFT = 4 * 86400           # MT5 W1 bars open on Sunday (epoch day 3) at 00:00 server time
+
+
+class Timer:
+    __slots__ = ("expires", "deadline", "payload", "cancelled")
+
+    def __init__(self, expires: int, deadline: float, payload):
+        self.expires = expires
+        self.deadline = deadline
+        self.payload = payload
+        self.cancelled = False
+
+
+class TimerWheel:
+    """Hierarchical wheel of one-shot timers; advance(now) returns the expired ones."""
+
+    def __init__(self, resolution: float = RESOLUTION, levels: int = LEVELS, now: float = None):
+        now = time.time() if now is None else now
+        self.resolution = resolution
+        self.levels = levels
+        self._wheels = [[[] for _ in range(SLOTS)] for _ in range(levels)]
+        self._tick = math.floor(now / resolution)
+        self._count = 0
+        self._level0 = 0            # entries (live or cancelled) sitting in level 0
+        self.stats = {"scheduled": 0, "fired": 0, "cancelled": 0, "cascaded": 0}
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def horizon(self) -> float:
+        return (1 << (SLOT_BITS * self.levels)) * self.resolution
+
+    def _place(self, timer: Timer):
+        expires = max(timer.expires, self._tick)    # overdue timers go in the current slot
+        delta = expires - self._tick
+        for level in range(self.levels):
+            if delta < 1 << (SLOT_BITS * (level + 1)):
+                self._wheels[level][(expires >> (SLOT_BITS * level)) & SLOT_MASK].append(timer)
+                self._level0 += not level
+                return
+        raise ValueError(f"Deadline beyond the wheel horizon ({self.horizon:.0f}s)")
+
+    def schedule(self, deadline: float, payload=None) -> Timer:
+        """One-shot timer at absolute time `deadline` (never fires early)."""
+        timer = Timer(math.ceil(round(deadline / self.resolution, 9)), deadline, payload)
+        self._place(timer)
+        self._count += 1
+        self.stats["scheduled"] += 1
+        return timer
+
+    def cancel(self, timer: Timer):
+        if not timer.cancelled:
+            timer.cancelled = True
+            self._count -= 1
+            self.stats["cancelled"] += 1
+
+    def _cascade(self, level: int):
+        slot = self._wheels[level][(self._tick >> (SLOT_BITS * level)) & SLOT_MASK]
+        timers, slot[:] = slot[:], []
+        for timer in timers:
+            if not timer.cancelled:
+                self._place(timer)
+                self.stats["cascaded"] += 1
+
+    def _collect(self, fired: List[Timer]):
+        slot = self._wheels[0][self._tick & SLOT_MASK]
+        fired.extend(t for t in slot if not t.cancelled)
+        self._level0 -= len(slot)
+        slot.clear()
+
+    def _step(self, fired: List[Timer]):
+        self._tick += 1
+        # when a lower level wraps, pull the next slot of the level above down into it
+        for level in range(1, self.levels):
+            if self._tick & ((1 << (SLOT_BITS * level)) - 1):
+                break
+            self._cascade(level)
+        self._collect(fired)
+
+    def advance(self, now: float = None) -> List[Timer]:
+        """Move to `now`; returns the timers that expired, in deadline order."""
+        now = time.time() if now is None else now
+        target = math.floor(now / self.resolution)
+        fired = []
+        self._collect(fired)        # scheduled already overdue since the last advance
+        while self._tick < target:
+            if len(fired) >= self._count:
+                self._tick = target     # nothing pending: jump instead of ticking through idle time
+                break
+            if not self._level0:
+                # level 0 empty: skip straight to the tick before the next cascade point
+                self._tick = max(self._tick, min(target, (self._tick | SLOT_MASK) + 1) - 1)
+            self._step(fired)
+        self._count -= len(fired)
+        self.stats["fired"] += len(fired)
+        fired.sort(key=lambda t: t.deadline)
+        return fired
+
+    def next_wakeup(self) -> Optional[float]:
+        """
+        Time of the next occupied level-0 tick, or of the next cascade point when
+        level 0 is empty until then; None when no timers are pending.
+        """
+        if not self._count:
+            return None
+        for ahead in range(0, SLOTS + 1):
+            tick = self._tick + ahead
+            if self._wheels[0][tick & SLOT_MASK] or (ahead and not tick & SLOT_MASK):
+                return tick * self.resolution
+        return (self._tick + SLOTS) * self.resolution
+
+
+def bar_close(t: float, timeframe: str, utc_offset_hours: float = BROKER_UTC_OFFSET_HOURS) -> float:
+    """The first bar boundary of `timeframe` strictly after t (epoch seconds)."""
+    period = TIMEFRAME_SECONDS[timeframe]
+    shift = utc_offset_hours * 3600 if period > 3600 else 0.0
+    if timeframe == "W1":
+        shift += W1_SHIFT
+    return (math.floor((t + shift) / period) + 1) * period - shift
+
+
+class BarCloseScheduler:
+    """
+    Periodic jobs per (symbol, timeframe) on a TimerWheel. The handler gets
+    (bar_close_time, [(symbol, timeframe), ...]) once per distinct deadline, so
+    everything closing together is handled together.
+    """
+
+    def __init__(self, wheel: TimerWheel = None, offset: float = BAR_CLOSE_OFFSET,
+                 utc_offset_hours: float = BROKER_UTC_OFFSET_HOURS):
+        self.wheel = wheel if wheel is not None else TimerWheel()
+        self.offset = offset
+        self.utc_offset_hours = utc_offset_hours
+        self._jobs: Dict[Tuple[str, str], Timer] = {}
+        self._offsets: Dict[Tuple[str, str], float] = {}
+        self._stop = threading.Event()
+        self.stats = {"batches": 0, "jobs": 0, "missed_bars": 0, "max_lateness": 0.0}
+
+    @property
+    def jobs(self) -> List[Tuple[str, str]]:
+        return sorted(self._jobs)
+
+    def _arm(self, key: Tuple[str, str], boundary: float):
+        self._jobs[key] = self.wheel.schedule(boundary + self._offsets[key], (key, boundary))
+
+    def add_job(self, symbol: str, timeframe: str, offset: float = None, now: float = None):
+        if timeframe not in TIMEFRAME_SECONDS:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        key = (symbol, timeframe)
+        if key in self._jobs:
+            return
+        now = time.time() if now is None else now
+        self._offsets[key] = self.offset if offset is None else offset
+        self._arm(key, bar_close(now - self._offsets[key], timeframe, self.utc_offset_hours))
+
+    def remove_job(self, symbol: str, timeframe: str):
+        timer = self._jobs.pop((symbol, timeframe), None)
+        if timer is not None:
+            self.wheel.cancel(timer)
+            self._offsets.pop((symbol, timeframe), None)
+
+    def poll(self, now: float = None) -> List[Tuple[float, List[Tuple[str, str]]]]:
+        """Fire what is due at `now`, re-arm it for its next boundary; returns the batches."""
+        now = time.time() if now is None else now
+        batches = defaultdict(list)
+        for timer in self.wheel.advance(now):
+            key, boundary = timer.payload
+            self.stats["max_lateness"] = max(self.stats["max_lateness"], now - timer.deadline)
+            batches[boundary].append(key)
+            period = TIMEFRAME_SECONDS[key[1]]
+            following = boundary + period
+            if following + self._offsets[key] <= now:
+                # fell behind by whole bars (suspend, long handler): skip to the next future one
+                following = bar_close(now - self._offsets[key], key[1], self.utc_offset_hours)
+                self.stats["missed_bars"] += round((following - boundary) / period) - 1
+            self._arm(key, following)
+        self.stats["batches"] += len(batches)
+        self.stats["jobs"] += sum(len(keys) for keys in batches.values())
+        return sorted(batches.items())
+
+    def run(self, handler: Callable[[float, List[Tuple[str, str]]], None]):
+        """Sleep until each next deadline and call handler per batch until stop()."""
+        self._stop.clear()
+        while not self._stop.is_set():
+            for boundary, keys in self.poll():
+                try:
+                    handler(boundary, keys)
+                except Exception as e:
+                    logging.error(f"Bar-close batch {boundary} failed: {e}", exc_info=True)
+            wakeup = self.wheel.next_wakeup()
+            self._stop.wait(1.0 if wakeup is None else max(0.0, wakeup - time.time()))
+
+    def stop(self):
+        self._stop.set()
+
+
+# Example usage
+if __name__ == "__main__":
+    scheduler = BarCloseScheduler(offset=0.5)
+    for symbol in ("XAUUSD", "EURUSD"):
+        for timeframe in ("M1", "M5"):
+            scheduler.add_job(symbol, timeframe)
+    scheduler.run(lambda boundary, keys: print(f"{time.time() - boundary:+.3f}s", time.strftime(
+        "%H:%M:%S", time.gmtime(boundary)), keys))
@@ -1,16 +1,17 @@
 # journal/llm_batch_audit.py
 import os
 import json
-import requests
 from dotenv import load_dotenv
 from datetime import datetime
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from journal.llm_cache import get_llm_cache
+from llm_gateway import chat_sync, LLMError
+
 load_dotenv()
 
 JOURNAL_FILE = "logs/trade_journal.jsonl"
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 MODEL = "deepseek/deepseek-chat-v3-0324:free"
 
 def load_last_trades(n=5):
@@ -33,23 +34,11 @@ Review the following {len(trades)} trades (JSON formatted):
 Trades:
 {json.dumps(trades, indent=2)}
 """
-    url = "https://openrouter.ai/api/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "model": MODEL,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.3,
-        "max_tokens": 1024
-    }
-    response = requests.post(url, headers=headers, json=data, timeout=60)
-    if response.ok:
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
-    else:
-        return f"OpenRouter API error: {response.status_code} - {response.text}"
+    try:
+        return chat_sync([{"role": "user", "content": prompt}], model=MODEL,
+                         temperature=0.3, max_tokens=1024, timeout=60, cache=get_llm_cache())
+    except LLMError as e:
+        return f"OpenRouter API error: {e}"
 
 # ✅ Telegram sync
 from alerts.telegram_alerts import send_telegram_alert
@@ -0,0 +1,123 @@
+# journal/llm_cache.py
+"""
+Content-addressed on-disk cache for LLM responses.
+Keyed by a hash of (provider, model, messages, params) so replays and reruns of
+journal reviews, rationales and batch audits cost zero LLM calls.
+SQLite-backed with size-bounded LRU eviction, optional TTL and hit/miss stats.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+DEFAULT_CACHE_PATH = "logs/llm_cache.sqlite3"
+DEFAULT_MAX_ENTRIES = 20_000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class LLMResponseCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+
+    @staticmethod
+    def make_key(provider: str, model: str, messages, params: dict = None) -> str:
+        blob = json.dumps({"provider": provider, "model": model, "messages": messages,
+                           "params": params or {}}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            value, created = row
+            if self.ttl_seconds is not None and now - created > self.ttl_seconds:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.stats["hits"] += 1
+            return value
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode()), now, now)
+            )
+            self._evict()
+
+    def _evict(self):
+        """Drop least-recently-used entries until both the entry and byte bounds hold."""
+        count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        while count > self.max_entries or total > self.max_bytes:
+            excess = max(1, count - self.max_entries)
+            rows = self._db.execute(
+                "SELECT key, size FROM responses ORDER BY accessed LIMIT ?", (excess,)
+            ).fetchall()
+            if not rows:
+                break
+            self._db.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k, _ in rows])
+            self.stats["evicted"] += len(rows)
+            count -= len(rows)
+            total -= sum(size for _, size in rows)
+
+    def info(self) -> dict:
+        with self._lock:
+            count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": count,
+            "bytes": total,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_shared_cache = None
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Process-wide cache used by the journal LLM modules."""
+    global _shared_cache
+    if _shared_cache is None:
+        ttl = os.getenv("LLM_CACHE_TTL")
+        _shared_cache = LLMResponseCache(os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+                                         ttl_seconds=float(ttl) if ttl else None)
+    return _shared_cache
+
+
+if __name__ == "__main__":
+    print(json.dumps(get_llm_cache().info(), indent=2))
@@ -1,13 +1,14 @@
 # journal/llm_reviewer.py
 import os
 import json
-import requests
 from datetime import datetime
 from dotenv import load_dotenv
 
+from journal.llm_cache import get_llm_cache
+from llm_gateway import chat_sync, LLMError
+
 load_dotenv()
 
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 MODEL = "deepseek/deepseek-chat-v3-0324:free"
 
 def review_trade_and_log(trade):
@@ -23,22 +24,9 @@ def review_trade_and_log(trade):
 Was this a high-conviction trade? Rate from 1–10 with short rationale.
 """
 
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
-    }
-
-    body = {
-        "model": MODEL,
-        "messages": [{"role": "user", "content": prompt}]
-    }
-
-    response = requests.post("https://openrouter.ai/api/v1/chat/completions", json=body, headers=headers)
-
     try:
-        result = response.json()
-        reply = result["choices"][0]["message"]["content"]
-    except:
+        reply = chat_sync([{"role": "user", "content": prompt}], model=MODEL, cache=get_llm_cache())
+    except LLMError:
         reply = "LLM ERROR: Failed to review."
 
     os.makedirs("journal", exist_ok=True)
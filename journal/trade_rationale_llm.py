@@ -1,8 +1,9 @@
 import os
 import json
-import requests
 
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+from journal.llm_cache import get_llm_cache
+from llm_gateway import chat_sync, LLMError
+
 MODEL = "deepseek/deepseek-chat-v3-0324:free"
 JOURNAL_FILE = "logs/trade_journal.jsonl"
 
@@ -19,23 +20,12 @@ def generate_trade_rationale(trade_context):
     Trade context:
     {json.dumps(trade_context, indent=2)}
     """
-    url = "https://openrouter.ai/api/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "model": MODEL,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.2,
-        "max_tokens": 512
-    }
-    resp = requests.post(url, headers=headers, json=data, timeout=60)
-    if resp.ok:
-        reply = resp.json()["choices"][0]["message"]["content"]
+    try:
+        reply = chat_sync([{"role": "user", "content": prompt}], model=MODEL,
+                          temperature=0.2, max_tokens=512, timeout=60, cache=get_llm_cache())
         return reply.strip()
-    else:
-        return f"LLM error: {resp.status_code} - {resp.text}"
+    except LLMError as e:
+        return f"LLM error: {e}"
 
 def annotate_journal_with_rationale():
     """
@@ -60,6 +50,7 @@ def annotate_journal_with_rationale():
         print("Journal updated with rationales.")
     else:
         print("No new rationales needed.")
+    print(f"LLM cache: {get_llm_cache().info()}")
 
 if __name__ == "__main__":
     annotate_journal_with_rationale()
\ No newline at end of file
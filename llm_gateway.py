@@ -0,0 +1,251 @@
+# llm_gateway.py – Shared async LLM client for every module that calls a chat model
+"""
+One gateway for all chat-completion calls (news sentiment, trade reviews,
+rationales, batch audits, auto-fix):
+
+- one keep-alive HTTP connection pool per process
+- per-provider concurrency semaphores
+- token buckets for requests/minute and tokens/minute
+- 429 / 5xx aware retries (honours Retry-After, else exponential backoff + jitter)
+- coalescing of identical in-flight requests
+- optional persistent response cache (see journal/llm_cache.py), passed per call
+
+The gateway runs on its own event-loop thread so async callers (news_feed) and
+plain sync scripts (journal/*, auto_fix.py) share the same pool and limits.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, List
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROVIDERS = {
+    "openrouter": {
+        "url": "https://openrouter.ai/api/v1/chat/completions",
+        "api_key_env": "OPENROUTER_API_KEY",
+        "max_concurrency": 4,
+        "requests_per_minute": 20,
+        "tokens_per_minute": 60_000,
+    },
+    "openai": {
+        "url": "https://api.openai.com/v1/chat/completions",
+        "api_key_env": "OPENAI_API_KEY",
+        "max_concurrency": 8,
+        "requests_per_minute": 500,
+        "tokens_per_minute": 80_000,
+    },
+}
+DEFAULT_TIMEOUT = 60        # seconds per HTTP attempt
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0          # seconds, doubled per retry
+BACKOFF_MAX = 30.0
+DEFAULT_COMPLETION_TOKENS = 512
+
+
+class LLMError(Exception):
+    """Raised when a provider call fails after all retries."""
+
+
+class TokenBucket:
+    """Async token bucket: `rate_per_minute` tokens refill continuously up to `capacity`."""
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+
+def estimate_tokens(messages: List[dict], max_tokens: int = None) -> int:
+    prompt_chars = sum(len(m.get("content", "")) for m in messages)
+    return prompt_chars // 4 + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(BACKOFF_MAX, float(retry_after))
+        except ValueError:
+            pass
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * (0.5 + random.random())
+
+
+class LLMGateway:
+    def __init__(self, providers: Dict[str, dict] = None):
+        self.providers = providers or PROVIDERS
+        self.stats = {"requests": 0, "coalesced": 0, "retries": 0, "errors": 0}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True)
+        self._thread.start()
+        self._client = None
+        self._limits = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    # ── runs on the gateway loop ─────────────────────────────────────────────
+    def _provider_limits(self, provider: str):
+        if provider not in self._limits:
+            cfg = self.providers[provider]
+            self._limits[provider] = (
+                asyncio.Semaphore(cfg["max_concurrency"]),
+                TokenBucket(cfg["requests_per_minute"]),
+                TokenBucket(cfg["tokens_per_minute"]),
+            )
+        return self._limits[provider]
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=DEFAULT_TIMEOUT,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            )
+        return self._client
+
+    async def _send(self, provider: str, payload: dict, timeout: float) -> str:
+        cfg = self.providers[provider]
+        semaphore, requests_bucket, tokens_bucket = self._provider_limits(provider)
+        headers = {
+            "Authorization": f"Bearer {os.getenv(cfg['api_key_env'])}",
+            "Content-Type": "application/json",
+        }
+        async with semaphore:
+            for attempt in range(MAX_RETRIES + 1):
+                await requests_bucket.acquire(1)
+                await tokens_bucket.acquire(estimate_tokens(payload["messages"], payload.get("max_tokens")))
+                response = None
+                try:
+                    self.stats["requests"] += 1
+                    response = await self._http().post(cfg["url"], json=payload, headers=headers, timeout=timeout)
+                    if response.status_code == 200:
+                        return response.json()["choices"][0]["message"]["content"]
+                    if response.status_code != 429 and response.status_code < 500:
+                        raise LLMError(f"{provider} API error: {response.status_code} - {response.text}")
+                    reason = f"HTTP {response.status_code}"
+                except httpx.TransportError as e:
+                    reason = f"{type(e).__name__}: {e}"
+                except (KeyError, IndexError, ValueError) as e:
+                    raise LLMError(f"{provider} returned an unexpected response: {e}")
+                if attempt == MAX_RETRIES:
+                    raise LLMError(f"{provider} failed after {MAX_RETRIES + 1} attempts ({reason})")
+                delay = _retry_delay(response, attempt)
+                self.stats["retries"] += 1
+                logging.warning(f"LLM {provider} {reason}; retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _coalesced(self, provider: str, payload: dict, timeout: float) -> str:
+        key = hashlib.sha256(f"{provider}\n{json.dumps(payload, sort_keys=True)}".encode()).hexdigest()
+        if key in self._inflight:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self._inflight[key])
+        future = self._loop.create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._send(provider, payload, timeout)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            self.stats["errors"] += 1
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            del self._inflight[key]
+            if not future.done():
+                # leader cancelled (caller timed out / went away): waiters must not hang
+                future.set_exception(LLMError(f"{provider} request cancelled"))
+                future.exception()
+
+    # ── public API (any thread / any loop) ───────────────────────────────────
+    def _submit(self, messages, model, provider, temperature, max_tokens, timeout):
+        if provider not in self.providers:
+            raise LLMError(f"Unknown LLM provider: {provider}")
+        payload = {"model": model, "messages": messages}
+        if temperature is not None:
+            payload["temperature"] = temperature
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+        return asyncio.run_coroutine_threadsafe(self._coalesced(provider, payload, timeout), self._loop)
+
+    @staticmethod
+    def _cache_key(cache, messages, model, provider, temperature, max_tokens):
+        return cache.make_key(provider, model, messages, {"temperature": temperature, "max_tokens": max_tokens})
+
+    async def chat(self, messages: List[dict], model: str, provider: str = "openrouter",
+                   temperature: float = None, max_tokens: int = None,
+                   timeout: float = DEFAULT_TIMEOUT, cache=None) -> str:
+        """Await a chat completion from any event loop; returns the reply text."""
+        if cache is not None:
+            key = self._cache_key(cache, messages, model, provider, temperature, max_tokens)
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                return cached
+        reply = await asyncio.wrap_future(self._submit(messages, model, provider, temperature, max_tokens, timeout))
+        if cache is not None:
+            await asyncio.to_thread(cache.put, key, reply)
+        return reply
+
+    def chat_sync(self, messages: List[dict], model: str, provider: str = "openrouter",
+                  temperature: float = None, max_tokens: int = None,
+                  timeout: float = DEFAULT_TIMEOUT, cache=None) -> str:
+        """Blocking chat completion for sync scripts; returns the reply text."""
+        if cache is not None:
+            key = self._cache_key(cache, messages, model, provider, temperature, max_tokens)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        reply = self._submit(messages, model, provider, temperature, max_tokens, timeout).result()
+        if cache is not None:
+            cache.put(key, reply)
+        return reply
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+    return _gateway
+
+
+async def chat(messages: List[dict], model: str, **kwargs) -> str:
+    return await get_gateway().chat(messages, model, **kwargs)
+
+
+def chat_sync(messages: List[dict], model: str, **kwargs) -> str:
+    return get_gateway().chat_sync(messages, model, **kwargs)
+
+
+if __name__ == "__main__":
+    reply = chat_sync([{"role": "user", "content": "Reply with the single word: pong"}],
+                      model="deepseek/deepseek-chat-v3-0324:free", max_tokens=5)
+    print(reply)
+    print(get_gateway().stats)
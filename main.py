@@ -2,18 +2,24 @@ import sys
 if sys.version_info >= (3, 13):
     raise RuntimeError("❌ Savage Leo does not support Python 3.13+. Downgrade to 3.11.")
 # main.py – Real-Time Autonomous Trade Signal Generator
+import atexit
 import os
 import json
 from datetime import datetime
 from dotenv import load_dotenv
 
-from bot_engine.fusion_engine import fuse_signals
+from bot_engine.fusion_engine import fuse_signals_lazy
+from bot_engine.instrumentation import METRICS, span, timed
+from bot_engine.market_stats import MARKET_STATS
 from alerts.telegram_alerts import send_telegram_alert
 from journal.logger import log_fusion_result
 from journal.llm_reviewer import review_trade_and_log
 
 # Load environment
 load_dotenv()
+# One-shot run: leave this run's stage latencies in logs/latency/ for /metrics, even on failure
+if METRICS.enabled:
+    atexit.register(METRICS.dump)
 
 # === SIMULATED MARKET INPUTS (replace with live feed later) ===
 symbol = "XAUUSD"
@@ -21,35 +27,42 @@ timeframe = "M5"
 entry_price = 2363.75
 volatility = 0.12
 spread = 0.15
-median_spread = 0.1
-median_volatility = 0.1
-
-# === STUBBED SIGNAL COMPONENTS ===
-sentiment = {
-    "score": 0.85,
-    "urgency": "high",
-    "direction": "bullish"
-}
 
-forecast = 0.72  # From Prophet/Informer
+# === STUBBED SIGNAL COMPONENTS (evaluated lazily, cheapest first) ===
+@timed("sentiment")
+def get_sentiment():
+    return {
+        "score": 0.85,
+        "urgency": "high",
+        "direction": "bullish"
+    }
 
-structure = {
-    "confirmed": True,
-    "type": "breakout",
-    "sl_buffer": 0.5
-}
+@timed("forecast")
+def get_forecast():
+    return 0.72  # From Prophet/Informer
+
+@timed("structure")
+def get_structure():
+    return {
+        "confirmed": True,
+        "type": "breakout",
+        "sl_buffer": 0.5
+    }
 
 market_state = {
     "entry": entry_price,
     "volatility": volatility,
     "spread": spread,
-    "median_spread": median_spread,
-    "median_volatility": median_volatility,
     "data_age": 2
 }
+# median_spread / median_volatility come from the streaming per-symbol estimators
+with span("ingest", symbol):
+    MARKET_STATS.enrich(market_state, symbol)
 
 # === RUN FUSION DECISION ===
-fusion_result = fuse_signals(sentiment, forecast, structure, market_state)
+# Spread/staleness/volatility blockers run before any signal component is computed
+with span("fusion", symbol):
+    fusion_result = fuse_signals_lazy(get_sentiment, get_forecast, get_structure, market_state)
 
 # === HANDLE DECISION LOGIC ===
 os.makedirs("signal", exist_ok=True)
@@ -72,22 +85,25 @@ if fusion_result["decision"] == "entry":
         "timestamp": datetime.utcnow().isoformat()
     }
 
-    with open(signal_path, "w") as f:
+    with span("signal_write", symbol), open(signal_path, "w") as f:
         json.dump(signal_payload, f, indent=2)
 
     print(f"✅ Trade signal written to {signal_path}")
 
     # ✅ Log trade to journal
-    log_fusion_result(signal_payload)
+    with span("journal", symbol):
+        log_fusion_result(signal_payload)
 
     # ✅ Send Telegram alert
-    send_telegram_alert(
-        f"🚨 *Trade Signal*\nSymbol: {symbol}\nAction: {fusion_result['direction'].upper()}\n"
-        f"Confidence: {fusion_result['confidence']}\nRisk: {fusion_result['risk_pct']}%\nSL: {fusion_result['sl']} TP: {fusion_result['tp']}"
-    )
+    with span("alert", symbol):
+        send_telegram_alert(
+            f"🚨 *Trade Signal*\nSymbol: {symbol}\nAction: {fusion_result['direction'].upper()}\n"
+            f"Confidence: {fusion_result['confidence']}\nRisk: {fusion_result['risk_pct']}%\nSL: {fusion_result['sl']} TP: {fusion_result['tp']}"
+        )
 
     # ✅ Run LLM Reviewer
-    review_trade_and_log(signal_payload)
+    with span("llm_review", symbol):
+        review_trade_and_log(signal_payload)
 
 else:
     print(f"⚠️ No trade taken: {fusion_result.get('reason', 'Unknown reason')}")
@@ -0,0 +1,24 @@
+# mt5_backend.py – Selects the MetaTrader5 implementation
+"""
+MT5_BACKEND=live (default) imports the real MetaTrader5 package (Windows only);
+MT5_BACKEND=sim uses mt5_sim, the offline replay/synthetic stand-in, so the
+whole pipeline can run and be benchmarked on Linux.
+
+    from mt5_backend import mt5
+"""
+
+import importlib
+import os
+
+MT5_BACKENDS = {"live": "MetaTrader5", "sim": "mt5_sim"}
+MT5_BACKEND = os.getenv("MT5_BACKEND", "live").lower()
+
+
+def load_backend(name: str = None):
+    name = (name or MT5_BACKEND).lower()
+    if name not in MT5_BACKENDS:
+        raise ValueError(f"Unknown MT5_BACKEND '{name}' (expected one of {sorted(MT5_BACKENDS)})")
+    return importlib.import_module(MT5_BACKENDS[name])
+
+
+mt5 = load_backend()
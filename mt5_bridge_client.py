@@ -1,19 +1,34 @@
+import asyncio
 import json
 import os
+import threading
 import time
-from typing import Dict
+from typing import Dict, Optional
 
 TRADE_COMMAND_DIR = "C:/AI_System/trade_commands"
 TRADE_ACK_DIR = "C:/AI_System/trade_acks"
+ACK_FILLED = "filled"               # ack status of an opened position
+EXIT_SUFFIX = ".exit.json"          # the EA writes <trade_id>.exit.json when the position closes
 
 os.makedirs(TRADE_COMMAND_DIR, exist_ok=True)
 os.makedirs(TRADE_ACK_DIR, exist_ok=True)
 
+_last_id_ms = 0
+_id_lock = threading.Lock()
+
+def new_trade_id(symbol: str) -> str:
+    """<symbol>_<epoch ms>, bumped past the previous id so concurrent trades never share one."""
+    global _last_id_ms
+    with _id_lock:
+        _last_id_ms = max(int(time.time() * 1000), _last_id_ms + 1)
+        return f"{symbol}_{_last_id_ms}"
+
 def send_trade_command(trade: Dict):
     """
-    Send trade command to MT5 via file bridge.
+    Send trade command to MT5 via file bridge. A trade_id already set on the
+    trade (e.g. one the portfolio risk book registered) is kept.
     """
-    trade_id = f"{trade['symbol']}_{int(time.time()*1000)}"
+    trade_id = trade.get("trade_id") or new_trade_id(trade["symbol"])
     trade['trade_id'] = trade_id
     trade['timestamp'] = time.time()
     fname = os.path.join(TRADE_COMMAND_DIR, f"{trade_id}.json")
@@ -41,6 +56,32 @@ def wait_for_ack(trade_id, timeout=10):
         time.sleep(0.2)
     return {"status": "timeout", "trade_id": trade_id}
 
+async def wait_for_ack_async(trade_id, timeout=10, poll_interval=0.2):
+    """
+    wait_for_ack for asyncio callers: polls with asyncio.sleep so a pending ack
+    does not hold a worker thread.
+    """
+    ack_file = os.path.join(TRADE_ACK_DIR, f"{trade_id}.json")
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if os.path.exists(ack_file):
+            with open(ack_file) as f:
+                ack = json.load(f)
+            os.remove(ack_file)
+            return ack
+        await asyncio.sleep(poll_interval)
+    return {"status": "timeout", "trade_id": trade_id}
+
+def poll_exit(trade_id) -> Optional[dict]:
+    """The EA's exit report for a closed position (SL/TP/manual), or None while it is open."""
+    exit_file = os.path.join(TRADE_ACK_DIR, f"{trade_id}{EXIT_SUFFIX}")
+    if not os.path.exists(exit_file):
+        return None
+    with open(exit_file) as f:
+        report = json.load(f)
+    os.remove(exit_file)
+    return report
+
 # Example usage
 if __name__ == "__main__":
     trade = {
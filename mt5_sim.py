@@ -0,0 +1,345 @@
+# mt5_sim.py – Offline stand-in for the MetaTrader5 package
+"""
+Drop-in simulated MT5 module (select it with MT5_BACKEND=sim, see mt5_backend.py).
+
+Implements the subset of the MetaTrader5 API the bot uses: initialize, shutdown,
+last_error, copy_rates_from_pos, symbol_info_tick, order_send and the constants
+they need. Ticks are replayed from recorded CSVs (<MT5_SIM_TICKS_DIR>/<SYMBOL>.csv
+with a time,bid,ask header, epoch seconds) or generated as a seeded random walk,
+on a simulated clock running MT5_SIM_SPEED x real time (0 = frozen, advance()
+moves it). Orders fill against the tick after a sampled latency, with slippage,
+deviation requotes and random rejects.
+"""
+
+import math
+import os
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+import numpy as np
+
+# ── MetaTrader5 constants used by the bot ────────────────────────────────────
+TIMEFRAME_M1, TIMEFRAME_M5, TIMEFRAME_M15, TIMEFRAME_M30 = 1, 5, 15, 30
+TIMEFRAME_H1, TIMEFRAME_H4, TIMEFRAME_D1 = 16385, 16388, 16408
+ORDER_TYPE_BUY, ORDER_TYPE_SELL = 0, 1
+TRADE_ACTION_DEAL, TRADE_ACTION_PENDING = 1, 5
+ORDER_TIME_GTC = 0
+ORDER_FILLING_FOK, ORDER_FILLING_IOC, ORDER_FILLING_RETURN = 0, 1, 2
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_REJECT = 10006
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_INVALID = 10013
+RES_S_OK, RES_E_FAIL = 1, -1
+
+TIMEFRAME_SECONDS = {
+    TIMEFRAME_M1: 60, TIMEFRAME_M5: 300, TIMEFRAME_M15: 900, TIMEFRAME_M30: 1800,
+    TIMEFRAME_H1: 3600, TIMEFRAME_H4: 14400, TIMEFRAME_D1: 86400,
+}
+RATES_DTYPE = np.dtype([
+    ("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+    ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8"),
+])
+
+# ── simulation defaults (env overrides, see configure()) ─────────────────────
+DEFAULT_CONFIG = {
+    "speed": float(os.getenv("MT5_SIM_SPEED", "1")),            # simulated seconds per wall second
+    "ticks_dir": os.getenv("MT5_SIM_TICKS_DIR"),                  # recorded ticks; synthetic if unset
+    "seed": int(os.getenv("MT5_SIM_SEED", "42")),
+    "tick_interval": float(os.getenv("MT5_SIM_TICK_INTERVAL", "5")),   # synthetic seconds between ticks
+    "history_seconds": float(os.getenv("MT5_SIM_HISTORY", str(7 * 86400))),
+    "daily_volatility": 0.006,                                    # synthetic log-return stdev per day
+    "latency_ms": float(os.getenv("MT5_SIM_LATENCY_MS", "40")),   # mean order round trip
+    "latency_jitter": 0.5,                                        # lognormal sigma of the latency
+    "slippage_points": float(os.getenv("MT5_SIM_SLIPPAGE_POINTS", "2")),
+    "reject_rate": float(os.getenv("MT5_SIM_REJECT_RATE", "0")),
+    "start_time": None,                                           # simulated epoch at initialize()
+}
+BASE_PRICES = {"XAUUSD": 2350.0, "EURUSD": 1.085, "GBPUSD": 1.27, "GBPJPY": 190.0, "USDJPY": 150.0}
+SPREAD_POINTS = {"XAUUSD": 15, "EURUSD": 8, "GBPUSD": 10, "GBPJPY": 25, "USDJPY": 10}
+SYNTHETIC_CHUNK_SECONDS = 86400
+
+
+def symbol_point(symbol: str) -> float:
+    if symbol.startswith("XAU"):
+        return 0.01
+    if "JPY" in symbol:
+        return 0.001
+    return 0.00001
+
+
+class SimClock:
+    """Simulated epoch seconds: start + speed x elapsed wall time + manual advances."""
+
+    def __init__(self, start: float, speed: float):
+        self.start = start
+        self.speed = speed
+        self._wall0 = time.monotonic()
+        self._offset = 0.0
+
+    def now(self) -> float:
+        return self.start + (time.monotonic() - self._wall0) * self.speed + self._offset
+
+    def advance(self, seconds: float):
+        self._offset += seconds
+
+
+class TickTape:
+    """Time-sorted bid/ask arrays for one symbol; synthetic tapes extend on demand."""
+
+    def __init__(self, symbol: str, times, bids, asks, extend=None):
+        self.symbol = symbol
+        self.times = np.asarray(times, dtype=np.float64)
+        self.bids = np.asarray(bids, dtype=np.float64)
+        self.asks = np.asarray(asks, dtype=np.float64)
+        self._extend = extend
+
+    def ensure(self, t: float):
+        while self._extend is not None and (not len(self.times) or self.times[-1] < t):
+            times, bids, asks = self._extend()
+            self.times = np.concatenate([self.times, times])
+            self.bids = np.concatenate([self.bids, bids])
+            self.asks = np.concatenate([self.asks, asks])
+
+    def index_at(self, t: float) -> int:
+        """Index of the last tick at or before t (-1 if none)."""
+        self.ensure(t)
+        return int(np.searchsorted(self.times, t, side="right")) - 1
+
+    @classmethod
+    def synthetic(cls, symbol: str, start: float, config: dict) -> "TickTape":
+        rng = np.random.default_rng(config["seed"] + zlib.crc32(symbol.encode()))
+        point = symbol_point(symbol)
+        interval = config["tick_interval"]
+        per_chunk = int(SYNTHETIC_CHUNK_SECONDS / interval)
+        sigma = config["daily_volatility"] / math.sqrt(86400 / interval)
+        state = {"t": start, "price": BASE_PRICES.get(symbol, 100.0)}
+        spread = SPREAD_POINTS.get(symbol, 10) * point
+
+        def extend():
+            times = state["t"] + interval * np.arange(per_chunk)
+            mids = state["price"] * np.exp(np.cumsum(rng.normal(0.0, sigma, per_chunk)))
+            spreads = spread * (1 + np.abs(rng.normal(0.0, 0.3, per_chunk)))
+            state["t"] = times[-1] + interval
+            state["price"] = mids[-1]
+            bids = np.round(mids - spreads / 2, 8)
+            return times, bids, np.round(bids + spreads, 8)
+
+        return cls(symbol, [], [], [], extend=extend)
+
+    @classmethod
+    def from_csv(cls, symbol: str, path: str) -> "TickTape":
+        data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+        order = np.argsort(data[:, 0], kind="stable")
+        return cls(symbol, data[order, 0], data[order, 1], data[order, 2])
+
+
+class Simulator:
+    def __init__(self, **overrides):
+        self.config = {**DEFAULT_CONFIG, **overrides}
+        self.clock: Optional[SimClock] = None
+        self.tapes: Dict[str, TickTape] = {}
+        self.orders = []
+        self.stats = {"ticks": 0, "rates_calls": 0, "orders": 0, "rejected": 0, "requotes": 0}
+        self._error = (RES_S_OK, "Success")
+        self._rng = np.random.default_rng(self.config["seed"])
+        self._lock = threading.Lock()
+        self._next_ticket = 1
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+    def initialize(self) -> bool:
+        with self._lock:
+            if self.clock is None:
+                start = self.config["start_time"]
+                if start is None:
+                    start = self._recorded_start() or time.time()
+                self.clock = SimClock(start, self.config["speed"])
+            self._error = (RES_S_OK, "Success")
+            return True
+
+    def _recorded_start(self) -> Optional[float]:
+        """Replay recorded ticks from one history window after the earliest tick."""
+        ticks_dir = self.config["ticks_dir"]
+        if not ticks_dir or not os.path.isdir(ticks_dir):
+            return None
+        firsts = []
+        for name in os.listdir(ticks_dir):
+            if name.endswith(".csv"):
+                firsts.append(self._tape(name[:-4]).times[0])
+        return min(firsts) + self.config["history_seconds"] if firsts else None
+
+    def _tape(self, symbol: str) -> Optional[TickTape]:
+        tape = self.tapes.get(symbol)
+        if tape is None:
+            ticks_dir = self.config["ticks_dir"]
+            path = os.path.join(ticks_dir, f"{symbol}.csv") if ticks_dir else None
+            if path and os.path.exists(path):
+                tape = TickTape.from_csv(symbol, path)
+            elif ticks_dir:
+                return None   # replay mode: unknown symbols have no data, like a real terminal
+            else:
+                start = (self.clock.start if self.clock else time.time()) - self.config["history_seconds"]
+                tape = TickTape.synthetic(symbol, start, self.config)
+            self.tapes[symbol] = tape
+        return tape
+
+    def _require_session(self) -> bool:
+        if self.clock is None:
+            self._error = (RES_E_FAIL, "Terminal not initialized")
+            return False
+        return True
+
+    # ── market data ──────────────────────────────────────────────────────────
+    def symbol_info_tick(self, symbol: str):
+        with self._lock:
+            if not self._require_session():
+                return None
+            tape = self._tape(symbol)
+            now = self.clock.now()
+            i = tape.index_at(now) if tape is not None else -1
+            if i < 0:
+                self._error = (RES_E_FAIL, f"No ticks for {symbol}")
+                return None
+            self.stats["ticks"] += 1
+            t = tape.times[i]
+            return SimpleNamespace(time=int(t), bid=float(tape.bids[i]), ask=float(tape.asks[i]),
+                                   last=0.0, volume=0, time_msc=int(t * 1000), flags=0, volume_real=0.0)
+
+    def copy_rates_from_pos(self, symbol: str, timeframe: int, start_pos: int, count: int):
+        """Bars aggregated from ticks; position 0 is the forming bar, result is oldest first."""
+        with self._lock:
+            if not self._require_session():
+                return None
+            period = TIMEFRAME_SECONDS.get(timeframe)
+            tape = self._tape(symbol)
+            if period is None or tape is None:
+                self._error = (RES_E_FAIL, f"Invalid params {symbol} {timeframe}")
+                return None
+            self.stats["rates_calls"] += 1
+            now = self.clock.now()
+            current = math.floor(now / period) * period
+            first = current - (start_pos + count - 1) * period
+            hi = tape.index_at(now) + 1
+            lo = int(np.searchsorted(tape.times, first, side="left"))
+            times, bids, asks = tape.times[lo:hi], tape.bids[lo:hi], tape.asks[lo:hi]
+            if not len(times):
+                return np.zeros(0, dtype=RATES_DTYPE)
+            bucket = np.floor(times / period).astype(np.int64)
+            starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+            ends = np.r_[starts[1:], len(times)] - 1
+            rates = np.zeros(len(starts), dtype=RATES_DTYPE)
+            rates["time"] = bucket[starts] * period
+            rates["open"] = bids[starts]
+            rates["high"] = np.maximum.reduceat(bids, starts)
+            rates["low"] = np.minimum.reduceat(bids, starts)
+            rates["close"] = bids[ends]
+            rates["tick_volume"] = ends - starts + 1
+            rates["spread"] = np.round((asks[ends] - bids[ends]) / symbol_point(symbol)).astype(np.int32)
+            if start_pos:
+                rates = rates[rates["time"] <= current - start_pos * period]
+            return rates[-count:]
+
+    # ── trading ──────────────────────────────────────────────────────────────
+    def order_send(self, request: dict):
+        if self.clock is None:
+            self._error = (RES_E_FAIL, "Terminal not initialized")
+            return None
+        cfg = self.config
+        latency = cfg["latency_ms"] / 1000.0 * float(self._rng.lognormal(0.0, cfg["latency_jitter"])) \
+            if cfg["latency_ms"] > 0 else 0.0
+        if self.clock.speed > 0 and latency:
+            time.sleep(latency / self.clock.speed)   # the call blocks like a terminal round trip
+        with self._lock:
+            self.stats["orders"] += 1
+            symbol = request.get("symbol")
+            tape = self._tape(symbol) if symbol else None
+            fill_time = self.clock.now() + (0.0 if self.clock.speed > 0 else latency)
+            i = tape.index_at(fill_time) if tape is not None else -1
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            result = SimpleNamespace(retcode=TRADE_RETCODE_DONE, deal=0, order=ticket,
+                                     volume=request.get("volume", 0.0), price=0.0, bid=0.0, ask=0.0,
+                                     comment="Request executed", request_id=ticket, request=request,
+                                     latency_ms=round(latency * 1000, 3))
+            if i < 0 or request.get("type") not in (ORDER_TYPE_BUY, ORDER_TYPE_SELL):
+                result.retcode, result.comment = TRADE_RETCODE_INVALID, "Invalid request"
+                self.orders.append(result)
+                return result
+            result.bid, result.ask = float(tape.bids[i]), float(tape.asks[i])
+            if self._rng.random() < cfg["reject_rate"]:
+                self.stats["rejected"] += 1
+                result.retcode, result.comment = TRADE_RETCODE_REJECT, "Request rejected"
+            elif request.get("action") == TRADE_ACTION_PENDING:
+                result.price = request.get("price", 0.0)
+                result.comment = "Request placed"
+            else:
+                point = symbol_point(symbol)
+                slippage = float(self._rng.uniform(0.0, cfg["slippage_points"])) * point
+                buy = request["type"] == ORDER_TYPE_BUY
+                price = result.ask + slippage if buy else result.bid - slippage
+                requested = request.get("price")
+                deviation = request.get("deviation")
+                if requested and deviation is not None and abs(price - requested) > deviation * point:
+                    self.stats["requotes"] += 1
+                    result.retcode, result.comment = TRADE_RETCODE_REQUOTE, "Requote"
+                else:
+                    result.price = round(price, 8)
+                    result.deal = ticket
+            self.orders.append(result)
+            return result
+
+
+_sim = Simulator()
+
+
+def configure(**overrides) -> Simulator:
+    """Replace the module simulator (e.g. configure(speed=0, ticks_dir=...)); call before initialize()."""
+    global _sim
+    _sim = Simulator(**overrides)
+    return _sim
+
+
+def simulator() -> Simulator:
+    return _sim
+
+
+def advance(seconds: float):
+    """Move the simulated clock forward (the only way it moves when speed=0)."""
+    _sim.clock.advance(seconds)
+
+
+# ── MetaTrader5-compatible module API ────────────────────────────────────────
+def initialize(*args, **kwargs) -> bool:
+    return _sim.initialize()
+
+
+def shutdown():
+    _sim.clock = None
+
+
+def last_error():
+    return _sim._error
+
+
+def symbol_info_tick(symbol: str):
+    return _sim.symbol_info_tick(symbol)
+
+
+def copy_rates_from_pos(symbol: str, timeframe: int, start_pos: int, count: int):
+    return _sim.copy_rates_from_pos(symbol, timeframe, start_pos, count)
+
+
+def order_send(request: dict):
+    return _sim.order_send(request)
+
+
+if __name__ == "__main__":
+    configure(speed=0)
+    initialize()
+    print(symbol_info_tick("XAUUSD"))
+    print(copy_rates_from_pos("XAUUSD", TIMEFRAME_M5, 0, 3))
+    advance(600)
+    print(order_send({"action": TRADE_ACTION_DEAL, "symbol": "XAUUSD", "volume": 0.1,
+                      "type": ORDER_TYPE_BUY, "deviation": 20}))
@@ -1,33 +1,45 @@
 import os
 import asyncio
+import calendar
 import signal
 import feedparser
+import httpx
 import hashlib
 import json
-import openai
 import logging
-import os
-import json
-import logging
-import openai
 import jsonschema
 
+from collections import OrderedDict, deque
 from typing import List
 import redis.asyncio as aioredis
 
+from bot_engine.headline_dedup import NearDuplicateIndex
+from bot_engine.instrumentation import METRICS, span
+from bot_engine.local_sentiment import LocalSentimentScorer
+from bot_engine.news_stream_consumer import NEWS_STREAM, NEWS_STREAM_MAXLEN
+from llm_gateway import chat
+
 # ─── CONFIG ────────────────────────────────────────────────────────────────
 RSS_URLS = [
     "https://www.forexfactory.com/ffnews.xml",
     # add more RSS or JSON endpoints here
 ]
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+SENTIMENT_MODEL = "gpt-4"
+SENTIMENT_PROVIDER = "openai"   # see llm_gateway.PROVIDERS
 CACHE_TTL = 300             # seconds
 POLL_INTERVAL = 60          # seconds between loops
 FAIL_THRESHOLD = 3          # consecutive errors before cooling off
 COOLDOWN_SECONDS = 300      # how long to pause when tripped (5 min)
-
-openai.api_key = OPENAI_API_KEY
+MIN_BATCH_SIZE = 1          # headlines per LLM request (adaptive between min/max)
+MAX_BATCH_SIZE = 25
+BATCH_TOKEN_BUDGET = 3000   # prompt + completion tokens allowed per batched request
+PROMPT_OVERHEAD_TOKENS = 150
+OUTPUT_TOKENS_PER_ITEM = 40
+HTTP_TIMEOUT = 15           # seconds per feed request
+SEEN_UNDATED_MAX = 2000     # undated entry ids remembered per feed
+SNAPSHOT_SIZE = 500         # headlines kept in the latest_news_sentiments view
+SNAPSHOT_KEY = "latest_news_sentiments"
 
 # ─── LOGGING ────────────────────────────────────────────────────────────────
 logging.basicConfig(
@@ -46,19 +58,134 @@ def _signal_handler():
 signal.signal(signal.SIGINT, lambda *_: _signal_handler())
 signal.signal(signal.SIGTERM, lambda *_: _signal_handler())
 
+# ─── SENTIMENT SCHEMA & BATCHING STATE ───────────────────────────────────────
+NEUTRAL_SENTIMENT = {"directional_bias": 0.0, "tone": "neutral", "urgency": "low"}
+
+SENTIMENT_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "integer"},
+        "directional_bias": {"type": "number", "minimum": -1, "maximum": 1},
+        "tone": {"enum": ["hawkish", "dovish", "neutral"]},
+        "urgency": {"enum": ["high", "medium", "low"]},
+    },
+    "required": ["id", "directional_bias", "tone", "urgency"],
+}
+SENTIMENT_BATCH_SCHEMA = {"type": "array", "items": {"type": "object"}}
+
+current_batch_size = MAX_BATCH_SIZE  # adapted after every batched round
+local_scorer = LocalSentimentScorer()  # fast tier; only ambiguous headlines reach the LLM
+dedup_index = NearDuplicateIndex()     # syndicated near-duplicates reuse one sentiment
+
 # ─── HELPERS ─────────────────────────────────────────────────────────────────
 def hash_text(text: str) -> str:
     return hashlib.sha256(text.encode()).hexdigest()
 
+redis_pool = None  # one connection pool shared by every client in this process
+
 async def get_redis():
-    return aioredis.from_url(REDIS_URL, decode_responses=True)
+    global redis_pool
+    if redis_pool is None:
+        redis_pool = aioredis.ConnectionPool.from_url(REDIS_URL, decode_responses=True)
+    return aioredis.Redis(connection_pool=redis_pool)
+
+http_client = None  # shared keep-alive HTTP client for all feeds
+feed_state = {}     # url -> conditional GET validators + new-entry watermark
+pending_feed_state = {}     # url -> state after the last fetch, until its headlines are published
 
-def fetch_news() -> List[str]:
+def get_http_client() -> httpx.AsyncClient:
+    global http_client
+    if http_client is None:
+        http_client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            headers={"User-Agent": "savage-leo-news/1.0"},
+        )
+    return http_client
+
+def _entry_time(entry):
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    return calendar.timegm(parsed) if parsed else None
+
+def _new_entries(state: dict, entries) -> List[str]:
+    """Keep only entries newer than the feed watermark (undated ones are deduped by id)."""
+    watermark = state["watermark"]
+    fresh, newest = [], watermark
+    for entry in entries:
+        ts = _entry_time(entry)
+        key = entry.get("id") or entry.get("link") or entry.get("title")
+        if ts is None:
+            if key in state["seen_undated"]:
+                continue
+            state["seen_undated"][key] = True
+            if len(state["seen_undated"]) > SEEN_UNDATED_MAX:
+                state["seen_undated"].popitem(last=False)
+        elif watermark is not None and (ts < watermark or (ts == watermark and key in state["seen_at_watermark"])):
+            continue
+        fresh.append((ts, key, entry.title))
+        if ts is not None and (newest is None or ts > newest):
+            newest = ts
+
+    if newest != watermark:
+        state["seen_at_watermark"] = set()
+    state["watermark"] = newest
+    state["seen_at_watermark"].update(key for ts, key, _ in fresh if ts is not None and ts == newest)
+    return [title for _, _, title in fresh]
+
+async def fetch_feed(client: httpx.AsyncClient, url: str) -> List[str]:
+    """
+    Conditional GET of one feed; returns only headlines newer than its watermark.
+    The advanced validators and watermark are staged in pending_feed_state until
+    commit_feed_state(), so a failed cycle refetches the same headlines.
+    """
+    state = feed_state.setdefault(url, {
+        "etag": None, "modified": None, "watermark": None,
+        "seen_at_watermark": set(), "seen_undated": OrderedDict(),
+    })
+    headers = {}
+    if state["etag"]:
+        headers["If-None-Match"] = state["etag"]
+    if state["modified"]:
+        headers["If-Modified-Since"] = state["modified"]
+
+    resp = await client.get(url, headers=headers)
+    if resp.status_code == 304:
+        return []
+    resp.raise_for_status()
+    staged = dict(state, etag=resp.headers.get("ETag"), modified=resp.headers.get("Last-Modified"),
+                  seen_at_watermark=set(state["seen_at_watermark"]),
+                  seen_undated=OrderedDict(state["seen_undated"]))
+
+    # feedparser is CPU-bound; keep it off the event loop
+    feed = await asyncio.to_thread(feedparser.parse, resp.content)
+    headlines = _new_entries(staged, feed.entries)
+    pending_feed_state[url] = staged
+    return headlines
+
+def commit_feed_state():
+    """Advance every feed past the headlines returned by the last fetch."""
+    feed_state.update(pending_feed_state)
+    pending_feed_state.clear()
+
+async def fetch_news_async(urls: List[str] = None, client: httpx.AsyncClient = None,
+                           commit: bool = True) -> List[str]:
+    """
+    Fetch every feed concurrently over one shared client; returns new headlines only.
+    With commit=False the feeds only advance on a later commit_feed_state().
+    """
+    urls = RSS_URLS if urls is None else urls
+    client = client or get_http_client()
+    pending_feed_state.clear()     # an uncommitted earlier fetch is fetched again
+    results = await asyncio.gather(*[fetch_feed(client, url) for url in urls], return_exceptions=True)
     headlines = []
-    for url in RSS_URLS:
-        feed = feedparser.parse(url)
-        for entry in feed.entries:
-            headlines.append(entry.title)
+    for url, res in zip(urls, results):
+        if isinstance(res, Exception):
+            logging.warning(f"Feed fetch failed for {url}: {res}")
+            continue
+        headlines.extend(res)
+    if commit:
+        commit_feed_state()
     return headlines
 
 async def parse_sentiment(text: str):
@@ -71,36 +198,155 @@ async def parse_sentiment(text: str):
         '  "urgency": "high|medium|low"\n'
         "}"
     )
-    res = await openai.ChatCompletion.acreate(
-        model="gpt-4",
-        messages=[
+    reply = await chat(
+        [
             {"role": "system", "content": "You are a professional forex analyst."},
             {"role": "user", "content": prompt}
         ],
+        model=SENTIMENT_MODEL,
+        provider=SENTIMENT_PROVIDER,
         temperature=0,
         max_tokens=100
     )
     try:
-        return json.loads(res.choices[0].message.content)
+        return json.loads(reply)
     except json.JSONDecodeError:
         logging.warning("LLM response not valid JSON; defaulting neutral sentiment")
-        return {"directional_bias": 0.0, "tone": "neutral", "urgency": "low"}
+        return dict(NEUTRAL_SENTIMENT)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 chars per token) used for batch budgeting."""
+    return len(text) // 4 + 8
+
+def plan_batches(headlines: List[str], size: int) -> List[List[int]]:
+    """Split headline indices into batches of at most `size` items within BATCH_TOKEN_BUDGET."""
+    batches, current, used = [], [], PROMPT_OVERHEAD_TOKENS
+    for i, text in enumerate(headlines):
+        cost = estimate_tokens(text) + OUTPUT_TOKENS_PER_ITEM
+        if current and (len(current) >= size or used + cost > BATCH_TOKEN_BUDGET):
+            batches.append(current)
+            current, used = [], PROMPT_OVERHEAD_TOKENS
+        current.append(i)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+async def parse_sentiment_batch(texts: List[str]) -> List[dict]:
+    """
+    Score several headlines with one LLM request.
+    Returns one entry per headline: a validated sentiment dict, or None if that
+    item was missing or invalid in the response (caller falls back per headline).
+    """
+    numbered = "\n".join(f"{i}. {json.dumps(t)}" for i, t in enumerate(texts))
+    prompt = (
+        f"Analyze each of these {len(texts)} news headlines and output ONLY a JSON array "
+        "with one object per headline:\n\n"
+        f"{numbered}\n\n"
+        "[\n"
+        "  {\n"
+        '    "id": int,                 # headline number\n'
+        '    "directional_bias": float, # -1 to +1\n'
+        '    "tone": "hawkish|dovish|neutral",\n'
+        '    "urgency": "high|medium|low"\n'
+        "  }\n"
+        "]"
+    )
+    reply = await chat(
+        [
+            {"role": "system", "content": "You are a professional forex analyst."},
+            {"role": "user", "content": prompt}
+        ],
+        model=SENTIMENT_MODEL,
+        provider=SENTIMENT_PROVIDER,
+        temperature=0,
+        max_tokens=OUTPUT_TOKENS_PER_ITEM * len(texts) + 20
+    )
+    results = [None] * len(texts)
+    try:
+        items = json.loads(reply)
+        jsonschema.validate(items, SENTIMENT_BATCH_SCHEMA)
+    except (json.JSONDecodeError, jsonschema.ValidationError):
+        logging.warning(f"Batched LLM response invalid for {len(texts)} headlines")
+        return results
+    for item in items:
+        try:
+            jsonschema.validate(item, SENTIMENT_ITEM_SCHEMA)
+        except jsonschema.ValidationError:
+            continue
+        if 0 <= item["id"] < len(texts) and results[item["id"]] is None:
+            results[item["id"]] = {k: item[k] for k in ("directional_bias", "tone", "urgency")}
+    return results
+
+async def score_uncached(headlines: List[str]) -> List[dict]:
+    """
+    Score headlines with batched LLM prompts sized by the adaptive batch size and
+    token budget; only items a batch failed to score fall back to parse_sentiment.
+    """
+    global current_batch_size
+    batches = plan_batches(headlines, current_batch_size)
+    batch_results = await asyncio.gather(
+        *[parse_sentiment_batch([headlines[i] for i in batch]) for batch in batches],
+        return_exceptions=True
+    )
+    results = [None] * len(headlines)
+    failed = []
+    for batch, res in zip(batches, batch_results):
+        if isinstance(res, Exception):
+            logging.warning(f"Batched sentiment request failed: {res}")
+            res = [None] * len(batch)
+        for idx, sentiment in zip(batch, res):
+            if sentiment is None:
+                failed.append(idx)
+            else:
+                results[idx] = sentiment
+
+    # Adapt: shrink hard on failures, grow slowly on clean rounds
+    if failed:
+        current_batch_size = max(MIN_BATCH_SIZE, current_batch_size // 2)
+        logging.info(f"{len(failed)} headlines fell back to single scoring; batch size -> {current_batch_size}")
+    elif batches:
+        current_batch_size = min(MAX_BATCH_SIZE, current_batch_size + 1)
+
+    fallback = await asyncio.gather(*[parse_sentiment(headlines[i]) for i in failed], return_exceptions=True)
+    for idx, res in zip(failed, fallback):
+        results[idx] = res if isinstance(res, dict) else dict(NEUTRAL_SENTIMENT)
+    return results
+
+async def publish_news(redis_client, payload: List[dict], snapshot: List[dict]):
+    """
+    Append each newly scored headline to the news stream (consumers read only the
+    delta) and refresh the full snapshot key as a compatibility view, in one round trip.
+    """
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for item in payload:
+            pipe.xadd(NEWS_STREAM, {"data": json.dumps(item)}, maxlen=NEWS_STREAM_MAXLEN, approximate=True)
+        pipe.set(SNAPSHOT_KEY, json.dumps(snapshot), ex=CACHE_TTL)
+        await pipe.execute()
 
 # ─── MAIN LOOP ────────────────────────────────────────────────────────────────
 async def news_loop():
     global fail_count
     redis_client = await get_redis()
+    recent = deque(maxlen=SNAPSHOT_SIZE)
 
     while not stop_event.is_set():
         try:
-            headlines = fetch_news()
-            if not headlines:
-                logging.warning("No headlines fetched")
-            sentiments = await get_sentiments(headlines, redis_client)
-            payload = [{"headline": h, **s} for h, s in zip(headlines, sentiments)]
-
-            await redis_client.set("latest_news_sentiments", json.dumps(payload), ex=CACHE_TTL)
-            logging.info(f"Processed {len(payload)} news items")
+            with span("news.cycle"):
+                with span("news.fetch"):
+                    headlines = await fetch_news_async(commit=False)
+                if not headlines:
+                    logging.info("No new headlines")
+                with span("news.sentiment"):
+                    sentiments = await get_sentiments(headlines, redis_client)
+                payload = [{"headline": h, **s} for h, s in zip(headlines, sentiments)]
+
+                with span("news.publish"):
+                    await publish_news(redis_client, payload, (list(recent) + payload)[-SNAPSHOT_SIZE:])
+                # only now may the feeds move past these headlines
+                recent.extend(payload)
+                commit_feed_state()
+            logging.info(f"Processed {len(payload)} new news items")
             fail_count = 0
 
         except Exception as e:
@@ -111,42 +357,84 @@ async def news_loop():
                 await asyncio.sleep(COOLDOWN_SECONDS)
                 fail_count = 0
 
+        await asyncio.to_thread(METRICS.maybe_dump)
         # wait either until next poll or shutdown signal
         try:
             await asyncio.wait_for(stop_event.wait(), timeout=POLL_INTERVAL)
         except asyncio.TimeoutError:
             continue
 
+    if METRICS.enabled:
+        await asyncio.to_thread(METRICS.dump)
     logging.info("Exiting news_loop cleanly.")
 
 async def get_sentiments(headlines: List[str], redis_client) -> List[dict]:
+    """
+    Sentiment per headline. Near-duplicates (within the dedup window) are collapsed
+    onto their canonical headline, scored once, and tagged with "duplicate_of".
+    The canonical's sentiment lives in the dedup index for the whole window, so
+    a duplicate arriving after the CACHE_TTL expiry is not scored again.
+    """
+    canonical = [dedup_index.canonicalize(h)[0] for h in headlines]
+    unique = list(dict.fromkeys(canonical))
+    scored = {c: dedup_index.sentiment(c) for c in unique}
+    missing = [c for c in unique if scored[c] is None]
+    for c, sentiment in zip(missing, await score_headlines(missing, redis_client) if missing else []):
+        dedup_index.remember(c, sentiment)
+        scored[c] = sentiment
+
+    results = []
+    for h, c in zip(headlines, canonical):
+        sentiment = dict(scored[c])
+        if c != h:
+            sentiment["duplicate_of"] = c
+        results.append(sentiment)
+    duplicates = len(headlines) - len(unique)
+    if duplicates:
+        logging.info(f"Collapsed {duplicates} near-duplicate headlines")
+    return results
+
+async def score_headlines(headlines: List[str], redis_client) -> List[dict]:
     results = [None] * len(headlines)
     uncached = []
     indices = []
 
-    # 1️⃣ Check cache
-    for i, h in enumerate(headlines):
-        key = f"news:{hash_text(h)}"
-        cached = await redis_client.get(key)
+    # 1️⃣ Check cache: one MGET round trip for every headline
+    keys = [f"news:{hash_text(h)}" for h in headlines]
+    cached_values = await redis_client.mget(keys) if keys else []
+    for i, (h, cached) in enumerate(zip(headlines, cached_values)):
         if cached:
             results[i] = json.loads(cached)
         else:
             uncached.append(h)
             indices.append(i)
 
-    # 2️⃣ Batch process uncached (simple batching stub)
-    BATCH_SIZE = 5
-    for i in range(0, len(uncached), BATCH_SIZE):
-        batch = uncached[i:i+BATCH_SIZE]
-        # here you could build a combined prompt for the batch
-        # for now, call parse_sentiment individually:
-        tasks = [parse_sentiment(txt) for txt in batch]
-        batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-        for j, res in enumerate(batch_results):
-            idx = indices[i+j]
-            sentiment = res if isinstance(res, dict) else {"directional_bias": 0.0, "tone": "neutral", "urgency": "low"}
+    if not uncached:
+        return results
+
+    # 2️⃣ Local tier first; escalate only ambiguous headlines to the LLM
+    with span("news.local_sentiment"):
+        local = local_scorer.score_batch(uncached)
+    escalated = []
+    for j, (idx, sentiment) in enumerate(zip(indices, local_scorer.to_sentiments(local))):
+        if local["escalate"][j]:
+            escalated.append(idx)
+        else:
             results[idx] = sentiment
-            await redis_client.set(f"news:{hash_text(batch[j])}", json.dumps(sentiment), ex=CACHE_TTL)
+
+    # 3️⃣ Score escalated headlines with multi-headline LLM prompts
+    with span("news.llm_sentiment"):
+        scored = await score_uncached([headlines[idx] for idx in escalated])
+    for idx, sentiment in zip(escalated, scored):
+        results[idx] = {**sentiment, "source": "llm"}
+    logging.info(f"Sentiment: {len(uncached) - len(escalated)} local, {len(escalated)} escalated to LLM "
+                 f"(escalation rate {local_scorer.escalation_rate:.1%} since start)")
+
+    # 4️⃣ Write back: one pipelined round trip of SET ... EX
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for idx in indices:
+            pipe.set(keys[idx], json.dumps(results[idx]), ex=CACHE_TTL)
+        await pipe.execute()
 
     return results
 
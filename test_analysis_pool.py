@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from bot_engine.analysis_pool import AnalysisPool, analyze_bars, structure_from_analysis
+
+def _universe(n_symbols=6, n_bars=200, seed=3):
+    rng = np.random.default_rng(seed)
+    universe = {}
+    for i in range(n_symbols):
+        n = n_bars - 17 * i   # uneven window lengths
+        close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+        opens = close - rng.normal(0, 1.0, n)
+        universe[f"SYM{i}"] = {"open": opens, "close": close,
+                               "high": np.maximum(opens, close) + rng.random(n),
+                               "low": np.minimum(opens, close) - rng.random(n)}
+    return universe
+
+def test_process_pool_matches_inline_analysis():
+    universe = _universe()
+    with AnalysisPool(processes=0) as inline:
+        expected = inline.analyze(universe)
+    with AnalysisPool(processes=2) as pool:
+        got = pool.analyze(universe)
+        # the shared block is reused for a second cycle with fewer symbols
+        again = pool.analyze({"SYM5": universe["SYM5"]})
+    assert got == expected
+    assert again["SYM5"] == expected["SYM5"]
+    assert got["SYM5"]["bars"] == 200 - 17 * 5
+    direct = analyze_bars(pd.DataFrame({k: v for k, v in universe["SYM0"].items()}))
+    assert got["SYM0"] == direct
+
+def test_structure_from_analysis():
+    result = analyze_bars(pd.DataFrame(_universe(1)["SYM0"]))
+    structure = structure_from_analysis(result)
+    assert structure["confirmed"] == (result["pattern"] != "undetected")
+    assert structure["sl_buffer"] == result["atr"]
+
+if __name__ == "__main__":
+    test_process_pool_matches_inline_analysis()
+    test_structure_from_analysis()
+    print("All tests passed!")
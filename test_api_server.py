@@ -0,0 +1,81 @@
+import json
+
+import msgpack
+import pyarrow as pa
+from fastapi.testclient import TestClient
+
+from api_server import ARROW_TYPE, MSGPACK_TYPE, app
+
+client = TestClient(app)
+
+ROWS = {
+    "sentiment_score": [0.9, -0.9, 0.1],
+    "urgency": ["high", "high", None],
+    "forecast": [0.8, -0.8, 0.1],
+    "structure_confirmed": [True, True, False],
+    "structure_type": ["breakout", "breakout", None],
+    "sl_buffer": [0.3, 0.3, None],
+    "entry": [2363.75, 1.2345, 150.1],
+    "volatility": [0.05, 0.05, 0.05],
+    "spread": [0.1, 0.1, 0.1],
+    "symbol": ["XAUUSD", "EURUSD", "USDJPY"],
+}
+
+def _post(body, content_type="application/json", accept=None):
+    headers = {"content-type": content_type}
+    if accept:
+        headers["accept"] = accept
+    return client.post("/fuse/batch", content=body, headers=headers)
+
+def test_json_columns_and_records():
+    response = _post(json.dumps(ROWS))
+    assert response.status_code == 200
+    table = response.json()
+    assert table["symbol"] == ["XAUUSD", "EURUSD", "USDJPY"]
+    assert table["decision"][:2] == ["entry", "entry"]
+    assert table["direction"][:2] == ["buy", "sell"]
+
+    records = [dict(zip(ROWS, values)) for values in zip(*ROWS.values())]
+    assert _post(json.dumps(records)).json() == table
+
+def test_msgpack_round_trip():
+    response = _post(msgpack.packb(ROWS), MSGPACK_TYPE)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MSGPACK_TYPE
+    table = msgpack.unpackb(response.content, raw=False)
+    assert table == _post(json.dumps(ROWS)).json()
+
+def test_arrow_round_trip():
+    batch = pa.RecordBatch.from_pydict(ROWS)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    response = _post(sink.getvalue().to_pybytes(), ARROW_TYPE)
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(response.content).read_all().to_pydict()
+    assert table["decision"][:2] == ["entry", "entry"]
+
+def test_arrow_nulls_in_required_column():
+    columns = dict(ROWS, entry=[2363.75, None, 150.1])
+    batch = pa.RecordBatch.from_pydict(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    response = _post(sink.getvalue().to_pybytes(), ARROW_TYPE)
+    assert response.status_code == 400
+    assert "entry" in response.json()["detail"]
+
+def test_invalid_columns_are_400():
+    cases = [
+        dict(ROWS, entry=2363.75),                       # scalar instead of a column
+        dict(ROWS, entry=["2363.75", "x", "1"]),         # non-numeric
+        dict(ROWS, entry=[2363.75, None, 150.1]),        # null in a required column
+        dict(ROWS, spread=[[0.1], [0.1], [0.1]]),        # nested
+        dict(ROWS, forecast=[0.8, -0.8]),                # length mismatch
+        {k: v for k, v in ROWS.items() if k != "volatility"},
+    ]
+    for body in cases:
+        response = _post(json.dumps(body))
+        assert response.status_code == 400, body
+    assert _post(msgpack.packb(dict(ROWS, forecast={"a": 1})), MSGPACK_TYPE).status_code == 400
+    assert _post(b"not json").status_code == 400
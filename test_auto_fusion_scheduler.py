@@ -0,0 +1,31 @@
+import os
+import threading
+import time
+
+os.environ.setdefault("MT5_BACKEND", "sim")
+
+import auto_fusion_scheduler
+
+def test_batch_runs_symbols_concurrently(monkeypatch):
+    started = []
+    barrier = threading.Barrier(3, timeout=2)
+
+    def process_symbol(symbol, market_state):
+        started.append(symbol)
+        if symbol == "BROKEN":
+            raise RuntimeError("boom")
+        barrier.wait()               # every symbol blocks, as on a slow EA ack
+        time.sleep(0.2)
+
+    monkeypatch.setattr(auto_fusion_scheduler, "refresh_calendar", lambda: None)
+    monkeypatch.setattr(auto_fusion_scheduler, "process_symbol", process_symbol)
+    monkeypatch.setattr(auto_fusion_scheduler, "get_normalized_market_states",
+                        lambda symbols, timeframe, closed_at: {s: {"symbol": s} for s in symbols if s != "GONE"})
+    jobs = [("EURUSD", "M5"), ("XAUUSD", "M5"), ("GBPJPY", "M15"), ("GONE", "M5"), ("BROKEN", "M15")]
+    began = time.monotonic()
+    auto_fusion_scheduler.job(1_750_000_000, jobs, max_workers=4)
+    assert time.monotonic() - began < 0.5
+    assert sorted(started) == ["BROKEN", "EURUSD", "GBPJPY", "XAUUSD"]
+
+def test_import_builds_no_scheduler():
+    assert not hasattr(auto_fusion_scheduler, "scheduler")
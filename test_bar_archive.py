@@ -0,0 +1,71 @@
+import tempfile
+
+import numpy as np
+
+from bot_engine.bar_archive import INITIAL_CAPACITY, BarArchive, BarSeries
+
+T0 = 1_700_000_000
+
+def _bars(start, n, price=1.0):
+    t = T0 + 60 * np.arange(start, start + n)
+    p = np.full(n, price) + np.arange(n)
+    return {"time": t, "open": p, "high": p + 0.5, "low": p - 0.5, "close": p,
+            "tick_volume": np.arange(n), "spread": np.ones(n), "real_volume": np.zeros(n)}
+
+def test_append_overlap_and_range_queries():
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = BarArchive(tmp)
+        assert archive.append("EURUSD", "M1", _bars(0, 10)) == 10
+        # forming bar rewritten in place, older bars ignored, newer appended
+        assert archive.append("EURUSD", "M1", _bars(5, 10, price=100.0)) == 5
+        cols = archive.slice("EURUSD", "M1")
+        assert len(cols["time"]) == 15
+        assert np.all(np.diff(cols["time"]) == 60)
+        assert cols["close"][8] == 9.0 and cols["close"][9] == 104.0
+
+        window = archive.slice("EURUSD", "M1", start=T0 + 60 * 3, end=T0 + 60 * 7)
+        assert window["time"].tolist() == [T0 + 60 * k for k in range(3, 7)]
+        assert len(archive.slice("EURUSD", "M1", start=T0 + 60 * 100)["time"]) == 0
+        assert len(archive.slice("GBPJPY", "M1")["time"]) == 0
+
+        df = archive.frame("EURUSD", "M1", start=T0 + 60 * 3, end=T0 + 60 * 7)
+        assert list(df["close"]) == [4.0, 5.0, 6.0, 7.0]
+        assert str(df["time"].dtype) == "datetime64[s]"
+
+def test_reader_sees_only_committed_rows_across_growth():
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = BarArchive(tmp, price_dtype="float32", volume_dtype="int32")
+        reader = BarArchive(tmp)
+        writer.append("XAUUSD", "M5", _bars(0, 100))
+        assert len(reader.series("XAUUSD", "M5")) == 100
+        writer.append("XAUUSD", "M5", _bars(100, INITIAL_CAPACITY * 2))
+        cols = reader.slice("XAUUSD", "M5")
+        assert len(cols["time"]) == 100 + INITIAL_CAPACITY * 2
+        # dtypes are fixed at creation, whatever the reader asked for
+        assert cols["close"].dtype == np.float32 and cols["tick_volume"].dtype == np.int32
+        assert not cols["close"].flags.writeable
+
+def test_reader_opened_before_the_series_exists_learns_its_dtypes():
+    with tempfile.TemporaryDirectory() as tmp:
+        reader = BarArchive(tmp).series("XAUUSD", "M1")     # float64 defaults, nothing on disk yet
+        assert len(reader) == 0
+        writer = BarArchive(tmp, price_dtype="float32", volume_dtype="int32")
+        writer.append("XAUUSD", "M1", _bars(0, 10))
+        cols = reader.slice()
+        assert cols["close"].dtype == np.float32 and cols["close"].tolist() == list(map(float, range(1, 11)))
+        assert cols["tick_volume"].dtype == np.int32
+
+def test_frame_wraps_memmap_without_copy():
+    with tempfile.TemporaryDirectory() as tmp:
+        series = BarSeries(tmp)
+        series.append(_bars(0, 50))
+        view = series.slice()["close"]
+        df = series.frame()
+        assert np.shares_memory(df["close"].to_numpy(), view)
+
+if __name__ == "__main__":
+    test_append_overlap_and_range_queries()
+    test_reader_sees_only_committed_rows_across_growth()
+    test_reader_opened_before_the_series_exists_learns_its_dtypes()
+    test_frame_wraps_memmap_without_copy()
+    print("All tests passed!")
@@ -0,0 +1,136 @@
+from datetime import datetime, timezone
+
+from bot_engine import economic_calendar
+from bot_engine.economic_calendar import CalendarIndex, parse_calendar_xml, symbol_currencies
+from bot_engine.rule_engine import check_guardrails
+
+FIXTURE_XML = """<?xml version="1.0" encoding="windows-1252"?>
+<weeklyevents>
+<event><title>Non-Farm Employment Change</title><country>USD</country><date>07-04-2025</date>
+<time>12:30pm</time><impact>High</impact><forecast>110K</forecast><previous>139K</previous></event>
+<event><title>ECB President Lagarde Speaks</title><country>EUR</country><date>07-04-2025</date>
+<time>12:40pm</time><impact>High</impact><forecast></forecast><previous></previous></event>
+<event><title>Final Services PMI</title><country>USD</country><date>07-04-2025</date>
+<time>1:45pm</time><impact>Medium</impact><forecast></forecast><previous></previous></event>
+<event><title>Bank Holiday</title><country>USD</country><date>07-04-2025</date>
+<time>All Day</time><impact>Holiday</impact><forecast></forecast><previous></previous></event>
+<event><title>Trade Balance</title><country>JPY</country><date>07-03-2025</date>
+<time>11:50pm</time><impact>Low</impact><forecast></forecast><previous></previous></event>
+</weeklyevents>"""
+
+NFP = datetime(2025, 7, 4, 12, 30, tzinfo=timezone.utc).timestamp()
+
+def _calendar():
+    calendar = CalendarIndex()
+    calendar.refresh(parse_calendar_xml(FIXTURE_XML))
+    return calendar
+
+def test_parse_calendar_xml():
+    events = parse_calendar_xml(FIXTURE_XML)
+    assert [e["title"] for e in events] == ["Non-Farm Employment Change", "ECB President Lagarde Speaks",
+                                            "Final Services PMI", "Trade Balance"]   # all-day skipped
+    assert events[0] == {"title": "Non-Farm Employment Change", "currency": "USD", "impact": "High",
+                         "time": NFP, "forecast": "110K", "previous": "139K"}
+    shifted = parse_calendar_xml(FIXTURE_XML, utc_offset_hours=-4)     # feed in New York time
+    assert shifted[0]["time"] == NFP + 4 * 3600
+
+def test_symbol_currencies():
+    assert symbol_currencies("EURUSD") == ("EUR", "USD")
+    assert symbol_currencies("gbpjpy.m") == ("GBP", "JPY")
+    assert symbol_currencies("XAUUSD") == ("XAU", "USD")
+
+def test_blackout_covering_lookups():
+    calendar = _calendar()
+    # overlapping NFP (12:15-12:45) and Lagarde (12:25-12:55) windows
+    assert calendar.blackout_event("EURUSD", NFP - 15 * 60)["title"] == "Non-Farm Employment Change"
+    assert calendar.blackout_event("EURUSD", NFP + 20 * 60)["title"] == "ECB President Lagarde Speaks"
+    assert calendar.blackout_event("XAUUSD", NFP + 20 * 60) is None      # USD-only: NFP window is over
+    assert calendar.blackout_event("EURUSD", NFP - 16 * 60) is None
+    assert calendar.blackout_event("EURUSD", NFP + 26 * 60) is None
+    # medium impact blocks only when configured
+    pmi = NFP + 75 * 60
+    assert not calendar.in_blackout("XAUUSD", pmi)
+    strict = CalendarIndex(blackout={"High": (15, 15), "Medium": (5, 5)})
+    strict.refresh(parse_calendar_xml(FIXTURE_XML))
+    assert strict.in_blackout("XAUUSD", pmi + 5 * 60)
+    assert not strict.in_blackout("XAUUSD", pmi + 6 * 60)
+    # low impact never blocks
+    assert calendar.blackout_event("GBPJPY", NFP - 12 * 3600 - 40 * 60) is None
+
+def test_news_context_nearest_high_impact():
+    calendar = _calendar()
+    context = calendar.news_context("EURUSD", NFP - 60 * 60)
+    assert context["event"] == "Non-Farm Employment Change"
+    assert context["minutes_to_event"] == 60.0
+    assert context["blackout"] is None
+    after = calendar.news_context("EURUSD", NFP + 39 * 60)
+    assert after["event"] == "ECB President Lagarde Speaks"
+    assert after["minutes_to_event"] == -29.0
+    assert calendar.news_context("GBPJPY", NFP) == {"blackout": None}
+    assert calendar.news_context("XAUUSD", NFP + 75 * 60, min_impact="Medium")["event"] == "Final Services PMI"
+
+def test_incremental_refresh():
+    calendar = _calendar()
+    events = parse_calendar_xml(FIXTURE_XML)
+    assert calendar.refresh(events) == 0
+    events[1] = dict(events[1], time=events[1]["time"] + 3600)          # Lagarde moved an hour
+    assert calendar.refresh(events) == 1
+    assert calendar.blackout_event("EURUSD", NFP + 20 * 60) is None
+    assert calendar.refresh([e for e in events if e["currency"] != "USD"]) == 1
+    assert not calendar.in_blackout("XAUUSD", NFP)
+
+def test_guardrails_block_inside_blackout():
+    calendar = _calendar()
+    market_state = {"spread": 0.1, "median_spread": 0.1}
+    decision = {"meta": {"sentiment": {"score": 0.9}}}
+    allowed, reason = check_guardrails(market_state, decision, calendar.news_context("EURUSD", NFP - 10 * 60))
+    assert not allowed and reason == "News blackout: Non-Farm Employment Change"
+
+def test_guardrails_still_honour_the_old_news_context(monkeypatch):
+    from journal import performance_monitor
+    monkeypatch.setattr(performance_monitor, "compute_performance_metrics", lambda: {})
+    market_state = {"spread": 0.1, "median_spread": 0.1}
+    decision = {"meta": {"sentiment": {"score": 0.9}}}
+    assert check_guardrails(market_state, decision, {"impact": "high", "minutes_to_event": -10}) == \
+        (False, "High-impact news window")
+    assert check_guardrails(market_state, decision, {"impact": "high", "minutes_to_event": 40}) == (True, "OK")
+    # the calendar's own context decides by its blackout field alone
+    assert check_guardrails(market_state, decision, {"blackout": None, "impact": "high",
+                                                     "minutes_to_event": 10}) == (True, "OK")
+
+def test_refresh_calendar_backs_off_after_failures(monkeypatch):
+    calls = []
+    clock = [1_000_000.0]
+
+    def failing_get(url, timeout):
+        calls.append(url)
+        raise ConnectionError("offline")
+
+    monkeypatch.setattr(economic_calendar.requests, "get", failing_get)
+    monkeypatch.setattr(economic_calendar.time, "time", lambda: clock[0])
+    monkeypatch.setattr(economic_calendar, "CALENDAR", CalendarIndex())
+    monkeypatch.setattr(economic_calendar, "_refresh_state", {"failures": 0, "retry_at": 0.0})
+
+    economic_calendar.refresh_calendar()
+    economic_calendar.refresh_calendar()
+    assert len(calls) == 1                       # backing off: no second fetch
+    clock[0] += economic_calendar.RETRY_BASE_SECONDS
+    economic_calendar.refresh_calendar()
+    assert len(calls) == 2
+    clock[0] += economic_calendar.RETRY_BASE_SECONDS    # second failure doubled the delay
+    economic_calendar.refresh_calendar()
+    assert len(calls) == 2
+    clock[0] += economic_calendar.RETRY_BASE_SECONDS
+    economic_calendar.refresh_calendar()
+    assert len(calls) == 3
+
+    class Response:
+        text = FIXTURE_XML
+
+        def raise_for_status(self):
+            pass
+
+    monkeypatch.setattr(economic_calendar.requests, "get", lambda url, timeout: Response())
+    clock[0] += economic_calendar.RETRY_MAX_SECONDS
+    assert economic_calendar.refresh_calendar().in_blackout("EURUSD", NFP)
+    assert economic_calendar._refresh_state == {"failures": 0, "retry_at": 0.0}
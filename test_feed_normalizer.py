@@ -0,0 +1,148 @@
+import os
+from types import SimpleNamespace
+
+os.environ.setdefault("MT5_BACKEND", "sim")
+
+import numpy as np
+import pytest
+
+from bot_engine import feed_normalizer
+from bot_engine.feed_normalizer import BAR_DTYPE, BarRingBuffer, MarketDataCache
+
+def _bars(times, close=None):
+    rates = np.zeros(len(times), dtype=BAR_DTYPE)
+    rates["time"] = times
+    rates["close"] = close if close is not None else np.asarray(times, dtype=float)
+    rates["open"] = rates["high"] = rates["low"] = rates["close"]
+    rates["tick_volume"] = 1
+    return rates
+
+class FakeTerminal:
+    """Minimal MT5 API: M1 bars up to `now`, one tick per symbol, optional dropped calls."""
+
+    TIMEFRAME_M1 = 1
+
+    def __init__(self, now=600):
+        self.now = now
+        self.initialized = 0
+        self.drop_next = 0
+        self.requests = []
+        self.no_tick = set()
+        self.no_rates = set()
+
+    def initialize(self):
+        self.initialized += 1
+        return True
+
+    def shutdown(self):
+        pass
+
+    def last_error(self):
+        return (0, "ok")
+
+    def copy_rates_from_pos(self, symbol, timeframe, start, count):
+        self.requests.append(count)
+        if symbol in self.no_rates:
+            return None
+        if self.drop_next:
+            self.drop_next -= 1
+            return None
+        last = self.now - self.now % 60
+        times = np.arange(last - 60 * (count - 1), last + 60, 60)
+        return _bars(times[times >= 0], close=times[times >= 0] + 0.5)
+
+    def symbol_info_tick(self, symbol):
+        return None if symbol in self.no_tick else SimpleNamespace(bid=1.0, ask=1.25)
+
+@pytest.fixture
+def terminal(monkeypatch):
+    fake = FakeTerminal()
+    monkeypatch.setattr(feed_normalizer, "mt5", fake)
+    return fake
+
+def test_merge_rewrites_forming_bar_and_appends_newer():
+    ring = BarRingBuffer(capacity=8)
+    assert ring.merge(_bars([0, 60, 120])) == 3
+    assert ring.merge(_bars([60, 120], close=[9.0, 7.0])) == 0        # forming bar updated, older ignored
+    assert list(ring.tail()["close"]) == [0.0, 60.0, 7.0]
+    assert ring.merge(_bars([120, 180, 240], close=[8.0, 180.0, 240.0])) == 2
+    assert list(ring.tail()["time"]) == [0, 60, 120, 180, 240]
+    assert list(ring.tail()["close"]) == [0.0, 60.0, 8.0, 180.0, 240.0]
+    assert ring.merge(_bars([])) == 0
+    assert ring.last_time == 240
+
+def test_merge_wraps_around_capacity():
+    ring = BarRingBuffer(capacity=4)
+    ring.merge(_bars([0, 60, 120]))
+    ring.merge(_bars([180, 240, 300]))
+    assert ring.size == 4
+    assert list(ring.tail()["time"]) == [120, 180, 240, 300]
+    assert list(ring.tail(2)["time"]) == [240, 300]
+    # the forming bar sits in the slot just before the write cursor, even across the wrap
+    ring.merge(_bars([300], close=[1.5]))
+    assert ring.last()["close"] == 1.5
+    assert list(ring.tail()["time"]) == [120, 180, 240, 300]
+    # more new bars than capacity: only the newest capacity bars are kept
+    ring.merge(_bars(np.arange(360, 360 + 60 * 10, 60)))
+    assert list(ring.tail()["time"]) == list(range(360 + 60 * 6, 360 + 60 * 10, 60))
+
+def test_refresh_is_incremental_then_reseeds_after_a_gap(terminal):
+    cache = MarketDataCache(capacity=16, incremental=3)
+    ring = cache.refresh("EURUSD")
+    assert terminal.requests == [16]
+    assert ring.last_time == 600
+
+    terminal.now = 660                             # one new bar: within the incremental window
+    cache.refresh("EURUSD")
+    assert terminal.requests[-1] == 3
+    assert cache.stats["full_fetches"] == 1
+    assert list(ring.tail(3)["time"]) == [540, 600, 660]
+
+    terminal.now = 660 + 60 * 10                   # gap wider than 3 bars: clear and reseed
+    cache.refresh("EURUSD")
+    assert terminal.requests[-2:] == [3, 16]
+    assert cache.stats["full_fetches"] == 2
+    times = ring.tail()["time"]
+    assert ring.size == 16 and times[-1] == terminal.now
+    assert np.all(np.diff(times) == 60)            # no stale bars left before the gap
+
+def test_refresh_reconnects_when_the_terminal_drops(terminal):
+    cache = MarketDataCache(capacity=8, incremental=2)
+    cache.refresh("EURUSD")
+    terminal.drop_next = 1
+    terminal.now += 60
+    assert cache.refresh("EURUSD").last_time == terminal.now
+    assert terminal.initialized == 2
+
+def test_snapshot_columns_and_row_dicts(terminal):
+    terminal.no_tick.add("GBPJPY")
+    terminal.no_rates.add("USDCHF")
+    snap = MarketDataCache(capacity=8).snapshot(["EURUSD", "GBPJPY", "USDCHF", "XAUUSD"])
+    assert len(snap) == 4
+    assert list(snap.valid) == [True, False, False, True]
+    assert "EURUSD" in snap and "GBPJPY" not in snap and "AUDUSD" not in snap
+    assert snap.get("USDCHF") is None
+    with pytest.raises(KeyError):
+        snap["GBPJPY"]
+    assert snap["EURUSD"] == {"symbol": "EURUSD", "bid": 1.0, "ask": 1.25, "spread": 0.25,
+                              "ohlc": {"open": 600.5, "high": 600.5, "low": 600.5, "close": 600.5},
+                              "volume": 1, "timestamp": "600"}
+    assert list(snap.as_dicts()) == ["EURUSD", "XAUUSD"]
+    assert np.isnan(snap.columns["bid"][1]) and np.isnan(snap.columns["spread"][2])
+
+def test_snapshot_closed_at_picks_the_bar_that_just_closed(terminal):
+    cache = MarketDataCache(capacity=8)
+    forming = cache.snapshot(["EURUSD"])
+    assert forming["EURUSD"]["timestamp"] == "600"
+    # at the 600 boundary the 600 bar is forming: the closed one opened at 540
+    assert cache.snapshot(["EURUSD"], closed_at=600)["EURUSD"]["timestamp"] == "540"
+    # the MT5 bar list has not rolled over yet: the newest bar is the closed one
+    assert cache.snapshot(["EURUSD"], closed_at=660)["EURUSD"]["timestamp"] == "600"
+    # neither of the two newest bars closed before the boundary
+    assert "EURUSD" not in cache.snapshot(["EURUSD"], closed_at=540)
+
+def test_snapshot_closed_at_needs_a_previous_bar(terminal):
+    terminal.now = 0                               # only one bar exists
+    cache = MarketDataCache(capacity=8)
+    assert "EURUSD" not in cache.snapshot(["EURUSD"], closed_at=0)
+    assert cache.snapshot(["EURUSD"], closed_at=60)["EURUSD"]["timestamp"] == "0"
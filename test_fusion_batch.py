@@ -0,0 +1,62 @@
+import numpy as np
+from bot_engine.fusion_engine import fuse_signals, fuse_signals_batch, batch_decision
+
+def _random_universe(n, seed=7):
+    rng = np.random.default_rng(seed)
+    return {
+        "sentiment_score": rng.uniform(-1, 1, n),
+        "sentiment_urgency": rng.choice(["low", "medium", "high", "HIGH"], n),
+        "forecast": rng.uniform(-1, 1, n),
+        "structure_confirmed": rng.random(n) > 0.2,
+        "structure_type": rng.choice(["breakout", "pullback"], n),
+        "sl_buffer": rng.uniform(0, 1, n),
+        "entry": rng.uniform(1, 2500, n),
+        "volatility": rng.uniform(0.01, 0.5, n),
+        "spread": rng.uniform(0.01, 0.2, n),
+        "median_spread": rng.uniform(0.05, 0.15, n),
+        "median_volatility": rng.uniform(0.05, 0.2, n),
+        "data_age": rng.integers(0, 30, n),
+    }
+
+def test_fuse_signals_batch_matches_scalar():
+    cols = _random_universe(2000)
+    table = fuse_signals_batch(**cols)
+    for i in range(len(cols["entry"])):
+        expected = fuse_signals(
+            {"score": cols["sentiment_score"][i], "urgency": str(cols["sentiment_urgency"][i])},
+            cols["forecast"][i],
+            {"confirmed": bool(cols["structure_confirmed"][i]),
+             "type": str(cols["structure_type"][i]),
+             "sl_buffer": cols["sl_buffer"][i]},
+            {"entry": cols["entry"][i], "volatility": cols["volatility"][i],
+             "spread": cols["spread"][i], "median_spread": cols["median_spread"][i],
+             "median_volatility": cols["median_volatility"][i], "data_age": cols["data_age"][i]}
+        )
+        assert batch_decision(table, i) == expected
+    assert set(table["decision"]) == {"block", "no_entry", "entry"}
+
+def test_fuse_signals_batch_defaults():
+    table = fuse_signals_batch([0.9], ["high"], [0.8], [True], ["breakout"], [0.3],
+                               [1.2345], [0.05], [0.1])
+    assert batch_decision(table, 0) == fuse_signals(
+        {"score": 0.9, "urgency": "high"}, 0.8,
+        {"confirmed": True, "type": "breakout", "sl_buffer": 0.3},
+        {"entry": 1.2345, "volatility": 0.05, "spread": 0.1}
+    )
+
+def test_fuse_signals_batch_scalar_inputs():
+    expected = fuse_signals({"score": 0.9, "urgency": "high"}, 0.8,
+                            {"confirmed": True, "type": "breakout", "sl_buffer": 0.3},
+                            {"entry": 1.2345, "volatility": 0.05, "spread": 0.1})
+    table = fuse_signals_batch(0.9, "high", 0.8, True, "breakout", 0.3, 1.2345, 0.05, 0.1)
+    assert len(table["decision"]) == 1 and batch_decision(table, 0) == expected
+    # a scalar sentiment broadcast over array columns
+    table = fuse_signals_batch(0.9, "high", [0.8, -0.8], True, "breakout", 0.3, [1.2345, 1.2345], 0.05, 0.1)
+    assert batch_decision(table, 0) == expected
+    assert table["decision"].tolist() == ["entry", "no_entry"]
+
+if __name__ == "__main__":
+    test_fuse_signals_batch_matches_scalar()
+    test_fuse_signals_batch_defaults()
+    test_fuse_signals_batch_scalar_inputs()
+    print("All tests passed!")
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import time
+
+os.environ.setdefault("MT5_BACKEND", "sim")
+
+import mt5_sim
+from bot_engine import fusion_service
+from bot_engine.feed_normalizer import MARKET_DATA
+from bot_engine.fusion_service import FusionService, feed_from_engine
+
+INPUTS = {
+    "sentiment": {"score": 0.85, "urgency": "high"},
+    "forecast": 0.72,
+    "structure": {"confirmed": True, "type": "breakout", "sl_buffer": 0.5},
+}
+
+def _market_state(symbol="XAUUSD", bid=2363.5, ask=2363.75):
+    return {"symbol": symbol, "bid": bid, "ask": ask, "entry": ask, "volatility": 0.12, "spread": 0.1,
+            "median_spread": 0.1, "median_volatility": 0.1, "data_age": 2}
+
+def test_only_changed_symbols_recompute():
+    service = FusionService()
+    service.update("XAUUSD", market_state=_market_state(), **INPUTS)
+    assert [d["symbol"] for d in service.recompute_dirty()] == ["XAUUSD"]
+    service.update("XAUUSD", market_state=_market_state(), **INPUTS)
+    assert service.recompute_dirty() == []
+    assert service.stats["unchanged"] == 1
+    assert service.stats["recomputed"] == 1
+
+def test_in_place_mutation_is_a_change():
+    service = FusionService()
+    market_state = _market_state()
+    service.update("XAUUSD", market_state=market_state, **INPUTS)
+    service.recompute_dirty()
+    market_state["spread"] = 5.0       # producer reuses and mutates its dict
+    service.update("XAUUSD", market_state=market_state)
+    assert service.stats["unchanged"] == 0
+    assert service.inputs["XAUUSD"]["market_state"] is not market_state
+    assert service.recompute_dirty()[0]["current"]["decision"] == "block"
+
+def test_failing_symbol_does_not_stop_the_others(monkeypatch):
+    real = fusion_service.fuse_signals
+
+    def fuse(sentiment, forecast, structure, market_state, equity):
+        if market_state["symbol"] == "EURUSD":
+            raise RuntimeError("bad input")
+        return real(sentiment, forecast, structure, market_state, equity)
+
+    monkeypatch.setattr(fusion_service, "fuse_signals", fuse)
+
+    async def scenario():
+        service = FusionService(debounce=0)
+        published = []
+        service.subscribe(lambda diff: published.append(diff["symbol"]))
+        task = asyncio.create_task(service.run())
+        for symbol in ("EURUSD", "XAUUSD"):
+            service.update(symbol, market_state=_market_state(symbol), **INPUTS)
+        await asyncio.sleep(0.05)
+        service.update("XAUUSD", forecast=0.1)
+        await asyncio.sleep(0.05)
+        service.stop()
+        await task
+        return service, published
+
+    service, published = asyncio.run(scenario())
+    assert service.stats["errors"] == 1
+    assert published == ["XAUUSD", "XAUUSD"]   # run() kept going after the failure
+
+def test_feed_from_engine_pushes_every_input():
+    mt5_sim.configure(speed=0, start_time=time.time(), latency_ms=0)
+    MARKET_DATA.shutdown()
+
+    async def scenario():
+        service = FusionService(debounce=0)
+        await feed_from_engine(service, ["XAUUSD", "EURUSD"], cycles=1)
+        return service, service.recompute_dirty()
+
+    service, diffs = asyncio.run(scenario())
+    assert set(service.inputs) == {"XAUUSD", "EURUSD"}
+    assert all(set(state) == set(fusion_service.FUSION_INPUTS) for state in service.inputs.values())
+    assert {d["symbol"] for d in diffs} == {"XAUUSD", "EURUSD"}
+
+def test_feed_from_engine_skips_unchanged_markets(monkeypatch):
+    ticks = iter(range(1000))
+
+    def snapshot(symbols, timeframe):
+        # same quotes every poll; only the bar clock and the forming bar move
+        t = next(ticks)
+        return {s: {"symbol": s, "bid": 1.1, "ask": 1.1002, "spread": 0.0002, "timestamp": str(60 * t),
+                    "ohlc": {"open": 1.1, "high": 1.1003, "low": 1.0999, "close": 1.1 + t * 1e-9},
+                    "volume": t} for s in symbols}
+
+    monkeypatch.setattr(fusion_service, "get_normalized_market_states", snapshot)
+
+    async def scenario():
+        service = FusionService(debounce=0)
+        await feed_from_engine(service, ["EURUSD"], interval=0.01, cycles=1)
+        service.recompute_dirty()
+        await feed_from_engine(service, ["EURUSD"], interval=0.01, cycles=3)
+        return service, service.recompute_dirty()
+
+    service, diffs = asyncio.run(scenario())
+    assert diffs == []
+    assert service.stats["recomputed"] == 1
+    assert service.stats["unchanged"] == 3
+    assert "timestamp" not in service.inputs["EURUSD"]["market_state"]
+    assert set(service.inputs["EURUSD"]["sentiment"]) == {"score", "urgency", "direction"}
@@ -0,0 +1,63 @@
+import asyncio
+
+import news_feed
+from bot_engine.headline_dedup import NearDuplicateIndex
+
+T0 = 1_700_000_000.0
+
+def test_syndicated_variants_share_one_canonical():
+    index = NearDuplicateIndex()
+    canonical = "Fed's Powell says rate cuts are not imminent"
+    assert index.canonicalize(canonical, now=T0) == (canonical, False)
+    assert index.canonicalize("FED'S POWELL SAYS RATE CUTS ARE NOT IMMINENT!", now=T0 + 1) == (canonical, True)
+    assert index.canonicalize("Fed's Powell says rate cuts not imminent", now=T0 + 2) == (canonical, True)
+    assert index.canonicalize("ECB keeps rates unchanged, signals patience", now=T0 + 3)[1] is False
+    assert len(index) == 2
+    assert index.stats == {"lookups": 4, "duplicates": 2}
+
+def test_numbers_must_match():
+    index = NearDuplicateIndex()
+    index.canonicalize("US CPI rises 3.2% in May", now=T0)
+    assert index.canonicalize("US CPI rises 3.5% in May", now=T0) == ("US CPI rises 3.5% in May", False)
+
+def test_numbers_with_units_must_match():
+    index = NearDuplicateIndex()
+    index.canonicalize("Fed hikes rates by 25bp to 5.25%", now=T0)
+    assert index.canonicalize("Fed hikes rates by 75bp to 5.25%", now=T0)[1] is False
+    assert index.canonicalize("Fed hikes rates by 25bp to 5.50%", now=T0)[1] is False
+    index.canonicalize("US nonfarm payrolls rise 230K in June", now=T0)
+    assert index.canonicalize("US nonfarm payrolls rise 250K in June", now=T0)[1] is False
+    index.canonicalize("China stimulus tops 1.2M jobs target", now=T0)
+    assert index.canonicalize("China stimulus tops 1.5M jobs target", now=T0)[1] is False
+    assert index.canonicalize("Fed hikes rates by 25bp to 5.25 %!", now=T0) == ("Fed hikes rates by 25bp to 5.25%", True)
+
+def test_window_expiry_drops_canonical_and_sentiment():
+    index = NearDuplicateIndex(window_seconds=3600)
+    index.canonicalize("Gold slumps as dollar firms", now=T0)
+    index.remember("Gold slumps as dollar firms", {"directional_bias": -0.7})
+    assert index.canonicalize("Gold slumps as the dollar firms", now=T0 + 3000)[0] == "Gold slumps as dollar firms"
+    assert index.sentiment("Gold slumps as dollar firms") == {"directional_bias": -0.7}
+
+    assert index.canonicalize("Gold slumps as the dollar firms", now=T0 + 3601) == \
+        ("Gold slumps as the dollar firms", False)
+    assert index.sentiment("Gold slumps as dollar firms") is None
+    assert len(index) == 1
+
+def test_duplicate_after_cache_ttl_reuses_canonical_sentiment(monkeypatch):
+    scored = []
+
+    async def score_headlines(headlines, redis_client):
+        scored.extend(headlines)
+        return [{"directional_bias": 0.8, "tone": "hawkish", "urgency": "high"} for _ in headlines]
+
+    monkeypatch.setattr(news_feed, "score_headlines", score_headlines)
+    monkeypatch.setattr(news_feed, "dedup_index", NearDuplicateIndex())
+    canonical = "BoE hikes rates by 25bp to 5.25%"
+
+    first = asyncio.run(news_feed.get_sentiments([canonical], redis_client=None))
+    # well past CACHE_TTL (the Redis entry is gone) but inside the dedup window
+    assert news_feed.CACHE_TTL < news_feed.dedup_index.window_seconds
+    later = asyncio.run(news_feed.get_sentiments(["BoE hikes rates by 25bp to 5.25 %!"], redis_client=None))
+
+    assert scored == [canonical]
+    assert later[0] == {**first[0], "duplicate_of": canonical}
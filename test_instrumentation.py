@@ -0,0 +1,98 @@
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from bot_engine.instrumentation import (Instrumentation, LatencyHistogram, collect, json_summary, load_dumps,
+                                        prometheus_text)
+
+def test_histogram_percentiles_within_one_percent():
+    rng = random.Random(3)
+    values = [rng.lognormvariate(-7, 1.5) for _ in range(50_000)]   # ~1us .. ~100ms
+    hist = LatencyHistogram()
+    for v in values:
+        hist.record(v)
+    for q in (0.5, 0.9, 0.99, 0.999):
+        exact = float(np.quantile(values, q))
+        assert abs(hist.percentile(q) - exact) <= 0.01 * exact + 1e-6
+    assert hist.count == len(values) and hist.max == max(values)
+    assert abs(hist.total - sum(values)) < 1e-9
+
+def test_spans_decorators_and_disabled_mode():
+    metrics = Instrumentation(enabled=True, service="test")
+
+    @metrics.timed("forecast", symbol_arg="symbol")
+    def forecast(symbol, horizon=1):
+        return horizon
+
+    @metrics.timed("ack", symbol_arg="symbol")
+    async def ack(trade_id, symbol=None):
+        await asyncio.sleep(0.01)
+        return trade_id
+
+    with metrics.span("fusion", "XAUUSD"):
+        pass
+    try:
+        with metrics.span("fusion", "EURUSD"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert forecast("XAUUSD", horizon=3) == 3
+    assert asyncio.run(ack("T1", symbol="XAUUSD")) == "T1"
+
+    assert metrics.histogram("fusion").count == 2              # failed spans are still timed
+    assert metrics.histogram("fusion", "XAUUSD").count == 1
+    assert metrics.histogram("forecast", "XAUUSD").count == 1
+    assert metrics.histogram("ack", "XAUUSD").min >= 0.01
+
+    metrics.enabled = False
+    with metrics.span("fusion", "XAUUSD"):
+        pass
+    forecast("XAUUSD")
+    assert metrics.histogram("fusion").count == 2 and metrics.histogram("forecast").count == 1
+
+def test_dumps_merge_into_metrics_export():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = Instrumentation(enabled=True, service="engine", directory=tmp, dump_seconds=0)
+        api = Instrumentation(enabled=True, service="api", directory=tmp)
+        for i in range(100):
+            engine.record("send", 0.002 + i * 1e-5, "XAUUSD")
+        engine.maybe_dump()
+        assert os.path.exists(os.path.join(tmp, f"engine-{os.getpid()}.json"))
+        worker = Instrumentation(enabled=True, service="engine", directory=tmp)
+        worker.record("send", 0.004, "XAUUSD")
+        worker.dump(os.path.join(tmp, "engine-2.json"))          # a second engine process
+        gone = os.path.join(tmp, "engine-1.json")                 # a process gone for an hour
+        with open(gone, "w") as f:
+            json.dump({"service": "engine", "pid": 1, "dumped_at": time.time() - 3600,
+                       "histograms": [{"stage": "send", "symbol": "", **worker.histogram("send").to_dict()}]}, f)
+        os.utime(gone, (time.time() - 3600, time.time() - 3600))
+        with open(os.path.join(tmp, "broken.json"), "w") as f:
+            f.write("{")
+        api.record("news.fetch", 0.25)
+        api.dump()
+        api.record("news.fetch", 0.25)
+
+        dumped = load_dumps(tmp)
+        assert dumped[("engine", "send", "XAUUSD")].count == 101
+        assert dumped[("engine", "send", "")].max == 0.004
+        assert dumped[("api", "news.fetch", "")].count == 1
+        assert not os.path.exists(gone)                           # cleaned up, not parsed every scrape
+        histograms = collect(api, tmp)
+        assert histograms[("api", "news.fetch", "")].count == 2   # live registry, not its own dump again
+        assert set(histograms) == {("engine", "send", ""), ("engine", "send", "XAUUSD"), ("api", "news.fetch", "")}
+        text = prometheus_text(histograms)
+        assert 'pipeline_stage_latency_seconds_count{service="engine",stage="send",symbol="XAUUSD"} 101' in text
+        assert 'stage="news.fetch",symbol="",quantile="0.99"} 0.25' in text
+        summary = {(s["service"], s["stage"], s["symbol"]): s for s in json_summary(histograms)}
+        assert abs(summary[("engine", "send", "XAUUSD")]["p50"] - 0.0025) < 0.0025 / 64
+
+if __name__ == "__main__":
+    test_histogram_percentiles_within_one_percent()
+    test_spans_decorators_and_disabled_mode()
+    test_dumps_merge_into_metrics_export()
+    print("All tests passed!")
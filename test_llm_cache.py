@@ -0,0 +1,51 @@
+import os
+import tempfile
+import time
+
+from journal.llm_cache import LLMResponseCache
+
+def _cache(tmp, **kwargs):
+    return LLMResponseCache(os.path.join(tmp, "cache.sqlite3"), **kwargs)
+
+def test_llm_cache_hit_miss_and_persistence():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = _cache(tmp)
+        key = cache.make_key("openrouter", "m", [{"role": "user", "content": "review"}], {"temperature": 0.2})
+        assert key == cache.make_key("openrouter", "m", [{"role": "user", "content": "review"}], {"temperature": 0.2})
+        assert key != cache.make_key("openrouter", "m", [{"role": "user", "content": "review"}], {"temperature": 0.3})
+        assert cache.get(key) is None
+        cache.put(key, "8/10 solid setup")
+        assert cache.get(key) == "8/10 solid setup"
+        assert cache.info()["hits"] == 1 and cache.info()["misses"] == 1
+        cache.close()
+
+        reopened = _cache(tmp)
+        assert reopened.get(key) == "8/10 solid setup"
+        reopened.close()
+
+def test_llm_cache_lru_eviction_and_ttl():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = _cache(tmp, max_entries=2)
+        cache.put("a", "1")
+        time.sleep(0.01)
+        cache.put("b", "2")
+        time.sleep(0.01)
+        cache.get("a")              # "b" is now least recently used
+        time.sleep(0.01)
+        cache.put("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1" and cache.get("c") == "3"
+        assert cache.stats["evicted"] == 1
+        cache.close()
+
+        expiring = _cache(tmp, ttl_seconds=0.05)
+        expiring.put("x", "old")
+        time.sleep(0.1)
+        assert expiring.get("x") is None
+        assert expiring.stats["expired"] == 1
+        expiring.close()
+
+if __name__ == "__main__":
+    test_llm_cache_hit_miss_and_persistence()
+    test_llm_cache_lru_eviction_and_ttl()
+    print("All tests passed!")
@@ -0,0 +1,101 @@
+import asyncio
+import concurrent.futures
+import time
+
+import httpx
+import pytest
+
+import llm_gateway
+from llm_gateway import LLMError, LLMGateway, TokenBucket
+
+PROVIDERS = {"test": {"url": "https://llm.test/v1/chat/completions", "api_key_env": "TEST_LLM_KEY",
+                      "max_concurrency": 4, "requests_per_minute": 6000, "tokens_per_minute": 10_000_000}}
+MESSAGES = [{"role": "user", "content": "ping"}]
+
+def _reply(text="pong"):
+    return httpx.Response(200, json={"choices": [{"message": {"content": text}}]})
+
+def _gateway(handler):
+    gateway = LLMGateway(PROVIDERS)
+    gateway._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return gateway
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(llm_gateway, "BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(llm_gateway, "MAX_RETRIES", 2)
+
+def test_token_bucket_limits_rate():
+    async def drain():
+        bucket = TokenBucket(rate_per_minute=600, capacity=2)    # 10 tokens/s, burst of 2
+        started = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire(1)
+        return time.monotonic() - started
+
+    assert 0.25 <= asyncio.run(drain()) < 1.0      # 2 from the burst, 3 at 0.1s each
+
+def test_identical_inflight_requests_coalesce():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.1)
+        return _reply()
+
+    gateway = _gateway(handler)
+
+    async def burst():
+        return await asyncio.gather(*[gateway.chat(MESSAGES, model="m", provider="test") for _ in range(3)],
+                                    gateway.chat(MESSAGES, model="other", provider="test"))
+
+    assert asyncio.run(burst()) == ["pong"] * 4
+    assert len(calls) == 2
+    assert gateway.stats["coalesced"] == 2
+
+def test_retries_429_then_succeeds():
+    statuses = iter([429, 503])
+
+    def handler(request):
+        status = next(statuses, 200)
+        if status != 200:
+            return httpx.Response(status, headers={"Retry-After": "0"})
+        return _reply("ok")
+
+    gateway = _gateway(handler)
+    assert gateway.chat_sync(MESSAGES, model="m", provider="test") == "ok"
+    assert gateway.stats["retries"] == 2
+    assert gateway.stats["requests"] == 3
+
+def test_gives_up_after_max_retries_and_skips_client_errors():
+    seen = []
+
+    def handler(request):
+        seen.append(request.url.path)
+        return httpx.Response(500 if b'"retry"' in request.content else 400, text="nope")
+
+    gateway = _gateway(handler)
+    with pytest.raises(LLMError, match="after 3 attempts"):
+        gateway.chat_sync(MESSAGES, model="retry", provider="test")
+    assert len(seen) == 3
+    with pytest.raises(LLMError, match="400"):
+        gateway.chat_sync(MESSAGES, model="fatal", provider="test")
+    assert len(seen) == 4
+    assert gateway.stats["errors"] == 2
+
+def test_cancelled_leader_releases_waiters():
+    async def handler(request):
+        await asyncio.sleep(30)
+        return _reply()
+
+    gateway = _gateway(handler)
+    leader = gateway._submit(MESSAGES, "m", "test", None, None, 60)
+    time.sleep(0.05)
+    waiter = gateway._submit(MESSAGES, "m", "test", None, None, 60)
+    time.sleep(0.05)
+    leader.cancel()
+    with pytest.raises(LLMError, match="cancelled"):
+        waiter.result(timeout=2)
+    with pytest.raises(concurrent.futures.CancelledError):
+        leader.result(timeout=2)
+    assert gateway._inflight == {}
@@ -0,0 +1,67 @@
+from bot_engine.local_sentiment import LocalSentimentScorer
+
+# headline -> (bias sign, tone, urgency, escalate to LLM)
+FIXTURES = [
+    ("EUR/USD edges higher in quiet trade", (1, "neutral", "low", False)),
+    ("Fed unexpectedly hikes rates by 75bp", (1, "hawkish", "high", False)),
+    ("ECB signals easing as eurozone slides toward recession", (-1, "dovish", "medium", False)),
+    ("Gold steady ahead of FOMC minutes", (0, "neutral", "low", False)),
+    ("BoJ intervention shock sends yen soaring", (0, "neutral", "high", True)),
+    ("Sterling falls after weak retail sales", (-1, "neutral", "low", False)),
+    ("RBA holds cash rate unchanged", (0, "neutral", "low", False)),
+    ("Dollar rises", (1, "neutral", "low", True)),
+]
+
+def _sign(x):
+    return (x > 0) - (x < 0)
+
+def test_local_scorer_fixtures():
+    scorer = LocalSentimentScorer()
+    headlines = [h for h, _ in FIXTURES]
+    scores = scorer.score_batch(headlines)
+    sentiments = scorer.to_sentiments(scores)
+    for i, (headline, (sign, tone, urgency, escalate)) in enumerate(FIXTURES):
+        got = sentiments[i]
+        assert _sign(got["directional_bias"]) == sign, headline
+        assert -1.0 <= got["directional_bias"] <= 1.0
+        assert got["tone"] == tone, headline
+        assert got["urgency"] == urgency, headline
+        assert bool(scores["escalate"][i]) == escalate, headline
+    assert scorer.stats == {"scored": len(FIXTURES), "escalated": 2}
+    assert scorer.escalation_rate == 2 / len(FIXTURES)
+
+def test_low_coverage_headlines_escalate():
+    scorer = LocalSentimentScorer()
+    headlines = [
+        "Bank of Japan intervenes to prop up yen",
+        "SNB stuns markets with 50bp move",
+        "US jobless claims 230K vs 225K expected",
+        "Fed Powell says rate cuts are not imminent",
+    ]
+    scores = scorer.score_batch(headlines)
+    for i, headline in enumerate(headlines):
+        assert scores["confidence"][i] < 0.3, headline
+        assert scores["escalate"][i], headline
+    # no lexicon hit at all is no evidence of neutrality
+    assert list(scores["confidence"][:3]) == [0.0, 0.0, 0.0]
+
+def test_negation_flips_scope_and_lowers_confidence():
+    scorer = LocalSentimentScorer()
+    scores = scorer.score_batch(["ECB cuts rates", "ECB won't cut rates", "ECB cut not expected"])
+    bias, confidence = scores["directional_bias"], scores["confidence"]
+    assert bias[0] < 0 and scores["tone"][0] == "dovish"
+    assert bias[1] > 0 and scores["tone"][1] == "hawkish"
+    assert abs(confidence[1] - confidence[0] * 0.5) < 1e-3
+    assert scores["escalate"][1] and scores["escalate"][2]
+
+def test_local_scorer_empty_batch():
+    scorer = LocalSentimentScorer()
+    assert scorer.to_sentiments(scorer.score_batch([])) == []
+    assert scorer.escalation_rate == 0.0
+
+if __name__ == "__main__":
+    test_local_scorer_fixtures()
+    test_low_coverage_headlines_escalate()
+    test_negation_flips_scope_and_lowers_confidence()
+    test_local_scorer_empty_batch()
+    print("All tests passed!")
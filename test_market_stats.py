@@ -0,0 +1,56 @@
+import os
+import random
+import tempfile
+
+import numpy as np
+
+from bot_engine.market_stats import MIN_BUCKET_SAMPLES, MarketStatsService, P2Quantile
+
+MONDAY_0800 = 1_700_467_200.0   # 2023-11-20 08:00 UTC
+MONDAY_2200 = MONDAY_0800 + 14 * 3600
+
+def test_p2_median_tracks_exact_median():
+    rng = random.Random(7)
+    for draw in (lambda: rng.lognormvariate(-9, 0.4), lambda: rng.gauss(5, 2), rng.random):
+        est = P2Quantile(0.5)
+        xs = [draw() for _ in range(10_000)]
+        for x in xs:
+            est.add(x)
+        exact = float(np.median(xs))
+        assert abs(est.value() - exact) <= 0.02 * abs(exact) + 1e-12
+
+def test_small_samples_and_empty():
+    est = P2Quantile(0.5)
+    assert est.value() is None
+    for x in (3.0, 1.0, 2.0):
+        est.add(x)
+    assert est.value() == 2.0
+
+def test_hour_of_week_buckets_and_warm_load():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stats.json")
+        stats = MarketStatsService(path)
+        for i in range(MIN_BUCKET_SAMPLES):
+            stats.observe({"symbol": "EURUSD", "spread": 0.0001, "volatility": 0.001}, t=MONDAY_0800 + i)
+            stats.observe({"symbol": "EURUSD", "spread": 0.0005, "volatility": 0.0005}, t=MONDAY_2200 + i)
+        assert stats.median("EURUSD", "spread", t=MONDAY_0800) == 0.0001
+        assert stats.median("EURUSD", "spread", t=MONDAY_2200) == 0.0005
+        # an hour with no history falls back to the symbol-wide median
+        assert 0.0001 <= stats.median("EURUSD", "spread", t=MONDAY_0800 + 3600) <= 0.0005
+        assert stats.median("GBPJPY", "spread") is None
+
+        stats.save()
+        warm = MarketStatsService.load(path)
+        state = warm.enrich({"symbol": "EURUSD", "spread": 0.0002,
+                             "ohlc": {"open": 1.0, "high": 1.002, "low": 0.999, "close": 1.001}},
+                            t=MONDAY_0800)
+        assert state["median_spread"] == 0.0001
+        assert state["median_volatility"] == 0.001
+        assert abs(state["volatility"] - 0.003) < 1e-12
+        assert "median_spread" not in warm.enrich({"symbol": "GBPJPY", "spread": 0.02})
+
+if __name__ == "__main__":
+    test_p2_median_tracks_exact_median()
+    test_small_samples_and_empty()
+    test_hour_of_week_buckets_and_warm_load()
+    print("All tests passed!")
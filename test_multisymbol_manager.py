@@ -0,0 +1,180 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+os.environ.setdefault("MT5_BACKEND", "sim")
+
+import pytest
+
+import mt5_bridge_client
+import mt5_sim
+from bot_engine import multisymbol_manager
+from bot_engine.feed_normalizer import MARKET_DATA
+from journal import performance_monitor, trade_journaler
+
+def _fake_ea(command_dir, ack_dir, stop):
+    """Stands in for the MT5 EA: acknowledges every trade command it finds."""
+    while not stop.is_set():
+        for name in os.listdir(command_dir):
+            if name.endswith(".json"):
+                with open(os.path.join(command_dir, name)) as f:
+                    trade = json.load(f)
+                os.remove(os.path.join(command_dir, name))
+                with open(os.path.join(ack_dir, name), "w") as f:
+                    json.dump({"status": "filled", "trade_id": trade["trade_id"]}, f)
+        time.sleep(0.02)
+
+@pytest.fixture
+def sim_pipeline(tmp_path, monkeypatch):
+    mt5_sim.configure(speed=0, start_time=time.time(), latency_ms=0)
+    MARKET_DATA.shutdown()
+    for name in ("commands", "acks"):
+        (tmp_path / name).mkdir()
+    monkeypatch.setattr(mt5_bridge_client, "TRADE_COMMAND_DIR", str(tmp_path / "commands"))
+    monkeypatch.setattr(mt5_bridge_client, "TRADE_ACK_DIR", str(tmp_path / "acks"))
+    journal = str(tmp_path / "trade_journal.jsonl")
+    monkeypatch.setattr(trade_journaler, "JOURNAL_FILE", journal)
+    monkeypatch.setattr(performance_monitor, "JOURNAL_FILE", journal)
+    monkeypatch.setattr(multisymbol_manager, "get_sentiment",
+                        lambda symbol: {"score": 0.9, "urgency": "high", "direction": "bullish"})
+    stop = threading.Event()
+    ea = threading.Thread(target=_fake_ea, args=(str(tmp_path / "commands"), str(tmp_path / "acks"), stop))
+    ea.start()
+    yield journal
+    stop.set()
+    ea.join()
+    MARKET_DATA.shutdown()
+
+def test_process_symbol_end_to_end_on_simulator(sim_pipeline):
+    multisymbol_manager.process_symbol("EURUSD")
+    with open(sim_pipeline) as f:
+        entries = [json.loads(line) for line in f]
+    assert len(entries) == 1
+    execution = entries[0]["execution_result"]
+    assert execution["ack"]["status"] == "filled"
+    state = entries[0]["trade_context"]["fusion_inputs"]["market_state"]
+    # a buy is entered at the ask of the live quote
+    assert execution["entry_price"] == state["ask"] > state["bid"]
+
+def test_analyze_reuses_cycle_bars_and_drops_failed_structures(monkeypatch):
+    mt5_sim.configure(speed=0, start_time=time.time(), latency_ms=0)
+    MARKET_DATA.shutdown()
+
+    class FakeAnalysis:
+        def analyze(self, windows):
+            self.windows = windows
+            return {"EURUSD": {"error": "boom"}, "XAUUSD": {"pattern": "bos"}}
+
+    monkeypatch.setattr(multisymbol_manager, "structure_from_analysis", lambda result: {"type": result["pattern"]})
+    monkeypatch.setattr(multisymbol_manager, "STRUCTURES", {"EURUSD": {"type": "stale"}})
+    scheduler = multisymbol_manager.SymbolScheduler(symbols=["EURUSD", "XAUUSD"], analysis_processes=0)
+    scheduler.analysis = FakeAnalysis()
+    MARKET_DATA.snapshot(["EURUSD", "XAUUSD"])
+    fetches = dict(MARKET_DATA.stats)
+
+    scheduler._analyze(["EURUSD", "XAUUSD"])
+    assert MARKET_DATA.stats == fetches                 # no second MT5 round trip
+    assert len(scheduler.analysis.windows["XAUUSD"]) > 0
+    assert multisymbol_manager.STRUCTURES == {"XAUUSD": {"type": "bos"}}
+    MARKET_DATA.shutdown()
+
+def test_reprioritize_reads_broker_time_and_own_open_trades(monkeypatch):
+    now = 1_750_000_000
+    calls = {}
+
+    class FakePriority:
+        def reschedule(self, symbol, factors, now):
+            calls[symbol] = factors
+
+    monkeypatch.setattr(multisymbol_manager, "BROKER_UTC_OFFSET_HOURS", 3)
+    monkeypatch.setattr(multisymbol_manager.time, "time", lambda: now)
+    monkeypatch.setattr(MARKET_DATA, "bars", lambda *args, **kwargs: {"close": [1.0, 1.0]})
+    monkeypatch.setattr(multisymbol_manager, "priority_factors", lambda **kwargs: kwargs)
+    scheduler = multisymbol_manager.SymbolScheduler(symbols=["EURUSD", "XAUUSD"], analysis_processes=0,
+                                                    priority=FakePriority())
+    scheduler._open_trades = {"EURUSD-1": "EURUSD", "EURUSD-2": "EURUSD", "XAUUSD-1": "XAUUSD"}
+    # a bar that opened a minute ago in broker time (UTC+3) is live, not stale
+    fresh = {"timestamp": str(now + 3 * 3600 - 60)}
+    stale = {"timestamp": str(now - 60)}
+    scheduler._reprioritize(["EURUSD", "XAUUSD", "GBPJPY"], {"EURUSD": fresh, "XAUUSD": stale})
+    assert calls["EURUSD"]["open_positions"] == 2
+    assert calls["XAUUSD"] == {"closed": True}
+    assert calls["GBPJPY"] == {"closed": True}
+
+def test_no_trade_cycles_still_dump_metrics(monkeypatch):
+    dumps = []
+    monkeypatch.setattr(multisymbol_manager, "refresh_calendar", lambda: None)
+    monkeypatch.setattr(multisymbol_manager, "evaluate_symbol", lambda symbol, strategy, market_state: None)
+    monkeypatch.setattr(multisymbol_manager.METRICS, "maybe_dump", lambda: dumps.append(1))
+    multisymbol_manager.process_symbol("EURUSD", market_state={"symbol": "EURUSD"})
+    assert dumps == [1]
+
+def _scheduler(monkeypatch, symbols, process, **kwargs):
+    """SymbolScheduler over a counting fake snapshot: every symbol's state carries its cycle number."""
+    cycles = []
+
+    def snapshot(symbols):
+        cycles.append(len(cycles) + 1)
+        return {s: {"symbol": s, "cycle": cycles[-1]} for s in symbols}
+
+    monkeypatch.setattr(multisymbol_manager, "refresh_calendar", lambda: None)
+    monkeypatch.setattr(multisymbol_manager, "get_normalized_market_states", snapshot)
+    return multisymbol_manager.SymbolScheduler(symbols=symbols, process=process, analysis_processes=0, **kwargs)
+
+def test_scheduler_coalesces_queued_jobs_and_skips_overruns(monkeypatch):
+    seen = []
+
+    async def slow(symbol, strategy, market_state):
+        seen.append((symbol, market_state["cycle"]))
+        await asyncio.sleep(0.3)
+        return "no_trade"
+
+    scheduler = _scheduler(monkeypatch, ["A", "B"], slow, max_workers=1, cycle_seconds=0.05)
+    asyncio.run(scheduler.run(cycles=3))
+    # A runs through all three cycles; B waits in the queue and picks up the freshest state
+    assert seen == [("A", 1), ("B", 3)]
+    assert scheduler.stats["overruns"] == 2 and scheduler.stats["coalesced"] == 2
+    assert scheduler.state[("A", "default")]["overruns"] == 2
+    assert scheduler.stats["jobs"] == 2
+
+def test_scheduler_full_queue_blocks_the_producer(monkeypatch):
+    done = []
+    done_at_cycle_end = []
+
+    async def slow(symbol, strategy, market_state):
+        await asyncio.sleep(0.1)
+        done.append(symbol)
+
+    scheduler = _scheduler(monkeypatch, ["A", "B", "C", "D"], slow, max_workers=1)
+    monkeypatch.setattr(multisymbol_manager.METRICS, "maybe_dump", lambda: done_at_cycle_end.append(len(done)))
+    asyncio.run(scheduler.run(cycles=1))
+    # one running plus a queue of two: the fourth put waited for the first job to finish
+    assert done_at_cycle_end == [1]
+    assert done == ["A", "B", "C", "D"]
+
+def test_scheduler_stop_drains_and_returns(monkeypatch):
+    async def quick(symbol, strategy, market_state):
+        return "no_trade"
+
+    scheduler = _scheduler(monkeypatch, ["A"], quick, cycle_seconds=0.05)
+
+    async def scenario():
+        running = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.2)
+        scheduler.stop()
+        await asyncio.wait_for(running, timeout=2)
+
+    asyncio.run(scenario())
+    assert scheduler.stats["cycles"] >= 2
+    assert scheduler.stats["jobs"] == scheduler.stats["cycles"]
+
+def test_default_job_runs_one_strategy(monkeypatch):
+    async def custom(symbol, strategy, market_state):
+        return strategy
+
+    assert multisymbol_manager.SymbolScheduler(strategies=["a", "b"], analysis_processes=0).strategies == ["a"]
+    scheduler = _scheduler(monkeypatch, ["A"], custom, strategies=["a", "b"])
+    asyncio.run(scheduler.run(cycles=1))
+    assert {key: s["last_result"] for key, s in scheduler.state.items()} == {("A", "a"): "a", ("A", "b"): "b"}
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+import news_feed
+
+def _scored(i, bias=0.5):
+    return {"id": i, "directional_bias": bias, "tone": "hawkish", "urgency": "medium"}
+
+class FakeChat:
+    """Stands in for llm_gateway.chat: batched prompts get `batch_reply(ids)`, single ones a fixed reply."""
+
+    def __init__(self, batch_reply):
+        self.batch_reply = batch_reply
+        self.batch_sizes = []
+        self.single_calls = 0
+
+    async def __call__(self, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        match = re.match(r"Analyze each of these (\d+) news headlines", prompt)
+        if not match:
+            self.single_calls += 1
+            return json.dumps({"directional_bias": -0.2, "tone": "dovish", "urgency": "low"})
+        n = int(match.group(1))
+        self.batch_sizes.append(n)
+        return self.batch_reply(list(range(n)))
+
+@pytest.fixture
+def fake_chat(monkeypatch):
+    def install(batch_reply):
+        fake = FakeChat(batch_reply)
+        monkeypatch.setattr(news_feed, "chat", fake)
+        return fake
+    monkeypatch.setattr(news_feed, "current_batch_size", news_feed.MAX_BATCH_SIZE)
+    return install
+
+def test_batch_schema_validation(fake_chat):
+    fake_chat(lambda ids: json.dumps([
+        _scored(0),
+        {"id": 1, "directional_bias": 3.0, "tone": "hawkish", "urgency": "medium"},  # bias out of range
+        {"id": 2, "tone": "neutral", "urgency": "low"},                               # missing bias
+        _scored(7),                                                                   # unknown id
+        _scored(0, bias=-0.9),                                                        # duplicate id
+        {"id": 3, "directional_bias": 0.1, "tone": "angry", "urgency": "low"},        # bad enum
+    ]))
+    results = asyncio.run(news_feed.parse_sentiment_batch(["a", "b", "c", "d"]))
+    assert results == [{"directional_bias": 0.5, "tone": "hawkish", "urgency": "medium"}, None, None, None]
+
+@pytest.mark.parametrize("reply", ["not json", json.dumps({"id": 0}), json.dumps([1, 2])])
+def test_invalid_batch_reply_scores_nothing(fake_chat, reply):
+    fake_chat(lambda ids: reply)
+    assert asyncio.run(news_feed.parse_sentiment_batch(["a", "b"])) == [None, None]
+
+def test_plan_batches_respects_size_and_token_budget(monkeypatch):
+    assert news_feed.plan_batches(["h"] * 5, 2) == [[0, 1], [2, 3], [4]]
+    monkeypatch.setattr(news_feed, "BATCH_TOKEN_BUDGET", news_feed.PROMPT_OVERHEAD_TOKENS + 200)
+    long = "x" * 400                   # ~108 tokens + output per headline: one per batch
+    assert news_feed.plan_batches([long, long, "short"], 25) == [[0], [1, 2]]
+
+def test_batch_size_halves_on_failure_and_grows_on_clean_rounds(fake_chat):
+    headlines = [f"headline {i}" for i in range(30)]
+    fake = fake_chat(lambda ids: json.dumps([_scored(i) for i in ids[:-1]]))   # always drops one item
+    results = asyncio.run(news_feed.score_uncached(headlines))
+    assert fake.batch_sizes == [25, 5]
+    assert fake.single_calls == 2          # only the dropped items fall back
+    assert news_feed.current_batch_size == news_feed.MAX_BATCH_SIZE // 2
+    assert sum(r["tone"] == "dovish" for r in results) == 2
+
+    fake = fake_chat(lambda ids: json.dumps([_scored(i) for i in ids]))
+    asyncio.run(news_feed.score_uncached(headlines))
+    assert fake.batch_sizes == [12, 12, 6]
+    assert fake.single_calls == 0
+    assert news_feed.current_batch_size == news_feed.MAX_BATCH_SIZE // 2 + 1
+
+def test_batch_size_floor(fake_chat, monkeypatch):
+    monkeypatch.setattr(news_feed, "current_batch_size", news_feed.MIN_BATCH_SIZE)
+    fake_chat(lambda ids: "garbage")
+    results = asyncio.run(news_feed.score_uncached(["a", "b"]))
+    assert news_feed.current_batch_size == news_feed.MIN_BATCH_SIZE
+    assert [r["tone"] for r in results] == ["dovish", "dovish"]
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import news_feed
+
+FIXTURE_FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Fixture FX News</title>
+{items}
+</channel></rss>"""
+
+FIXTURE_ITEM = """<item><title>{title}</title><link>https://example.com/{guid}</link>
+<guid>{guid}</guid><pubDate>{date}</pubDate></item>"""
+
+class FixtureFeed:
+    def __init__(self):
+        self.items = []
+        self.version = 0
+        self.requests = []  # status code of every response served
+
+    def add(self, title, guid, date):
+        self.items.insert(0, FIXTURE_ITEM.format(title=title, guid=guid, date=date))
+        self.version += 1
+
+    def body(self):
+        return FIXTURE_FEED.format(items="\n".join(self.items)).encode()
+
+def _serve(feed):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            etag = f'"v{feed.version}"'
+            if self.headers.get("If-None-Match") == etag:
+                feed.requests.append(304)
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = feed.body()
+            feed.requests.append(200)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_fetch_news_async_conditional_get_and_watermark():
+    feeds = [FixtureFeed(), FixtureFeed()]
+    feeds[0].add("Fed holds rates steady", "a1", "Mon, 07 Jul 2025 14:00:00 GMT")
+    feeds[0].add("Powell signals patience", "a2", "Mon, 07 Jul 2025 14:05:00 GMT")
+    feeds[1].add("ECB's Lagarde warns on inflation", "b1", "Mon, 07 Jul 2025 13:00:00 GMT")
+    servers = [_serve(f) for f in feeds]
+    urls = [f"http://127.0.0.1:{s.server_port}/feed.xml" for s in servers]
+    news_feed.feed_state.clear()
+
+    async def run():
+        import httpx
+        async with httpx.AsyncClient() as client:
+            first = await news_feed.fetch_news_async(urls, client)
+            second = await news_feed.fetch_news_async(urls, client)
+            feeds[0].add("NFP beats expectations", "a3", "Mon, 07 Jul 2025 14:30:00 GMT")
+            third = await news_feed.fetch_news_async(urls, client)
+        return first, second, third
+
+    try:
+        first, second, third = asyncio.run(run())
+    finally:
+        for s in servers:
+            s.shutdown()
+
+    assert sorted(first) == sorted(["Fed holds rates steady", "Powell signals patience",
+                                    "ECB's Lagarde warns on inflation"])
+    assert second == []
+    assert feeds[0].requests == [200, 304, 200]
+    assert feeds[1].requests == [200, 304, 304]
+    assert third == ["NFP beats expectations"]
+
+def test_uncommitted_fetch_is_fetched_again():
+    feed = FixtureFeed()
+    feed.add("BoJ intervenes in yen", "c1", "Tue, 08 Jul 2025 02:00:00 GMT")
+    server = _serve(feed)
+    urls = [f"http://127.0.0.1:{server.server_port}/feed.xml"]
+    news_feed.feed_state.clear()
+
+    async def run():
+        import httpx
+        async with httpx.AsyncClient() as client:
+            failed = await news_feed.fetch_news_async(urls, client, commit=False)
+            # the cycle failed before publishing: nothing was committed
+            retried = await news_feed.fetch_news_async(urls, client, commit=False)
+            news_feed.commit_feed_state()
+            after = await news_feed.fetch_news_async(urls, client, commit=False)
+        return failed, retried, after
+
+    try:
+        failed, retried, after = asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    assert failed == retried == ["BoJ intervenes in yen"]
+    assert after == []
+    assert feed.requests == [200, 200, 304]
+
+if __name__ == "__main__":
+    test_fetch_news_async_conditional_get_and_watermark()
+    test_uncommitted_fetch_is_fetched_again()
+    print("All tests passed!")
@@ -0,0 +1,64 @@
+import numpy as np
+
+from bot_engine.priority_scheduler import (CLOSED_INTERVAL, MIN_INTERVAL, PriorityScheduler, interval_for,
+                                           priority_factors, volatility_trend)
+from bot_engine.regime_detector import detect_regime
+
+rng = np.random.default_rng(5)
+CALM = 100 + np.cumsum(rng.normal(0, 0.01, 200))
+WAKING = np.concatenate([CALM[:190], CALM[189] + np.cumsum(rng.normal(0, 0.1, 10))])
+
+def test_factors_rank_hot_symbols_above_quiet_ones():
+    assert volatility_trend(WAKING) > 2 and 0.5 < volatility_trend(CALM) < 1.5
+    quiet = priority_factors(closes=CALM)
+    hot = priority_factors(closes=WAKING, urgency="high", open_positions=1, minutes_to_event=10)
+    assert quiet["priority"] < 1 < hot["priority"]
+    assert {"volatility", "news", "positions", "event"} <= set(hot)
+    assert priority_factors(closed=True)["priority"] == 0
+    assert interval_for(0) == CLOSED_INTERVAL
+    assert interval_for(1e6) == MIN_INTERVAL
+
+def test_hot_symbols_cycle_more_often_within_budget():
+    symbols = ["HOT", "QUIET", "SHUT"] + [f"SYM{i}" for i in range(7)]
+    sched = PriorityScheduler(symbols, cycles_per_second=0.5, burst_seconds=4, now=0)
+    signals = {"HOT": {"closes": WAKING, "urgency": "high", "open_positions": 1},
+               "QUIET": {"closes": CALM}, "SHUT": {"closed": True}}
+    runs = {s: 0 for s in symbols}
+    t = 0.0
+    while t < 1800:
+        for symbol in sched.due(now=t):
+            runs[symbol] += 1
+            sched.reschedule(symbol, now=t, **signals.get(symbol, {}))
+        t += 1.0
+    # the budget caps the total: burst plus 0.5 cycles per second
+    assert sum(runs.values()) <= 4 * 0.5 + 1800 * 0.5 + 1
+    assert runs["HOT"] > 3 * runs["SYM0"] > 3 * runs["QUIET"]
+    assert runs["SHUT"] <= 1800 / CLOSED_INTERVAL + 1
+    assert sched.state["HOT"]["interval"] < sched.state["QUIET"]["interval"]
+
+def test_budget_throttles_and_reports_next_wakeup():
+    sched = PriorityScheduler([f"S{i}" for i in range(5)], cycles_per_second=1, burst_seconds=2, now=0)
+    assert sched.due(now=0) == ["S0", "S1"]
+    assert sched.stats["throttled"] == 1
+    assert sched.next_wakeup(now=0) == 1.0
+    assert sched.due(now=1.0) == ["S2"]
+    sched.remove(["S3"])
+    sched.add(["S3", "NEW"], now=1.0)
+    assert sched.due(now=10.0) == ["S4", "S3"]   # most overdue first
+    assert "S3" in sched.symbols and sched.due(now=11.0) == ["NEW"]
+
+def test_regime_thresholds_scale_to_the_bar_length():
+    m1_trend = 100 * np.exp(np.cumsum(rng.normal(2e-4, 1e-4, 60)))
+    m1_choppy = 100 * np.exp(np.cumsum(rng.normal(0, 1e-3, 60)))
+    # read as daily bars, any M1 series looks like a quiet range
+    assert detect_regime(m1_trend) == detect_regime(m1_choppy) == "range"
+    assert detect_regime(m1_trend, bar_seconds=60) == "trend"
+    assert detect_regime(m1_choppy, bar_seconds=60) == "volatile"
+    assert detect_regime(CALM, bar_seconds=60) == "range"
+
+if __name__ == "__main__":
+    test_factors_rank_hot_symbols_above_quiet_ones()
+    test_hot_symbols_cycle_more_often_within_budget()
+    test_budget_throttles_and_reports_next_wakeup()
+    test_regime_thresholds_scale_to_the_bar_length()
+    print("All tests passed!")
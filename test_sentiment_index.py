@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+import fakeredis
+from redis.exceptions import ConnectionError
+
+from bot_engine import news_stream_consumer
+from bot_engine.fusion_engine import SENTIMENT_THRESHOLD
+from bot_engine.news_stream_consumer import NEWS_STREAM, NewsStreamConsumer, NewsStreamReader
+from bot_engine.sentiment_index import SENTIMENT_HALF_LIFE, SymbolSentimentIndex
+
+T0 = 1_700_000_000.0
+
+def _item(headline, bias, urgency="medium", t=T0, **extra):
+    return {"headline": headline, "directional_bias": bias, "urgency": urgency,
+            "published_ms": int(t * 1000), **extra}
+
+def test_headline_to_symbol_matching():
+    index = SymbolSentimentIndex(["EURUSD", "XAUUSD", "GBPJPY"])
+    assert index.match("ECB signals more hikes") == {"EURUSD": 1}
+    # USD is the quote side of both USD symbols
+    assert index.match("Fed's Powell pushes back on cuts") == {"EURUSD": -1, "XAUUSD": -1}
+    # an explicit pair wins over its currency keywords
+    assert index.match("EUR/USD slides as dollar firms") == {"EURUSD": 1}
+    # both sides of GBPJPY mentioned: ambiguous for it
+    assert index.match("Sterling and yen both fall") == {}
+    assert index.match("Oil prices steady") == {}
+
+def test_decayed_score_and_urgency():
+    index = SymbolSentimentIndex(["EURUSD", "XAUUSD"])
+    updates = index.ingest([
+        _item("ECB hikes again", 0.9, "high"),
+        _item("Gold slumps", -0.8),
+        _item("Gold slumps again", -0.8, duplicate_of="Gold slumps"),
+    ])
+    assert updates == 2
+    assert index.stats["skipped_duplicates"] == 1
+
+    now = index.sentiment("EURUSD", now=T0)
+    assert now["direction"] == "bullish" and now["urgency"] == "high"
+    assert now["score"] > 0.65
+    later = index.sentiment("EURUSD", now=T0 + SENTIMENT_HALF_LIFE)
+    assert 0 < later["score"] < now["score"]
+    assert later["weight"] == 0.5
+    assert index.sentiment("EURUSD", now=T0 + 20 * SENTIMENT_HALF_LIFE)["urgency"] == "low"
+
+    assert index.sentiment("XAUUSD", now=T0)["direction"] == "bearish"
+    assert index.sentiment("GBPJPY", now=T0) == {"score": 0.0, "urgency": "low", "direction": "neutral",
+                                                  "weight": 0.0, "headlines": 0}
+
+def test_one_strong_headline_clears_the_entry_threshold():
+    index = SymbolSentimentIndex(["EURUSD", "XAUUSD"])
+    index.ingest([_item("ECB hikes by 50bp", 0.8, "high"), _item("Gold edges lower", -0.6)])
+    assert index.sentiment("EURUSD", now=T0)["score"] > SENTIMENT_THRESHOLD
+    assert abs(index.sentiment("XAUUSD", now=T0)["score"]) < SENTIMENT_THRESHOLD
+
+def test_late_headline_is_discounted():
+    index = SymbolSentimentIndex(["EURUSD"])
+    index.ingest([_item("ECB hikes", 0.8, t=T0)])
+    index.ingest([_item("ECB cuts", -0.8, t=T0 - SENTIMENT_HALF_LIFE)])
+    state = index.sentiment("EURUSD", now=T0)
+    assert state["weight"] == 1.5
+    assert state["score"] > 0
+
+def test_every_process_reads_every_headline():
+    async def scenario():
+        client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        for item in (_item("ECB hikes again", 0.9, "high"), _item("Gold slumps", -0.8)):
+            await client.xadd(NEWS_STREAM, {"data": json.dumps(item)})
+        indexes = [SymbolSentimentIndex(["EURUSD", "XAUUSD"]) for _ in range(2)]
+        for index in indexes:
+            reader = NewsStreamReader(client)
+            index.ingest([item for _, item in await reader.read(block_ms=None)])
+            assert await reader.read(block_ms=10) == []     # cursor advanced
+        # a shared consumer group would have split the headlines instead
+        grouped = [await NewsStreamConsumer(client, group="g", consumer=name).read(count=1, block_ms=None)
+                   for name in ("a", "b")]
+        return indexes, grouped, await client.xinfo_groups(NEWS_STREAM)
+
+    indexes, grouped, groups = asyncio.run(scenario())
+    for index in indexes:
+        assert index.stats["headlines"] == 2
+        assert index.sentiment("EURUSD", now=T0)["score"] > 0
+        assert index.sentiment("XAUUSD", now=T0)["score"] < 0
+    assert [len(batch) for batch in grouped] == [1, 1]
+    assert [g["name"] for g in groups] == ["g"]         # readers leave no groups behind
+
+def test_reader_survives_redis_errors(monkeypatch):
+    monkeypatch.setattr(news_stream_consumer, "RECONNECT_BASE_SECONDS", 0.01)
+
+    class FlakyRedis:
+        def __init__(self, client):
+            self.client = client
+            self.failures = 2
+
+        async def xread(self, *args, **kwargs):
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("connection reset")
+            return await self.client.xread(*args, **kwargs)
+
+    async def scenario():
+        client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        await client.xadd(NEWS_STREAM, {"data": json.dumps(_item("ECB hikes again", 0.9, "high"))})
+        index = SymbolSentimentIndex(["EURUSD"])
+        stop = asyncio.Event()
+
+        def handler(items):
+            index.ingest(items)
+            stop.set()
+
+        flaky = FlakyRedis(client)
+        await asyncio.wait_for(NewsStreamReader(flaky).consume(handler, stop, block_ms=10), timeout=2)
+        return index, flaky
+
+    index, flaky = asyncio.run(scenario())
+    assert flaky.failures == 0
+    assert index.stats["headlines"] == 1
+
+if __name__ == "__main__":
+    test_headline_to_symbol_matching()
+    test_decayed_score_and_urgency()
+    test_one_strong_headline_clears_the_entry_threshold()
+    test_late_headline_is_discounted()
+    test_every_process_reads_every_headline()
+    print("All tests passed!")
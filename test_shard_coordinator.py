@@ -0,0 +1,233 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("MT5_BACKEND", "sim")
+
+import fakeredis
+import redis.asyncio as aioredis
+
+import mt5_bridge_client
+from bot_engine import multisymbol_manager, portfolio_risk_manager
+from bot_engine.shard_coordinator import ShardCoordinator
+
+SYMBOLS = [f"SYM{i:02d}" for i in range(12)]
+LEASE_MS = 400
+
+def _node(server, name):
+    return ShardCoordinator(fakeredis.FakeAsyncRedis(server=server), node_id=name,
+                            prefix="test", heartbeat_seconds=0.05, lease_ms=LEASE_MS)
+
+def test_rebalance_failover_and_leader_risk_checks():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        a, b, c = _node(server, "a"), _node(server, "b"), _node(server, "c")
+        await a.register_symbols(SYMBOLS)
+        await a.heartbeat()
+        assert a.owned == SYMBOLS and a.is_leader
+
+        # two nodes join: the first owner sheds its excess, the newcomers claim it
+        for _ in range(2):
+            for node in (b, c, a):
+                await node.heartbeat()
+        owned = [set(n.owned) for n in (a, b, c)]
+        assert [len(o) for o in owned] == [4, 4, 4]
+        assert set().union(*owned) == set(SYMBOLS)
+        assert [n.is_leader for n in (a, b, c)] == [True, False, False]
+
+        # portfolio limits are enforced by the leader for every replica
+        portfolio_risk_manager.active_trades.clear()
+        requests = [asyncio.create_task(b.request_risk_check("SYM05", 2.0, f"t{i}")) for i in range(3)]
+        await asyncio.sleep(0.05)
+        await a.serve_risk_checks(timeout=0.2)
+        results = [await r for r in requests]
+        assert [ok for ok, _ in results] == [True, True, False]
+
+        # the leader dies: its leases and leadership expire and survivors take over
+        await asyncio.sleep(LEASE_MS / 1000 + 0.1)
+        for _ in range(2):
+            for node in (b, c):
+                await node.heartbeat()
+        assert set(b.owned) | set(c.owned) == set(SYMBOLS)
+        assert not set(b.owned) & set(c.owned)
+        leader = b if b.is_leader else c
+        assert leader.is_leader and not (b.is_leader and c.is_leader)
+        # the open-trade book survived the leader change
+        assert len(portfolio_risk_manager.active_trades["SYM05"]) == 2
+
+        # graceful leave hands leases back immediately
+        await b.release_all()
+        await c.heartbeat()
+        assert c.owned == SYMBOLS
+
+    asyncio.run(scenario())
+
+async def _serve(leader, stop):
+    while not stop.is_set():
+        await leader.serve_risk_checks(timeout=0.05)
+        await asyncio.sleep(0)
+
+def test_risk_check_close_and_check_again():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        leader, replica = _node(server, "leader"), _node(server, "replica")
+        await leader.register_symbols(SYMBOLS)
+        await leader.heartbeat()
+        await replica.heartbeat()
+        portfolio_risk_manager.active_trades.clear()
+        stop = asyncio.Event()
+        serving = asyncio.create_task(_serve(leader, stop))
+        try:
+            assert (await replica.request_risk_check("SYM01", 1.0, "t1"))[0]
+            assert (await replica.request_risk_check("SYM01", 1.0, "t2"))[0]
+            assert await replica.request_risk_check("SYM01", 1.0, "t3") == (False, "Max trades for SYM01 reached")
+            assert await replica.request_close("SYM01", "t1") == (True, "Closed")
+            assert (await replica.request_risk_check("SYM01", 1.0, "t3"))[0]
+            book = json.loads(await replica.redis.get("test:risk:active"))
+            return sorted(t["trade_id"] for t in book["SYM01"])
+        finally:
+            stop.set()
+            await serving
+
+    assert asyncio.run(scenario()) == ["t2", "t3"]
+
+def test_leader_drops_risk_checks_the_replica_gave_up_on():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        leader, replica = _node(server, "leader"), _node(server, "replica")
+        await leader.register_symbols(SYMBOLS)
+        portfolio_risk_manager.active_trades.clear()
+        # no leader yet: both checks time out and the replica sends no trade
+        for trade_id in ("t1", "t2"):
+            assert await replica.request_risk_check("SYM02", 1.0, trade_id, timeout=0.05) == \
+                (False, "No portfolio risk leader")
+        await leader.heartbeat()
+        assert await leader.serve_risk_checks(timeout=0.05) == 2
+        assert leader.stats["expired"] == 2
+        assert not portfolio_risk_manager.active_trades.get("SYM02")
+        stop = asyncio.Event()
+        serving = asyncio.create_task(_serve(leader, stop))
+        try:
+            return [(await replica.request_risk_check("SYM02", 1.0, t))[0] for t in ("t3", "t4")]
+        finally:
+            stop.set()
+            await serving
+
+    assert asyncio.run(scenario()) == [True, True]
+
+def test_scheduler_releases_failed_and_exited_trades(tmp_path, monkeypatch):
+    acks = iter(["timeout", "filled"])
+    sends = []
+
+    def send(trade):
+        sends.append(trade["trade_id"])
+        if len(sends) == 1:
+            raise OSError("bridge dir unavailable")
+        return trade["trade_id"]
+
+    async def ack(trade_id):
+        return {"status": next(acks), "trade_id": trade_id}
+
+    trade = {"symbol": "SYM01", "direction": "BUY", "volume": 0.1, "sl": 1.0, "tp": 2.0}
+    monkeypatch.setattr(multisymbol_manager, "evaluate_symbol",
+                        lambda symbol, strategy, market_state: (dict(trade), {"fusion_decision": {"risk_pct": 1.0}}))
+    monkeypatch.setattr(multisymbol_manager, "send_trade_command", send)
+    monkeypatch.setattr(multisymbol_manager, "wait_for_ack_async", ack)
+    monkeypatch.setattr(multisymbol_manager, "journal_trade", lambda *args: None)
+    monkeypatch.setattr(mt5_bridge_client, "TRADE_ACK_DIR", str(tmp_path))
+
+    async def scenario():
+        server = fakeredis.FakeServer()
+        leader, replica = _node(server, "leader"), _node(server, "replica")
+        await leader.register_symbols(SYMBOLS)
+        await leader.heartbeat()
+        await replica.heartbeat()
+        portfolio_risk_manager.active_trades.clear()
+        scheduler = multisymbol_manager.SymbolScheduler(symbols=["SYM01"], coordinator=replica,
+                                                        analysis_processes=0)
+        scheduler._executor = ThreadPoolExecutor(max_workers=2)
+        stop = asyncio.Event()
+        serving = asyncio.create_task(_serve(leader, stop))
+        book = lambda: [t["trade_id"] for t in portfolio_risk_manager.active_trades.get("SYM01", [])]
+        try:
+            try:
+                await scheduler._process_job("SYM01", "default", {})
+            except OSError:
+                pass
+            assert book() == []                     # send failed: slot released
+            await scheduler._process_job("SYM01", "default", {})
+            assert book() == []                     # ack timed out: slot released
+            await scheduler._process_job("SYM01", "default", {})
+            filled = sends[-1]
+            assert book() == [filled] and scheduler._open_trades == {filled: "SYM01"}
+            assert await scheduler.check_exits() == 0
+            with open(tmp_path / f"{filled}{mt5_bridge_client.EXIT_SUFFIX}", "w") as f:
+                json.dump({"trade_id": filled, "exit_reason": "tp_hit"}, f)
+            assert await scheduler.check_exits() == 1
+            assert book() == [] and scheduler._open_trades == {}
+        finally:
+            stop.set()
+            await serving
+            scheduler._executor.shutdown()
+        return sends
+
+    sends = asyncio.run(scenario())
+    assert len(set(sends)) == 3 and all(s.startswith("SYM01_") for s in sends)
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _engine_process(port, name, results, done):
+    async def main():
+        client = aioredis.Redis(host="127.0.0.1", port=port)
+        node = ShardCoordinator(client, node_id=name, prefix="proc", heartbeat_seconds=0.05, lease_ms=LEASE_MS)
+        await node.register_symbols(SYMBOLS)
+        stop = asyncio.Event()
+        task = asyncio.create_task(node.run(stop))
+        while not done.is_set():
+            results[name] = node.owned
+            await asyncio.sleep(0.05)
+        stop.set()
+        await task
+    asyncio.run(main())
+
+def _partitioned(owned):
+    all_owned = sorted(s for symbols in owned.values() for s in symbols)
+    return (sorted(owned) == ["node0", "node1", "node2"] and all_owned == SYMBOLS
+            and all(len(symbols) == 4 for symbols in owned.values()))
+
+def test_engine_processes_partition_symbols():
+    port = _free_port()
+    server = fakeredis.TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with multiprocessing.Manager() as manager:
+            results, done = manager.dict(), manager.Event()
+            procs = [multiprocessing.Process(target=_engine_process, args=(port, f"node{i}", results, done))
+                     for i in range(3)]
+            for p in procs:
+                p.start()
+            deadline = time.monotonic() + 20
+            while not _partitioned(dict(results)) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            owned = dict(results)
+            done.set()
+            for p in procs:
+                p.join(timeout=15)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert _partitioned(owned), owned
+
+if __name__ == "__main__":
+    test_rebalance_failover_and_leader_risk_checks()
+    test_risk_check_close_and_check_again()
+    test_engine_processes_partition_symbols()
+    print("All tests passed!")
@@ -0,0 +1,83 @@
+import random
+
+from bot_engine.timer_wheel import SLOTS, BarCloseScheduler, TimerWheel, bar_close
+
+T0 = 1_700_000_000.0            # 2023-11-14 22:13:20 UTC
+
+def test_wheel_fires_every_timer_once_and_never_early():
+    rng = random.Random(11)
+    wheel = TimerWheel(resolution=0.1, now=T0)
+    now, live, cancelled = T0, {}, []
+    for _ in range(5000):
+        for _ in range(rng.randrange(3)):
+            deadline = now + rng.choice([rng.uniform(0, 5), rng.uniform(0, 600), rng.uniform(0, 90_000)])
+            timer = wheel.schedule(deadline, deadline)
+            live[id(timer)] = timer
+        if live and rng.random() < 0.1:
+            timer = wheel.schedule(now + 30)
+            wheel.cancel(timer)
+            cancelled.append(timer)
+        previous, now = now, now + rng.choice([0.05, 0.3, 7.0, 120.0])
+        for timer in wheel.advance(now):
+            assert not timer.cancelled and id(timer) in live
+            # due after the previous advance (allowing one tick of rounding) and not after now
+            assert previous - 0.1 < timer.deadline <= now
+            del live[id(timer)]
+    wheel.advance(now + 100_000)
+    assert not len(wheel) and wheel.stats["fired"] == wheel.stats["scheduled"] - len(cancelled)
+
+def test_bar_boundaries_batching_and_offsets():
+    assert bar_close(T0, "M1") == 1_700_000_040.0
+    assert bar_close(T0, "H1") == 1_700_002_800.0
+    assert bar_close(1_700_002_800.0, "H1") == 1_700_006_400.0       # strictly after
+    assert bar_close(T0, "D1", utc_offset_hours=2) == 1_700_085_600.0      # 00:00 broker = 22:00 UTC
+    assert bar_close(T0, "W1") == 1_700_352_000.0                     # Sunday 00:00 UTC
+
+    sched = BarCloseScheduler(TimerWheel(now=T0), offset=0.5)
+    for symbol in ("XAUUSD", "EURUSD"):
+        for timeframe in ("M1", "M5", "H1"):
+            sched.add_job(symbol, timeframe, now=T0)
+    fired = []
+    t = T0
+    while t < 1_700_002_800.0 + 10:
+        t += 0.25
+        fired.extend(sched.poll(now=t))
+    boundaries = [b for b, _ in fired]
+    assert boundaries == sorted(set(boundaries)) and len(fired) == 47   # one batch per minute
+    top_of_hour = dict(fired)[1_700_002_800.0]
+    assert sorted(top_of_hour) == sorted((s, tf) for s in ("XAUUSD", "EURUSD") for tf in ("M1", "M5", "H1"))
+    assert 0.5 <= sched.stats["max_lateness"] + 0.5 <= 0.5 + 0.25 + 0.1 + 1e-6
+
+def test_rearm_is_drift_free_and_skips_missed_bars():
+    sched = BarCloseScheduler(TimerWheel(now=T0), offset=1.0)
+    sched.add_job("XAUUSD", "M1", now=T0)
+    t, fired = T0, []
+    for _ in range(600):
+        t += 1.37               # a driver that wakes at awkward intervals
+        fired += [b for b, _ in sched.poll(now=t)]
+    assert fired == [1_700_000_040.0 + 60 * k for k in range(len(fired))]
+    # suspended for ten minutes: the missed bars are skipped, not replayed
+    t += 600
+    assert len(sched.poll(now=t)) == 1 and sched.stats["missed_bars"] == 9
+    assert [b for b, _ in sched.poll(now=bar_close(t, "M1") + 1.0)] == [bar_close(t, "M1")]
+    sched.remove_job("XAUUSD", "M1")
+    assert not sched.jobs and sched.poll(now=t + 3600) == []
+
+def test_cost_per_tick_is_independent_of_timer_count():
+    counts = {}
+    for n in (100, 10_000):
+        wheel = TimerWheel(resolution=0.1, now=T0)
+        for i in range(n):
+            wheel.schedule(T0 + 3600 + i % 60, i)   # all far in the future
+        wheel.advance(T0 + 60)
+        counts[n] = wheel.stats["cascaded"]
+        # the driver sleeps to the next occupied slot or cascade point, at most SLOTS ticks ahead
+        assert 0 < wheel.next_wakeup() - (T0 + 60) <= SLOTS * 0.1
+    assert counts == {100: 0, 10_000: 0}
+
+if __name__ == "__main__":
+    test_wheel_fires_every_timer_once_and_never_early()
+    test_bar_boundaries_batching_and_offsets()
+    test_rearm_is_drift_free_and_skips_missed_bars()
+    test_cost_per_tick_is_independent_of_timer_count()
+    print("All tests passed!")
@@ -1,6 +1,6 @@
 # trade_executor/mt5_order.py
 
-import MetaTrader5 as mt5
+from mt5_backend import mt5
 from datetime import datetime
 
 def send_order(symbol: str, volume: float, type: str, sl: float, tp: float, entry_type: str = "market"):